@@ -0,0 +1,12 @@
+"""
+Benchmarks 패키지
+ML 파이프라인 성능 측정 스크립트들을 관리합니다.
+
+실행 예시 (프로젝트 루트에서):
+- python -m benchmarks.separation_batch
+- python -m benchmarks.bench_pipeline
+- python -m benchmarks.quantization_report --wav-dir test_wav
+- python -m benchmarks.precision_report --wav-dir test_wav
+- python -m benchmarks.worker_memory --workers 4
+- python -m benchmarks.load_test (pip install -r requirements-bench.txt 필요)
+"""
@@ -0,0 +1,303 @@
+"""
+파이프라인 벤치마크
+단계별(load_wav_file, adaptive_level_adjust, separate, mel, save_mel_tensor, ONNX 추론) 소요 시간과
+AudioAnalysisService 전체 경로의 처리량을 배치 크기 x torch 스레드 수 조합으로 측정합니다.
+결과는 JSON으로 저장하고, 기준(baseline) 결과와 비교해 느려진 항목이 있으면 종료 코드 1을 반환합니다.
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_pipeline --clips 4 --threads 2 4 --batch-sizes 1 4 --output bench_pipeline.json
+    python -m benchmarks.bench_pipeline --wav-dir test_wav --save-baseline benchmarks/baselines/pipeline.json
+    python -m benchmarks.bench_pipeline --baseline benchmarks/baselines/pipeline.json --tolerance 0.15
+"""
+
+import io
+import os
+import sys
+import glob
+import json
+import time
+import wave
+import platform
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import torch
+import onnxruntime as ort
+
+from ml.pipeline import mel as mel_module
+from ml.pipeline.config import SAMPLE_RATE, SEGMENT_DURATION
+from ml.pipeline.audio_preprocessing import load_wav_file, resolve_target_parts
+from ml.pipeline.rms_normalize import adaptive_level_adjust
+from ml.pipeline.model import separate
+from ml.pipeline.mel import compute_mel_tensor, save_mel_tensor
+from ml.pipeline.onnx import submit_mel_onnx, onnx_model_path_for_part
+from ml.services.audio_service import AudioAnalysisService
+
+
+def encode_wav_pcm16(audio, sample_rate=SAMPLE_RATE):
+    """float32 모노 오디오를 16bit PCM WAV bytes로 인코딩합니다 (업로드와 같은 메모리 입력)."""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def make_wav_clips(num_clips, wav_dir=None, seed=0):
+    """
+    벤치마크용 WAV bytes를 준비합니다. wav_dir가 있으면 그 파일들을 반복 사용하고,
+    없으면 10초 44.1kHz 합성 클립(잡음 + 클립마다 다른 톤)을 만듭니다.
+    클립마다 내용이 달라야 결과/분리 캐시에 적중하지 않습니다.
+    """
+    if wav_dir:
+        wav_paths = sorted(glob.glob(os.path.join(wav_dir, "*.wav")))
+        if not wav_paths:
+            raise FileNotFoundError(f"❌ {wav_dir} 폴더에 WAV 파일이 없습니다.")
+        contents = []
+        for path in wav_paths:
+            with open(path, "rb") as f:
+                contents.append(f.read())
+        return [contents[i % len(contents)] for i in range(num_clips)]
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(SAMPLE_RATE * SEGMENT_DURATION) / SAMPLE_RATE
+    clips = []
+    for i in range(num_clips):
+        tone = 0.2 * np.sin(2 * np.pi * (120 + 40 * i) * t)
+        clips.append(encode_wav_pcm16((tone + 0.05 * rng.standard_normal(t.shape)).astype(np.float32)))
+    return clips
+
+
+def summarize(samples, count=1):
+    """
+    반복 측정값(초)을 통계(ms)로 정리합니다.
+
+    :param samples: 반복별 소요 시간 (초)
+    :param count: 한 번의 측정에 처리한 클립 수 (per_clip_ms 계산용)
+    """
+    ms = np.array(samples) * 1000
+    return {
+        "repeats": len(samples),
+        "min_ms": round(float(ms.min()), 3),
+        "median_ms": round(float(np.median(ms)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "per_clip_ms": round(float(np.median(ms)) / count, 3)
+    }
+
+
+def time_call(fn, repeats, count=1):
+    """fn을 repeats번 실행한 통계를 반환합니다 (첫 실행은 워밍업으로 제외)."""
+    fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, count)
+
+
+def bench_stages(service, clips, target_parts, repeats):
+    """
+    단계별 소요 시간을 측정합니다. 각 단계는 이전 단계의 결과를 입력으로 사용하고,
+    첫 번째 클립 기준으로 측정합니다.
+    """
+    model = service.model
+    source_names = service.source_names
+    clip = clips[0]
+    results = {}
+
+    results["load_wav_file"] = time_call(lambda: load_wav_file(clip), repeats)
+    audio = load_wav_file(clip)
+
+    results["adaptive_level_adjust"] = time_call(lambda: adaptive_level_adjust(audio.squeeze()), repeats)
+    normalized = adaptive_level_adjust(audio.squeeze())
+    if isinstance(normalized, torch.Tensor):
+        normalized = normalized.numpy()
+
+    results["separate"] = time_call(lambda: separate(model, normalized), repeats)
+    sources = separate(model, normalized)
+
+    part_sources = [(part, sources[source_names.index(part)]) for part in target_parts]
+    results["mel"] = time_call(
+        lambda: [compute_mel_tensor(source) for _, source in part_sources], repeats, len(part_sources)
+    )
+
+    # save_mel_tensor는 mel 계산 + .pt 저장 (벤치마크 중에는 임시 폴더에 저장)
+    original_output = mel_module.OUTPUT_FOLDER
+    with tempfile.TemporaryDirectory() as output_dir:
+        mel_module.OUTPUT_FOLDER = output_dir
+        try:
+            timestamp_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            results["save_mel_tensor"] = time_call(
+                lambda: [save_mel_tensor(source, 0, part, timestamp_str) for part, source in part_sources],
+                repeats, len(part_sources)
+            )
+        finally:
+            mel_module.OUTPUT_FOLDER = original_output
+
+    for part, source in part_sources:
+        onnx_model_path = onnx_model_path_for_part(service.onnx_model_base_path, part)
+        if not os.path.exists(onnx_model_path):
+            print(f"⚠️ {part} ONNX 모델 없음, 측정 생략: {onnx_model_path}")
+            continue
+        part_mel = compute_mel_tensor(source)
+        results[f"onnx_predict.{part}"] = time_call(
+            lambda: submit_mel_onnx(onnx_model_path, part_mel).result(), repeats
+        )
+
+    return results
+
+
+def bench_end_to_end(service, clips, target_parts, batch_size, repeats):
+    """
+    AudioAnalysisService 전체 경로(디코딩 → 분리 → mel → ONNX)를 측정합니다.
+    batch_size가 1이면 analyze_audio_file, 그 이상이면 analyze_audio_files를 사용합니다.
+    """
+    def run():
+        for i in range(0, len(clips), batch_size):
+            chunk = clips[i:i + batch_size]
+            if batch_size == 1:
+                results = [service.analyze_audio_file(chunk[0], target_parts=target_parts)]
+            else:
+                results = service.analyze_audio_files(chunk, target_parts=target_parts)
+            errors = [r["error_message"] for r in results if r["status"] != "success"]
+            if errors:
+                raise RuntimeError(f"❌ 분석 실패: {errors[0]}")
+
+    stats = time_call(run, repeats, len(clips))
+    stats["clips_per_sec"] = round(len(clips) / (stats["median_ms"] / 1000), 3)
+    return stats
+
+
+def flatten_metrics(report):
+    """기준 비교용 {지표 이름: ms} (작을수록 좋음)"""
+    metrics = {f"stage.{name}": stats["median_ms"] for name, stats in report["stages"].items()}
+    for run in report["end_to_end"]:
+        metrics[f"end_to_end.threads={run['threads']}.batch={run['batch_size']}"] = run["per_clip_ms"]
+    return metrics
+
+
+def compare_with_baseline(report, baseline, tolerance):
+    """
+    기준 결과와 비교합니다.
+
+    :param tolerance: 허용 비율 (0.15면 기준보다 15% 넘게 느려진 항목을 회귀로 판정)
+    :return: 회귀 항목 리스트
+    """
+    current = flatten_metrics(report)
+    reference = flatten_metrics(baseline)
+
+    print(f"\n📏 기준 비교 (허용: +{tolerance * 100:.0f}%, 기준: {baseline.get('timestamp', '?')})")
+    regressions = []
+    for name, value in current.items():
+        if name not in reference:
+            print(f"   {name:<45} {value:>10.1f}ms   (기준 없음)")
+            continue
+        ratio = value / reference[name] if reference[name] > 0 else 1.0
+        regressed = ratio > 1.0 + tolerance
+        mark = "❌" if regressed else "✅"
+        print(f"   {mark} {name:<43} {reference[name]:>10.1f}ms → {value:>10.1f}ms (x{ratio:.2f})")
+        if regressed:
+            regressions.append({"metric": name, "baseline_ms": reference[name], "current_ms": value,
+                                "ratio": round(ratio, 3)})
+    return regressions
+
+
+def environment_info():
+    """결과 비교 시 참고할 실행 환경"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "onnxruntime": ort.__version__
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ML 파이프라인 단계별/전체 경로 벤치마크")
+    parser.add_argument("--clips", type=int, default=4, help="전체 경로 측정에 사용할 클립 수")
+    parser.add_argument("--wav-dir", default=None, help="합성 클립 대신 사용할 WAV 폴더 (예: test_wav)")
+    parser.add_argument("--parts", default=None, help="분석할 부품들 (콤마로 구분, 빈 값이면 noise 제외 전체)")
+    parser.add_argument("--repeats", type=int, default=3, help="측정 반복 횟수 (워밍업 1회 별도)")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="비교할 torch 스레드 수들 (0이면 기본값)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4], help="전체 경로 배치 크기들")
+    parser.add_argument("--skip-stages", action="store_true", help="단계별 측정 생략 (전체 경로만)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON 경로")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="기준 대비 허용 비율 (0.15 = 15%%)")
+    parser.add_argument("--save-baseline", default=None, help="이번 결과를 기준 결과로 저장할 경로")
+    args = parser.parse_args()
+
+    default_threads = torch.get_num_threads()
+    service = AudioAnalysisService()
+    # 반복 측정이 캐시 적중으로 끝나지 않도록 결과/분리 캐시 비활성화
+    service.result_cache.enabled = False
+    service.separation_cache.enabled = False
+
+    target_parts = resolve_target_parts(
+        service.source_names, args.parts.split(",") if args.parts else None
+    )
+    clips = make_wav_clips(args.clips, args.wav_dir)
+
+    report = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": environment_info(),
+        "config": {
+            "clips": len(clips),
+            "wav_dir": args.wav_dir,
+            "target_parts": target_parts,
+            "repeats": args.repeats
+        },
+        "stages": {},
+        "end_to_end": []
+    }
+
+    try:
+        if not args.skip_stages:
+            torch.set_num_threads(args.threads[0] or default_threads)
+            print(f"\n⏱️ 단계별 측정 (torch threads: {torch.get_num_threads()})")
+            report["stages"] = bench_stages(service, clips, target_parts, args.repeats)
+
+        for threads in args.threads:
+            torch.set_num_threads(threads or default_threads)
+            for batch_size in args.batch_sizes:
+                print(f"\n⏱️ 전체 경로 측정 (torch threads: {torch.get_num_threads()}, batch: {batch_size})")
+                stats = bench_end_to_end(service, clips, target_parts, max(1, batch_size), args.repeats)
+                report["end_to_end"].append({"threads": torch.get_num_threads(), "batch_size": batch_size, **stats})
+    finally:
+        service.shutdown()
+
+    print("\n📊 파이프라인 벤치마크 결과")
+    for name, stats in report["stages"].items():
+        print(f"   {name:<30} median {stats['median_ms']:>10.1f}ms  p95 {stats['p95_ms']:>10.1f}ms")
+    for run in report["end_to_end"]:
+        print(f"   end_to_end threads={run['threads']:<3} batch={run['batch_size']:<3} "
+              f"{run['per_clip_ms']:>10.1f}ms/clip  {run['clips_per_sec']:.3f} clips/sec")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+        report["baseline"] = {"path": args.baseline, "tolerance": args.tolerance, "regressions": regressions}
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"💾 결과가 {path}에 저장되었습니다.")
+
+    if regressions:
+        print(f"❌ 기준 대비 느려진 항목 {len(regressions)}개")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+HTTP 부하 테스트
+/developer/device/analyze, /developer/batch/analyze에 동시 요청을 보내
+처리량, 지연 시간(p50/p95/p99), 오류율, 이벤트 루프 지연(lag)을 측정합니다.
+
+실행 모드:
+- asgi: FastAPI 앱을 같은 프로세스에서 httpx ASGITransport로 호출 (소켓 없음)
+- uvicorn: 같은 프로세스/이벤트 루프에서 uvicorn 서버를 띄우고 로컬 포트로 호출
+- --url: 이미 실행 중인 서버로 요청 (Redis 대체 없음, lag는 클라이언트 루프 기준)
+
+asgi/uvicorn 모드에서는 Redis를 fakeredis로 대체하므로 Redis 서버가 필요 없습니다.
+같은 test_wav 파일을 반복해서 보내므로 기본적으로 결과/분리 캐시를 끕니다 (--keep-cache로 유지).
+
+실행 (프로젝트 루트에서, pip install -r requirements-bench.txt 필요):
+    python -m benchmarks.load_test --concurrency 8 --requests 64
+    python -m benchmarks.load_test --mode uvicorn --concurrency 16 --duration 60 --mix analyze=3,batch=1
+    python -m benchmarks.load_test --url http://localhost:8000 --concurrency 4 --requests 20
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import argparse
+import importlib
+import contextlib
+from datetime import datetime
+
+import numpy as np
+import httpx
+
+ANALYZE_PATH = "/developer/device/analyze"
+BATCH_ANALYZE_PATH = "/developer/batch/analyze"
+
+
+def load_fixtures(wav_dir):
+    """부하 테스트에 사용할 WAV 파일들을 (파일명, bytes)로 읽습니다."""
+    wav_paths = sorted(glob.glob(os.path.join(wav_dir, "*.wav")))
+    if not wav_paths:
+        raise FileNotFoundError(f"❌ {wav_dir} 폴더에 WAV 파일이 없습니다.")
+    fixtures = []
+    for path in wav_paths:
+        with open(path, "rb") as f:
+            fixtures.append((os.path.basename(path), f.read()))
+    return fixtures
+
+
+def parse_mix(mix):
+    """'analyze=3,batch=1' → ['analyze', 'analyze', 'analyze', 'batch'] (요청 순환 순서)"""
+    schedule = []
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in ("analyze", "batch"):
+            raise ValueError(f"❌ 지원하지 않는 요청 유형: {name} (analyze 또는 batch)")
+        schedule.extend([name] * int(weight or 1))
+    if not schedule:
+        raise ValueError("❌ --mix가 비어 있습니다.")
+    return schedule
+
+
+def latency_stats(samples_ms):
+    """지연 시간(ms) 통계"""
+    if not samples_ms:
+        return {"count": 0}
+    ms = np.array(samples_ms)
+    return {
+        "count": len(samples_ms),
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2)
+    }
+
+
+class LoopLagMonitor:
+    """
+    이벤트 루프 지연 측정기. interval마다 잠들었다 깨어난 시각이 예정보다 늦어진 만큼을 기록합니다.
+    asgi/uvicorn 모드에서는 서버와 같은 루프이므로 요청 처리 중 루프를 막는 작업을 드러냅니다.
+    """
+
+    def __init__(self, interval_ms=10.0):
+        self.interval = interval_ms / 1000.0
+        self.lags_ms = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags_ms.append(max(0.0, (time.perf_counter() - expected) * 1000))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    def get_stats(self):
+        stats = latency_stats(self.lags_ms)
+        stats["interval_ms"] = self.interval * 1000
+        return stats
+
+
+class LoadGenerator:
+    """동시 작업자들이 요청 유형 순서(schedule)를 돌며 요청을 보내고 결과를 기록합니다."""
+
+    def __init__(self, client, fixtures, schedule, device_id, batch_files, target_parts=None):
+        self.client = client
+        self.fixtures = fixtures
+        self.schedule = schedule
+        self.device_id = device_id
+        self.batch_files = batch_files
+        self.target_parts = target_parts
+        self.latencies = {"analyze": [], "batch": []}
+        self.errors = {"analyze": 0, "batch": 0}
+        self.error_samples = []
+        self._issued = 0
+
+    def _next_index(self):
+        index = self._issued
+        self._issued += 1
+        return index
+
+    async def _send(self, kind, index):
+        """요청 하나를 보내고 (성공 여부, 오류 설명)을 반환합니다."""
+        data = {"device_id": str(self.device_id)}
+        if kind == "analyze":
+            filename, content = self.fixtures[index % len(self.fixtures)]
+            if self.target_parts:
+                data["target_parts"] = self.target_parts
+            response = await self.client.post(
+                ANALYZE_PATH, data=data, files={"file": (filename, content, "audio/wav")}
+            )
+        else:
+            files = []
+            for offset in range(self.batch_files):
+                filename, content = self.fixtures[(index + offset) % len(self.fixtures)]
+                files.append(("files", (filename, content, "audio/wav")))
+            response = await self.client.post(BATCH_ANALYZE_PATH, data=data, files=files)
+
+        if response.status_code != 200:
+            return False, f"HTTP {response.status_code}: {response.text[:200]}"
+        body = response.json()
+        if kind == "analyze" and body.get("status") != "success":
+            return False, body.get("error_message", "status != success")
+        if kind == "batch":
+            failed = [r for r in body.get("results", []) if r.get("status") != "success"]
+            if failed:
+                return False, failed[0].get("error_message", "status != success")
+        return True, None
+
+    async def _worker(self, deadline, max_requests):
+        while True:
+            if time.perf_counter() >= deadline:
+                return
+            index = self._next_index()
+            if max_requests is not None and index >= max_requests:
+                return
+            kind = self.schedule[index % len(self.schedule)]
+
+            start = time.perf_counter()
+            try:
+                ok, error = await self._send(kind, index)
+            except Exception as e:
+                ok, error = False, f"{type(e).__name__}: {e}"
+            self.latencies[kind].append((time.perf_counter() - start) * 1000)
+            if not ok:
+                self.errors[kind] += 1
+                if len(self.error_samples) < 10:
+                    self.error_samples.append({"kind": kind, "error": error})
+
+    async def run(self, concurrency, max_requests=None, duration=None):
+        """
+        :param concurrency: 동시 작업자 수
+        :param max_requests: 전체 요청 수 (None이면 duration 동안 계속)
+        :param duration: 최대 실행 시간 (초, None이면 제한 없음)
+        :return: 실제 실행 시간 (초)
+        """
+        deadline = time.perf_counter() + duration if duration else float("inf")
+        start = time.perf_counter()
+        await asyncio.gather(*(self._worker(deadline, max_requests) for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    def get_report(self, elapsed):
+        endpoints = {}
+        for kind in ("analyze", "batch"):
+            count = len(self.latencies[kind])
+            if count == 0:
+                continue
+            endpoints[kind] = {
+                **latency_stats(self.latencies[kind]),
+                "errors": self.errors[kind],
+                "error_rate": round(self.errors[kind] / count, 4),
+                "throughput_rps": round(count / elapsed, 3)
+            }
+
+        all_latencies = self.latencies["analyze"] + self.latencies["batch"]
+        total_errors = sum(self.errors.values())
+        return {
+            "elapsed_sec": round(elapsed, 3),
+            "total": {
+                **latency_stats(all_latencies),
+                "errors": total_errors,
+                "error_rate": round(total_errors / len(all_latencies), 4) if all_latencies else 0.0,
+                "throughput_rps": round(len(all_latencies) / elapsed, 3) if elapsed > 0 else 0.0
+            },
+            "endpoints": endpoints,
+            "error_samples": self.error_samples
+        }
+
+
+def install_fake_redis():
+    """비동기/동기 Redis 클라이언트를 fakeredis로 교체합니다 (같은 서버 상태 공유)."""
+    import fakeredis
+    from service import redis_config
+    from service.redis_async import set_async_redis_client
+
+    server = fakeredis.FakeServer()
+    set_async_redis_client(fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    redis_config._redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    print("🧪 Redis → fakeredis 대체")
+
+
+def import_app(app_path):
+    """'main:app' 형식의 경로에서 ASGI 앱을 import합니다."""
+    module_name, _, attr = app_path.partition(":")
+    return getattr(importlib.import_module(module_name), attr or "app")
+
+
+@contextlib.asynccontextmanager
+async def asgi_client(app, timeout):
+    """같은 프로세스에서 앱을 직접 호출하는 클라이언트 (startup/shutdown 이벤트 포함)"""
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client
+
+
+@contextlib.asynccontextmanager
+async def uvicorn_client(app, port, timeout):
+    """같은 이벤트 루프에서 uvicorn 서버를 띄우고 로컬 포트로 요청하는 클라이언트"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()  # 시작 실패 시 예외 전달
+        await asyncio.sleep(0.05)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await server_task
+
+
+async def run_load_test(args):
+    fixtures = load_fixtures(args.wav_dir)
+    schedule = parse_mix(args.mix)
+
+    if args.url:
+        client_context = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        if not args.keep_cache:
+            # 캐시 설정은 모듈 import 시점에 읽으므로 앱 import 전에 설정
+            os.environ["RESULT_CACHE_ENABLED"] = "false"
+            os.environ["SEPARATION_CACHE_ENABLED"] = "false"
+        if not args.real_redis:
+            install_fake_redis()
+        app = import_app(args.app)
+        if args.mode == "asgi":
+            client_context = asgi_client(app, args.timeout)
+        else:
+            client_context = uvicorn_client(app, args.port, args.timeout)
+
+    async with client_context as client:
+        generator = LoadGenerator(client, fixtures, schedule, args.device_id, args.batch_files, args.parts)
+
+        if args.warmup > 0:
+            print(f"🔥 워밍업 요청 {args.warmup}개")
+            warmup = LoadGenerator(client, fixtures, ["analyze"], args.device_id, args.batch_files, args.parts)
+            await warmup.run(1, max_requests=args.warmup)
+
+        print(f"🚀 부하 테스트 시작: 동시성 {args.concurrency}, 요청 {args.requests or '∞'}, "
+              f"시간 {args.duration or '∞'}초, 구성 {args.mix}")
+        monitor = LoopLagMonitor(args.lag_interval_ms)
+        monitor.start()
+        try:
+            elapsed = await generator.run(args.concurrency, max_requests=args.requests, duration=args.duration)
+        finally:
+            await monitor.stop()
+
+    report = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "config": {
+            "mode": "url" if args.url else args.mode,
+            "target": args.url or args.app,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration": args.duration,
+            "mix": args.mix,
+            "batch_files": args.batch_files,
+            "fixtures": [name for name, _ in fixtures],
+            "fake_redis": not (args.url or args.real_redis),
+            "cache": "server default" if args.url else ("on" if args.keep_cache else "off")
+        },
+        **generator.get_report(elapsed),
+        # --url 모드에서는 서버가 아니라 부하 생성기 자신의 루프 지연
+        "event_loop_lag": monitor.get_stats()
+    }
+    return report
+
+
+def print_report(report):
+    print("\n📊 부하 테스트 결과")
+    print(f"   실행 시간: {report['elapsed_sec']:.1f}초")
+    rows = [("total", report["total"])] + list(report["endpoints"].items())
+    for name, stats in rows:
+        if not stats.get("count"):
+            continue
+        print(f"   {name:<8} {stats['count']:>6}건  {stats['throughput_rps']:>8.2f} req/s  "
+              f"p50 {stats['p50_ms']:>9.1f}ms  p95 {stats['p95_ms']:>9.1f}ms  p99 {stats['p99_ms']:>9.1f}ms  "
+              f"오류율 {stats['error_rate'] * 100:.1f}%")
+    lag = report["event_loop_lag"]
+    if lag.get("count"):
+        print(f"   event loop lag: mean {lag['mean_ms']:.1f}ms  p99 {lag['p99_ms']:.1f}ms  max {lag['max_ms']:.1f}ms")
+    for sample in report["error_samples"]:
+        print(f"   ⚠️ {sample['kind']}: {sample['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분석 API 동시 부하 테스트")
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi", help="앱 실행 방식")
+    parser.add_argument("--app", default="main:app", help="테스트할 ASGI 앱 (module:attr)")
+    parser.add_argument("--url", default=None, help="실행 중인 서버 주소 (지정하면 --mode 무시)")
+    parser.add_argument("--port", type=int, default=8765, help="uvicorn 모드 포트")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 요청 수")
+    parser.add_argument("--requests", type=int, default=None, help="전체 요청 수")
+    parser.add_argument("--duration", type=float, default=None, help="최대 실행 시간 (초)")
+    parser.add_argument("--mix", default="analyze=1", help="요청 유형 비율 (예: analyze=3,batch=1)")
+    parser.add_argument("--batch-files", type=int, default=4, help="배치 요청 하나에 넣을 파일 수 (최대 10)")
+    parser.add_argument("--parts", default=None, help="analyze 요청의 target_parts (콤마로 구분)")
+    parser.add_argument("--device-id", type=int, default=1001, help="요청에 사용할 장치 ID")
+    parser.add_argument("--wav-dir", default="test_wav", help="요청에 사용할 WAV 폴더")
+    parser.add_argument("--warmup", type=int, default=1, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--timeout", type=float, default=300.0, help="요청 타임아웃 (초)")
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0, help="이벤트 루프 지연 측정 간격 (ms)")
+    parser.add_argument("--keep-cache", action="store_true", help="결과/분리 캐시를 끄지 않음")
+    parser.add_argument("--real-redis", action="store_true", help="fakeredis 대신 .env의 Redis 사용")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.requests is None and args.duration is None:
+        args.requests = args.concurrency * 8
+    if not 1 <= args.batch_files <= 10:
+        parser.error("--batch-files는 1~10이어야 합니다.")
+
+    report = asyncio.run(run_load_test(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과가 {args.output}에 저장되었습니다.")
+
+    if report["total"].get("errors"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Demucs 분리 정밀도(SEPARATION_PRECISION) 비교 리포트
+fp32 / int8_dynamic / bf16 모드마다 모델을 로드해 다음을 측정하고,
+품질 기준을 지키는 모드 중 가장 빠른 모드를 추천합니다.
+
+- 정답 SI-SDR: seperate_evaluate의 평가 폴더(mixture.wav + 소스별 wav)가 있으면 소스별 SI-SDR
+- fp32 대비 SI-SDR: 같은 클립의 fp32 분리 결과를 기준으로 한 SI-SDR (정답이 없어도 측정 가능)
+- 분리 지연: separate_batch 한 번(SEPARATION_BATCH_SIZE개 10초 클립)의 중앙값
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.precision_report --wav-dir test_wav
+    python -m benchmarks.precision_report --eval-folder data/eval_mix --modes fp32,bf16 --output precision.json
+"""
+
+import gc
+import time
+import json
+import argparse
+from datetime import datetime
+
+import numpy as np
+import torch
+
+from ml.pipeline.config import SEPARATION_BATCH_SIZE
+from ml.pipeline.model import SEPARATION_PRECISIONS, load_model, separate_batch, cpu_supports_bf16
+from ml.pipeline.resample import init_resampler
+from ml.pipeline.export_separation import load_check_inputs
+from ml.pipeline.seperate_evaluate import EVAL_SOURCES, compute_sisdr, evaluate_demucs_on_folder
+
+
+def median_separation_seconds(model, clips, repeats):
+    """separate_batch 한 번의 지연 중앙값 (초, 워밍업 1회 제외)"""
+    separate_batch(model, clips)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        separate_batch(model, clips)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+
+def agreement_sisdr(reference, estimate, sources):
+    """fp32 분리 결과 대비 소스별 SI-SDR (dB, noise 제외)"""
+    return {
+        source: round(compute_sisdr(estimate[:, i].flatten(), reference[:, i].flatten()), 2)
+        for i, source in enumerate(sources) if source in EVAL_SOURCES
+    }
+
+
+def mean(values):
+    values = list(values)
+    return float(np.mean(values)) if values else None
+
+
+def evaluate_mode(precision, clips, eval_folder, repeats, fp32_sources):
+    """한 정밀도 모드를 로드해 품질과 지연을 측정합니다."""
+    model, source_names = load_model(precision=precision)
+    init_resampler(model.samplerate)
+
+    separated = separate_batch(model, clips)
+    result = {
+        "precision": model.separation_precision,
+        "separation_seconds": round(median_separation_seconds(model, clips, repeats), 3)
+    }
+    if eval_folder:
+        sisdr = evaluate_demucs_on_folder(eval_folder, model, source_names)
+        result["sisdr_db"] = {source: round(score, 2) for source, score in sisdr.items()}
+        result["mean_sisdr_db"] = mean(sisdr.values())
+    if fp32_sources is not None:
+        agreement = agreement_sisdr(fp32_sources, separated, source_names)
+        result["fp32_agreement_sisdr_db"] = agreement
+        result["mean_fp32_agreement_sisdr_db"] = mean(agreement.values())
+
+    del model
+    gc.collect()
+    return result, separated
+
+
+def recommend(results, max_sisdr_drop, min_agreement_db):
+    """품질 기준을 만족하는 모드 중 가장 빠른 모드 (fp32는 항상 후보)"""
+    baseline = results["fp32"]
+    candidates = []
+    for mode, result in results.items():
+        if mode != "fp32":
+            if "mean_sisdr_db" in result and result["mean_sisdr_db"] is not None:
+                if baseline["mean_sisdr_db"] - result["mean_sisdr_db"] > max_sisdr_drop:
+                    continue
+            elif (result.get("mean_fp32_agreement_sisdr_db") or 0) < min_agreement_db:
+                continue
+        candidates.append((result["separation_seconds"], mode))
+    return min(candidates)[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Demucs 분리 정밀도별 품질(SI-SDR)·속도 비교")
+    parser.add_argument("--modes", default=",".join(SEPARATION_PRECISIONS), help="비교할 정밀도들 (콤마로 구분)")
+    parser.add_argument("--eval-folder", default=None,
+                        help="정답 SI-SDR 평가 폴더 (mixture.wav + 소스별 wav, seperate_evaluate와 같은 형식)")
+    parser.add_argument("--wav-dir", default=None, help="지연/fp32 대비 SI-SDR 측정용 WAV 폴더 (없으면 잡음)")
+    parser.add_argument("--batch-size", type=int, default=SEPARATION_BATCH_SIZE, help="한 번에 분리할 클립 수")
+    parser.add_argument("--repeats", type=int, default=3, help="지연 측정 반복 횟수")
+    parser.add_argument("--threads", type=int, default=0, help="torch 스레드 수 (0이면 기본값)")
+    parser.add_argument("--max-sisdr-drop", type=float, default=0.5, help="fp32 대비 허용 정답 SI-SDR 하락 (dB)")
+    parser.add_argument("--min-agreement-db", type=float, default=20.0,
+                        help="정답 폴더가 없을 때 허용 최소 fp32 대비 SI-SDR (dB)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    if "fp32" in modes:
+        modes.remove("fp32")
+    modes.insert(0, "fp32")  # 다른 모드의 기준이므로 항상 먼저 측정
+
+    clips = load_check_inputs(args.wav_dir, args.batch_size)
+    results = {}
+    fp32_sources = None
+    for mode in modes:
+        print(f"\n🔧 {mode} 측정 중...")
+        results[mode], separated = evaluate_mode(mode, clips, args.eval_folder, args.repeats, fp32_sources)
+        if mode == "fp32":
+            fp32_sources = separated
+
+    best = recommend(results, args.max_sisdr_drop, args.min_agreement_db)
+
+    print(f"\n📊 분리 정밀도 비교 (배치 {args.batch_size}, bf16 하드웨어 지원: {cpu_supports_bf16()})")
+    fp32_seconds = results["fp32"]["separation_seconds"]
+    for mode, result in results.items():
+        quality = []
+        if result.get("mean_sisdr_db") is not None:
+            quality.append(f"SI-SDR {result['mean_sisdr_db']:.2f}dB")
+        if result.get("mean_fp32_agreement_sisdr_db") is not None:
+            quality.append(f"fp32 대비 {result['mean_fp32_agreement_sisdr_db']:.1f}dB")
+        print(f"   {'👉' if mode == best else '  '} {mode:<13} {result['separation_seconds']:.2f}초 "
+              f"(x{fp32_seconds / result['separation_seconds']:.2f})  {'  '.join(quality)}")
+    print(f"\n💡 추천: SEPARATION_PRECISION={best}")
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "batch_size": args.batch_size,
+            "torch_threads": torch.get_num_threads(),
+            "cpu_bf16_supported": cpu_supports_bf16(),
+            "max_sisdr_drop": args.max_sisdr_drop,
+            "min_agreement_db": args.min_agreement_db,
+            "recommended": best,
+            "modes": results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과가 {args.output}에 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+FP32 / INT8 분류 모델 비교 리포트
+WAV 폴더의 클립들을 분리해 부품별 mel을 만든 뒤, 같은 mel을 FP32 모델과
+INT8 모델(ml.pipeline.quantize로 생성)에 넣어 이상 확률 차이, 판정 일치율, 추론 지연을 비교합니다.
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.quantization_report --wav-dir test_wav
+    python -m benchmarks.quantization_report --wav-dir /data/clips --parts fan,pump --output quantization.json
+"""
+
+import os
+import glob
+import json
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+import torch
+
+from ml.pipeline.audio_preprocessing import load_model, process_wav_file, resolve_target_parts
+from ml.pipeline.resample import init_resampler
+from ml.pipeline.onnx import OnnxSession, mel_to_onnx_input, onnx_model_path_for_part
+
+THRESHOLD = 0.5
+
+
+def sigmoid(logits):
+    return 1 / (1 + np.exp(-np.asarray(logits, dtype=np.float64)))
+
+
+def median_latency_ms(session, x, repeats):
+    """배치 1 입력의 추론 지연 중앙값 (ms, 워밍업 1회 제외)"""
+    session.run(x)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        session.run(x)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def compare_part(mels, fp32_path, int8_path, repeats):
+    """한 부품의 FP32/INT8 결과를 비교합니다."""
+    fp32 = OnnxSession(fp32_path)
+    int8 = OnnxSession(int8_path)
+
+    inputs = [mel_to_onnx_input(mel, fp32.in_ch)[None] for mel in mels]  # [1, C, H, W]
+    fp32_probs = sigmoid([fp32.run(x)[0] for x in inputs])
+    int8_probs = sigmoid([int8.run(x)[0] for x in inputs])
+    diffs = np.abs(fp32_probs - int8_probs)
+
+    fp32_ms = float(np.mean([median_latency_ms(fp32, x, repeats) for x in inputs[:3]]))
+    int8_ms = float(np.mean([median_latency_ms(int8, x, repeats) for x in inputs[:3]]))
+
+    return {
+        "clips": len(mels),
+        "fp32_model": os.path.basename(fp32_path),
+        "int8_model": os.path.basename(int8_path),
+        "fp32_size_mb": round(os.path.getsize(fp32_path) / 1e6, 2),
+        "int8_size_mb": round(os.path.getsize(int8_path) / 1e6, 2),
+        "mean_abs_prob_diff": round(float(diffs.mean()), 5),
+        "max_abs_prob_diff": round(float(diffs.max()), 5),
+        "decision_agreement": round(float(np.mean((fp32_probs >= THRESHOLD) == (int8_probs >= THRESHOLD))), 4),
+        "fp32_latency_ms": round(fp32_ms, 3),
+        "int8_latency_ms": round(int8_ms, 3),
+        "speedup": round(fp32_ms / int8_ms, 2) if int8_ms > 0 else None,
+        "per_clip": [
+            {"fp32_prob": round(float(p32), 4), "int8_prob": round(float(p8), 4)}
+            for p32, p8 in zip(fp32_probs, int8_probs)
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FP32 / INT8 ONNX 분류 모델 정확도·지연 비교")
+    parser.add_argument("--wav-dir", required=True, help="비교에 사용할 WAV 폴더")
+    parser.add_argument("--onnx-dir", default="ml/models/onnx", help="ONNX 모델 폴더")
+    parser.add_argument("--parts", default=None, help="비교할 부품들 (콤마로 구분, 빈 값이면 noise 제외 전체)")
+    parser.add_argument("--max-clips", type=int, default=50, help="사용할 최대 클립 수")
+    parser.add_argument("--repeats", type=int, default=20, help="지연 측정 반복 횟수")
+    parser.add_argument("--threads", type=int, default=0, help="torch 스레드 수 (0이면 기본값, 분리 단계에만 적용)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    wav_paths = sorted(glob.glob(os.path.join(args.wav_dir, "*.wav")))[:args.max_clips]
+    if not wav_paths:
+        raise FileNotFoundError(f"❌ {args.wav_dir} 폴더에 WAV 파일이 없습니다.")
+
+    model, source_names = load_model()
+    init_resampler(model.samplerate)
+    parts = resolve_target_parts(source_names, args.parts.split(",") if args.parts else None)
+
+    # 클립마다 한 번만 분리하고, 같은 mel을 두 모델에 넣음
+    part_mels = {part: [] for part in parts}
+    for wav_path in wav_paths:
+        for part, mel in process_wav_file(model, source_names, wav_path, target_parts=parts, save_pt=False).items():
+            part_mels[part].append(mel)
+
+    results = {}
+    for part in parts:
+        fp32_path = onnx_model_path_for_part(args.onnx_dir, part, precision="fp32")
+        int8_path = onnx_model_path_for_part(args.onnx_dir, part, precision="int8")
+        if not (os.path.exists(fp32_path) and os.path.exists(int8_path)):
+            print(f"⚠️ {part}: FP32 또는 INT8 모델 없음, 생략 (python -m ml.pipeline.quantize로 INT8 생성)")
+            continue
+        results[part] = compare_part(part_mels[part], fp32_path, int8_path, args.repeats)
+
+    print("\n📊 FP32 / INT8 비교")
+    for part, result in results.items():
+        print(f"   {part:<8} |Δp| 평균 {result['mean_abs_prob_diff']:.4f} 최대 {result['max_abs_prob_diff']:.4f}  "
+              f"판정 일치 {result['decision_agreement'] * 100:.1f}%  "
+              f"{result['fp32_latency_ms']:.2f}ms → {result['int8_latency_ms']:.2f}ms (x{result['speedup']})")
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "wav_dir": args.wav_dir,
+            "clips": len(wav_paths),
+            "threshold": THRESHOLD,
+            "parts": results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과가 {args.output}에 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    main()
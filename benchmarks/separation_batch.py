@@ -0,0 +1,116 @@
+"""
+배치 분리 벤치마크
+순차 루프(클립마다 separate 호출)와 배치 분리(separate_batch 한 번 호출)의 처리량(clips/sec)을 비교합니다.
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.separation_batch --clips 8 --batch-sizes 1 2 4 8
+    python -m benchmarks.separation_batch --wav-dir test_wav --output separation_batch.json
+    python -m benchmarks.separation_batch --profile fast
+"""
+
+import os
+import glob
+import json
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+import torch
+
+from ml.pipeline.config import SAMPLE_RATE, SEGMENT_DURATION, SEPARATION_PROFILES
+from ml.pipeline.model import load_model, separate, separate_batch, resolve_separation_profile
+from ml.pipeline.resample import init_resampler
+from ml.pipeline.audio_preprocessing import prepare_audio
+
+
+def make_clips(num_clips, wav_dir=None, seed=0):
+    """벤치마크용 10초 모노 클립을 준비합니다 (wav_dir가 있으면 그 파일들을 반복 사용)."""
+    if wav_dir:
+        wav_paths = sorted(glob.glob(os.path.join(wav_dir, "*.wav")))
+        if not wav_paths:
+            raise FileNotFoundError(f"❌ {wav_dir} 폴더에 WAV 파일이 없습니다.")
+        prepared = [prepare_audio(path) for path in wav_paths]
+        return [prepared[i % len(prepared)] for i in range(num_clips)]
+
+    rng = np.random.default_rng(seed)
+    length = SAMPLE_RATE * SEGMENT_DURATION
+    return [(0.1 * rng.standard_normal(length)).astype(np.float32) for _ in range(num_clips)]
+
+
+def bench_sequential(model, clips, repeats, profile=None):
+    """클립마다 separate를 호출하는 기존 방식의 처리량을 측정합니다."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for clip in clips:
+            separate(model, clip, profile=profile)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {"mode": "sequential", "batch_size": 1, "seconds": round(best, 4),
+            "clips_per_sec": round(len(clips) / best, 3)}
+
+
+def bench_batched(model, clips, batch_size, repeats, profile=None):
+    """batch_size 단위로 separate_batch를 호출하는 방식의 처리량을 측정합니다."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(0, len(clips), batch_size):
+            separate_batch(model, clips[i:i + batch_size], profile=profile)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {"mode": "batched", "batch_size": batch_size, "seconds": round(best, 4),
+            "clips_per_sec": round(len(clips) / best, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Demucs 배치 분리 처리량 벤치마크")
+    parser.add_argument("--clips", type=int, default=8, help="측정에 사용할 클립 수")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[2, 4, 8], help="비교할 배치 크기들")
+    parser.add_argument("--repeats", type=int, default=2, help="반복 횟수 (최솟값 사용)")
+    parser.add_argument("--wav-dir", default=None, help="합성 클립 대신 사용할 WAV 폴더 (예: test_wav)")
+    parser.add_argument("--threads", type=int, default=0, help="torch 스레드 수 (0이면 기본값)")
+    parser.add_argument("--profile", choices=list(SEPARATION_PROFILES), default=None,
+                        help="분리 프로필 (빈 값이면 SEPARATION_PROFILE)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    model, _ = load_model()
+    init_resampler(model.samplerate)
+    clips = make_clips(args.clips, args.wav_dir)
+    profile = resolve_separation_profile(args.profile)
+
+    # 워밍업 (첫 호출의 할당/초기화 비용 제외)
+    separate(model, clips[0], profile=profile)
+
+    results = [bench_sequential(model, clips, args.repeats, profile)]
+    for batch_size in args.batch_sizes:
+        results.append(bench_batched(model, clips, batch_size, args.repeats, profile))
+
+    baseline = results[0]["clips_per_sec"]
+    print("\n📊 배치 분리 벤치마크 결과")
+    print(f"   클립: {len(clips)}개, torch threads: {torch.get_num_threads()}, 분리 프로필: {profile}")
+    for result in results:
+        result["speedup"] = round(result["clips_per_sec"] / baseline, 2)
+        print(f"   {result['mode']:>10} (batch={result['batch_size']}): "
+              f"{result['clips_per_sec']:.3f} clips/sec (x{result['speedup']})")
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "clips": len(clips),
+            "torch_threads": torch.get_num_threads(),
+            "separation_profile": profile,
+            "results": results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과가 {args.output}에 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    main()
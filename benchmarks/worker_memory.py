@@ -0,0 +1,167 @@
+"""
+워커별 메모리 비교 (독립 로드 vs 프리포크 공유)
+워커 N개를 띄워 Demucs 모델을 준비시킨 뒤 /proc/<pid>/smaps_rollup으로 메모리를 측정합니다.
+
+- independent: `uvicorn --workers N`처럼 워커마다 load_model (spawn)
+- prefork: prefork.py처럼 부모가 preload_model 후 워커를 fork (load_shared_model)
+
+RSS는 공유 페이지를 워커마다 중복으로 세므로, 비교에는 PSS(공유 페이지를 나눠 센 값)와
+USS(워커 고유 페이지)를 사용합니다. 모델 로딩 시간(콜드 스타트)도 함께 기록합니다. Linux 전용입니다.
+
+--model-mmap on/off로 메모리 매핑 가중치(ml.pipeline.convert_weights로 변환) 사용 여부를 바꿔 비교할 수 있습니다.
+mmap을 쓰면 independent 모드에서도 가중치 페이지가 페이지 캐시로 공유됩니다.
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.worker_memory --workers 4
+    python -m benchmarks.worker_memory --workers 4 --infer --output worker_memory.json
+    python -m benchmarks.worker_memory --workers 4 --modes independent --model-mmap off
+"""
+
+import os
+import gc
+import json
+import time
+import argparse
+import multiprocessing as mp
+from datetime import datetime
+
+import numpy as np
+
+from ml.pipeline.config import SAMPLE_RATE, SEGMENT_DURATION
+
+
+def read_memory_mb(pid):
+    """프로세스의 RSS/PSS/USS (MB)"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[0].endswith(":"):
+                fields[parts[0][:-1]] = int(parts[1])  # kB
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mb": round(uss / 1024, 1)
+    }
+
+
+def worker_main(shared, infer, ready_queue, stop_event):
+    """워커: 모델을 준비하고 (선택) 분리를 한 번 실행한 뒤 측정이 끝날 때까지 대기"""
+    import torch
+    from ml.pipeline.model import load_model, load_shared_model, separate
+    from ml.pipeline.resample import init_resampler
+
+    torch.set_num_threads(1)
+    start = time.perf_counter()
+    model, _ = load_shared_model() if shared else load_model()
+    load_seconds = time.perf_counter() - start
+    init_resampler(model.samplerate)
+    if infer:
+        separate(model, (0.1 * np.random.default_rng(0).standard_normal(SAMPLE_RATE * SEGMENT_DURATION)).astype(np.float32))
+    ready_queue.put((os.getpid(), load_seconds))
+    stop_event.wait()
+
+
+def measure(mode, workers, infer):
+    """한 모드로 워커들을 띄워 메모리를 측정합니다."""
+    parent_load_seconds = 0.0
+    if mode == "prefork":
+        from ml.pipeline.model import preload_model
+        start = time.perf_counter()
+        preload_model()
+        parent_load_seconds = time.perf_counter() - start
+        gc.collect()
+        gc.freeze()
+        ctx = mp.get_context("fork")
+    else:
+        ctx = mp.get_context("spawn")
+
+    ready_queue = ctx.Queue()
+    stop_event = ctx.Event()
+    processes = [ctx.Process(target=worker_main, args=(mode == "prefork", infer, ready_queue, stop_event))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    ready = [ready_queue.get() for _ in processes]
+    pids = [pid for pid, _ in ready]
+
+    per_worker = [read_memory_mb(pid) for pid in pids]
+    parent = read_memory_mb(os.getpid())
+    stop_event.set()
+    for process in processes:
+        process.join()
+
+    total_pss = sum(w["pss_mb"] for w in per_worker) + (parent["pss_mb"] if mode == "prefork" else 0.0)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "per_worker": per_worker,
+        "parent": parent,
+        "mean_worker_rss_mb": round(float(np.mean([w["rss_mb"] for w in per_worker])), 1),
+        "mean_worker_pss_mb": round(float(np.mean([w["pss_mb"] for w in per_worker])), 1),
+        "mean_worker_uss_mb": round(float(np.mean([w["uss_mb"] for w in per_worker])), 1),
+        # 워커가 요청을 받을 수 있을 때까지의 모델 로딩 시간 (prefork는 부모가 한 번 로드)
+        "parent_load_seconds": round(parent_load_seconds, 3),
+        "mean_worker_load_seconds": round(float(np.mean([seconds for _, seconds in ready])), 3),
+        # prefork는 부모가 모델을 들고 있으므로 부모 PSS까지 합산
+        "total_pss_mb": round(total_pss, 1)
+    }
+
+
+def run_mode(mode, workers, infer):
+    """모드마다 깨끗한 인터프리터에서 측정 (prefork의 부모 모델이 independent 측정에 섞이지 않도록)"""
+    ctx = mp.get_context("spawn")
+    result_queue = ctx.Queue()
+    process = ctx.Process(target=_run_mode_child, args=(mode, workers, infer, result_queue))
+    process.start()
+    result = result_queue.get()
+    process.join()
+    return result
+
+
+def _run_mode_child(mode, workers, infer, result_queue):
+    result_queue.put(measure(mode, workers, infer))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커별 메모리 비교 (독립 로드 vs 프리포크 공유)")
+    parser.add_argument("--workers", type=int, default=4, help="워커 프로세스 수")
+    parser.add_argument("--modes", nargs="+", choices=["independent", "prefork"], default=["independent", "prefork"])
+    parser.add_argument("--infer", action="store_true", help="측정 전에 워커마다 분리를 한 번 실행 (활성 메모리 포함)")
+    parser.add_argument("--model-mmap", choices=["on", "off"], default=None,
+                        help="메모리 매핑 가중치 사용 여부 (빈 값이면 MODEL_MMAP 설정)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.model_mmap is not None:
+        # 측정 프로세스들은 spawn으로 새로 시작하므로 환경 변수로 전달
+        os.environ["MODEL_MMAP"] = "true" if args.model_mmap == "on" else "false"
+
+    results = {mode: run_mode(mode, args.workers, args.infer) for mode in args.modes}
+
+    print(f"\n📊 워커별 메모리 (워커 {args.workers}개, 분리 실행: {args.infer})")
+    for mode, result in results.items():
+        print(f"   {mode:>11}: 워커당 RSS {result['mean_worker_rss_mb']:.1f}MB, "
+              f"PSS {result['mean_worker_pss_mb']:.1f}MB, USS {result['mean_worker_uss_mb']:.1f}MB, "
+              f"전체 PSS {result['total_pss_mb']:.1f}MB, "
+              f"로딩 {result['parent_load_seconds'] + result['mean_worker_load_seconds']:.2f}초")
+    if "independent" in results and "prefork" in results:
+        saved = results["independent"]["total_pss_mb"] - results["prefork"]["total_pss_mb"]
+        print(f"\n💡 프리포크 절감: 전체 PSS {saved:.1f}MB")
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "workers": args.workers,
+            "infer": args.infer,
+            "model_mmap": os.getenv("MODEL_MMAP", "true"),
+            "results": results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과가 {args.output}에 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    main()
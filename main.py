@@ -7,13 +7,19 @@ import os
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.formparsers import MultiPartParser
 
 # .env 파일 로드
 load_dotenv()
 
+# 업로드 파일은 이 크기까지 메모리에만 보관 (넘으면 Starlette가 /tmp로 spool)
+# 기본 1MB는 10초 스테레오 WAV(약 1.7MB)보다 작으므로 상향
+MultiPartParser.spool_max_size = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(16 * 1024 * 1024)))
+
 # 라우터들 import
+# (torch/demucs/onnxruntime는 모델 초기화 때 import되므로 이 import들은 가볍게 유지)
 from routes import server_router, developer_router
-from service import get_audio_service
+from ml.services.readiness import start_model_initialization
 
 # FastAPI 앱 생성
 app = FastAPI(
@@ -46,26 +52,47 @@ async def startup_event():
     
     # Redis 연결 확인
     try:
-        from service.redis_config import is_redis_available
-        if is_redis_available():
+        from service.redis_async import is_async_redis_available
+        if await is_async_redis_available():
             print("✅ Redis 연결 확인됨")
         else:
             print("⚠️ Redis 연결 안됨 (선택사항)")
     except Exception as e:
         print(f"⚠️ Redis 확인 중 오류: {e}")
     
+    # normalScore/알림 write-behind 버퍼 시작
+    from service.redis_write_behind import start_write_behind
+    await start_write_behind()
+    
     try:
-        # 서비스 초기화 (모델 로딩)
-        service = get_audio_service()
+        # 모델 로딩 + 워밍업 (BACKGROUND_MODEL_LOAD=true면 백그라운드에서 진행하고 포트는 바로 열림)
+        start_model_initialization()
         print("✅ 서버 초기화 완료")
         print("📋 등록된 라우터:")
         print("  - /server/* : 서버 관리 엔드포인트")
         print("  - /developer/* : 개발자 도구 엔드포인트")
+        print("  - 준비 상태: /server/ready (모델 로딩/워밍업 완료 전에는 503)")
     except Exception as e:
         print(f"❌ 서버 초기화 실패: {e}")
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료 시 추론 실행기 및 Redis 커넥션 풀 정리"""
+    print("🛑 Audix ML FastAPI 서버 종료")
+    # 남은 normalScore 업데이트/알림을 flush한 뒤 커넥션 풀 종료
+    from service.redis_write_behind import stop_write_behind
+    from service.redis_async import close_async_redis_client
+    await stop_write_behind()
+    await close_async_redis_client()
+    # 모델 로딩 전에 종료되면 서비스가 없음 (torch를 새로 import하지 않도록 준비 상태에서 조회)
+    from ml.services.readiness import get_readiness
+    audio_service = get_readiness().service
+    if audio_service is not None:
+        audio_service.shutdown()
+
+
 @app.get("/", summary="API 루트")
 async def root():
     """API 루트 엔드포인트"""
@@ -81,6 +108,7 @@ async def root():
         },
         "quick_links": {
             "health_check": "/server/health",
+            "readiness": "/server/ready",
             "server_info": "/server/info", 
             "available_parts": "/developer/parts",
             "analyze_audio": "/developer/device/analyze"
@@ -103,6 +131,7 @@ if __name__ == "__main__":
     print(f"  - API 문서: http://localhost:{port}/docs")
     print(f"  - 대체 문서: http://localhost:{port}/redoc")
     print(f"  - 헬스체크: http://localhost:{port}/server/health")
+    print(f"  - 준비 상태: http://localhost:{port}/server/ready")
     print(f"  - 서버 정보: http://localhost:{port}/server/info")
     print(f"  - 부품 목록: http://localhost:{port}/developer/parts")
     print(f"  - 오디오 분석: http://localhost:{port}/developer/device/analyze")
@@ -8,9 +8,27 @@ ML Package
 - models: 학습된 모델 파일들 저장
 """
 
-# 편의를 위해 주요 기능들을 상위 패키지에서 바로 접근 가능하도록 노출
-from .services import get_audio_service
+import importlib
+
+# 편의를 위해 주요 기능들을 상위 패키지에서 바로 접근 가능하도록 노출 (처음 사용할 때 import)
+_LAZY_EXPORTS = {
+    "get_audio_service": ".services",
+}
 
 __all__ = [
     "get_audio_service",
 ]
+
+
+def __getattr__(name):
+    """공개 이름을 처음 접근할 때 해당 모듈을 import합니다 (torch/demucs/onnxruntime import 지연)."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -3,26 +3,56 @@ ML Pipeline 패키지
 오디오 처리 및 분석을 위한 핵심 모듈들을 제공합니다.
 """
 
+import importlib
+
 # 주요 기능들을 패키지 수준에서 노출
-from .audio_preprocessing import load_wav_file, process_wav_file, process_multiple_wav_files
-from .model import load_model, separate
-from .integrated_analysis import process_pt_files_with_classification
-from .resample import init_resampler, maybe_resample
-from .rms_normalize import calculate_rms, rms_to_db, db_to_rms, normalize_rms, adaptive_level_adjust
-from .mel import save_mel_tensor
+# 하위 모듈들이 torch/torchaudio/demucs/onnxruntime을 import하므로 처음 사용할 때 로드
+# (ml.pipeline.config, ml.pipeline.metrics만 쓰는 라우터가 서버 시작을 늦추지 않도록)
+_LAZY_EXPORTS = {
+    **dict.fromkeys(["load_wav_file", "load_wav_files", "process_audio", "process_audios_batch",
+                     "process_wav_file", "process_wav_files_batch", "process_multiple_wav_files"], ".audio_preprocessing"),
+    **dict.fromkeys(["load_model", "separate", "separate_batch"], ".model"),
+    **dict.fromkeys(["process_pt_files_with_classification", "classify_part_mels",
+                     "classify_multiple_part_mels"], ".integrated_analysis"),
+    **dict.fromkeys(["init_resampler", "maybe_resample"], ".resample"),
+    **dict.fromkeys(["calculate_rms", "rms_to_db", "db_to_rms", "normalize_rms", "adaptive_level_adjust"], ".rms_normalize"),
+    **dict.fromkeys(["compute_mel_batch", "compute_mel_tensor", "write_mel_tensor", "save_mel_tensor"], ".mel"),
+    **dict.fromkeys(["get_onnx_session", "preload_onnx_sessions"], ".onnx"),
+    **dict.fromkeys(["iter_wav_windows", "iter_stream_part_mels"], ".streaming"),
+    **dict.fromkeys(["WavPcmReader", "decode_wav"], ".wav_io"),
+}
 
 __all__ = [
     # Audio preprocessing
     "load_wav_file",
+    "load_wav_files",
+    "process_audio",
+    "process_audios_batch",
     "process_wav_file", 
+    "process_wav_files_batch",
     "process_multiple_wav_files",
     
+    # WAV decoding (path / in-memory bytes)
+    "WavPcmReader",
+    "decode_wav",
+    
     # Model operations
     "load_model",
     "separate",
+    "separate_batch",
     
     # Analysis
     "process_pt_files_with_classification",
+    "classify_part_mels",
+    "classify_multiple_part_mels",
+    
+    # Streaming (long recordings)
+    "iter_wav_windows",
+    "iter_stream_part_mels",
+    
+    # ONNX sessions
+    "get_onnx_session",
+    "preload_onnx_sessions",
     
     # Resampling
     "init_resampler",
@@ -36,5 +66,22 @@ __all__ = [
     "adaptive_level_adjust",
     
     # Mel spectrogram
+    "compute_mel_batch",
+    "compute_mel_tensor",
+    "write_mel_tensor",
     "save_mel_tensor",
 ]
+
+
+def __getattr__(name):
+    """공개 이름을 처음 접근할 때 해당 모듈을 import합니다 (torch/demucs/onnxruntime import 지연)."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -1,23 +1,24 @@
-from .config import SAMPLE_RATE
-from .model import load_model, separate
-from .mel import save_mel_tensor
+from .config import SAMPLE_RATE, SEGMENT_DURATION, SAVE_MEL_PT, SEPARATION_BATCH_SIZE
+from .model import load_model, separate, separate_batch
+from .mel import compute_mel_batch, write_mel_tensor
 from .rms_normalize import adaptive_level_adjust, calculate_rms, rms_to_db
 from datetime import datetime
 from .resample import init_resampler
+from .wav_io import decode_wav, describe_wav_source
+from .metrics import stage_timer
 import time
 import json
 import torchaudio
 import torch
 
-def load_wav_file(wav_path):
+def conform_waveform(waveform, sample_rate):
     """
-    WAV 파일을 로드합니다.
+    오디오를 SAMPLE_RATE, 모노, SEGMENT_DURATION(10초) 길이로 맞춥니다.
     
-    :param wav_path: WAV 파일 경로
-    :return: 오디오 텐서 (shape: [channels, samples])
+    :param waveform: 오디오 텐서 (shape: [channels, samples])
+    :param sample_rate: waveform의 샘플링 레이트
+    :return: 오디오 텐서 (shape: [1, SAMPLE_RATE * SEGMENT_DURATION])
     """
-    waveform, sample_rate = torchaudio.load(wav_path)
-    
     # 샘플링 레이트 확인
     if sample_rate != SAMPLE_RATE:
         print(f"⚠️ 샘플링 레이트 불일치: {sample_rate}Hz -> {SAMPLE_RATE}Hz로 리샘플링")
@@ -29,7 +30,7 @@ def load_wav_file(wav_path):
         waveform = torch.mean(waveform, dim=0, keepdim=True)
     
     # 10초 길이로 맞추기 (패딩 또는 자르기)
-    target_length = SAMPLE_RATE * 10  # 10초
+    target_length = SAMPLE_RATE * SEGMENT_DURATION  # 10초
     current_length = waveform.shape[1]
     
     if current_length < target_length:
@@ -40,120 +41,288 @@ def load_wav_file(wav_path):
         # 자르기
         waveform = waveform[:, :target_length]
     
-    print(f"📁 WAV 파일 로드 완료: {wav_path}")
+    return waveform
+
+def load_wav_file(wav_path):
+    """
+    WAV 파일을 로드합니다. 10초보다 긴 파일은 앞 10초만 사용합니다
+    (전체를 분석하려면 streaming.iter_stream_part_mels 사용).
+    업로드된 bytes/파일 객체는 임시 파일 없이 메모리에서 바로 디코딩합니다.
+    
+    :param wav_path: WAV 파일 경로, bytes, 또는 바이너리 파일 객체
+    :return: 오디오 텐서 (shape: [channels, samples])
+    """
+    # 10초 분량만 디코딩 (원본 샘플링 레이트 기준)
+    with stage_timer("decode"):
+        waveform, sample_rate = decode_wav(wav_path, max_seconds=SEGMENT_DURATION)
+        waveform = conform_waveform(waveform, sample_rate)
+    
+    print(f"📁 WAV 파일 로드 완료: {describe_wav_source(wav_path)}")
     print(f"🔊 오디오 형태: {waveform.shape} (샘플링 레이트: {SAMPLE_RATE}Hz)")
     
     return waveform
 
-def process_wav_file(model, source_names, wav_path, target_parts=None):
+def resolve_target_parts(source_names, target_parts=None):
     """
-    WAV 파일을 처리하고 .pt 파일들을 생성합니다.
+    분석 대상 부품을 결정하고 유효성을 확인합니다.
     
-    :param model: 분리 모델
     :param source_names: 부품 이름 리스트 (예: ['fan', 'pump', ...])
-    :param wav_path: 입력 WAV 파일 경로
-    :param target_parts: 분석할 부품 리스트 (예: ['fan', 'pump']) - None이면 모든 부품 처리
-    :return: 생성된 .pt 파일 경로들
+    :param target_parts: 분석할 부품 리스트 - None이면 noise를 제외한 모든 부품
+    :return: 분석 대상 부품 리스트
     """
-    print(f"\n🎵 WAV 파일 처리 시작: {wav_path}")
-    
     # 타겟 부품이 지정되지 않으면 noise를 제외한 모든 부품 처리
     if target_parts is None:
         target_parts = [src for src in source_names if src.lower() != "noise"]
     
-    print(f"🎯 분석 대상 부품: {target_parts}")
-    
     # 유효한 부품인지 확인
     available_parts = [src for src in source_names if src.lower() != "noise"]
     invalid_parts = [part for part in target_parts if part not in available_parts]
     if invalid_parts:
         raise ValueError(f"❌ 지원하지 않는 부품: {invalid_parts}. 사용 가능한 부품: {available_parts}")
     
+    return target_parts
+
+def prepare_audio(wav_path):
+    """
+    WAV 파일을 로드하고 적응적 레벨 조정을 적용합니다.
+    
+    :param wav_path: 입력 WAV 파일 경로, bytes, 또는 바이너리 파일 객체
+    :return: 분리 모델 입력용 모노 오디오 (numpy 배열, shape: [samples])
+    """
     # WAV 파일 로드
     start_load = time.time()
     audio = load_wav_file(wav_path)
     end_load = time.time()
     print(f"📂 파일 로드 시간: {(end_load - start_load):.2f}초")
     
-    # 타임스탬프 생성
-    timestamp_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    
-    # 결과 저장용 리스트
-    generated_files = []
+    return normalize_audio(audio)
+
+def normalize_audio(audio):
+    """
+    적응적 레벨 조정을 적용합니다.
     
-    # 1. 적응적 레벨 조정 (작은 소리는 증폭, 큰 소리는 압축)
+    :param audio: 로드된 모노 오디오 텐서 (shape: [1, samples])
+    :return: 분리 모델 입력용 모노 오디오 (numpy 배열, shape: [samples])
+    """
+    # 적응적 레벨 조정 (작은 소리는 증폭, 큰 소리는 압축)
     start_normalize = time.time()
-    current_rms = calculate_rms(audio.squeeze())  # 모노 채널이므로 squeeze 사용
-    current_db = rms_to_db(current_rms)
-    print(f"📊 원본 오디오 RMS: {current_db:.2f}dB")
-    
-    normalized_audio = adaptive_level_adjust(audio.squeeze())
-    
-    # adaptive_level_adjust가 tensor를 반환할 수 있으므로 numpy로 변환
-    if isinstance(normalized_audio, torch.Tensor):
-        normalized_audio = normalized_audio.numpy()
+    with stage_timer("normalize"):
+        current_rms = calculate_rms(audio.squeeze())  # 모노 채널이므로 squeeze 사용
+        current_db = rms_to_db(current_rms)
+        print(f"📊 원본 오디오 RMS: {current_db:.2f}dB")
+        
+        normalized_audio = adaptive_level_adjust(audio.squeeze())
+        
+        # adaptive_level_adjust가 tensor를 반환할 수 있으므로 numpy로 변환
+        if isinstance(normalized_audio, torch.Tensor):
+            normalized_audio = normalized_audio.numpy()
     
     end_normalize = time.time()
     print(f"🔧 적응적 레벨 조정 시간: {(end_normalize - start_normalize):.2f}초")
     
+    return normalized_audio
+
+def sources_to_part_mels(sources_batch, source_names, target_parts, save_pt=SAVE_MEL_PT):
+    """
+    분리된 소스 배치에서 target_parts의 mel 텐서를 한 번의 배치 연산으로 계산합니다.
+    
+    :param sources_batch: 분리된 소스들 (shape: [B, sources, channels, samples])
+    :param source_names: 부품 이름 리스트
+    :param target_parts: 분석할 부품 리스트
+    :param save_pt: True면 mel 텐서를 .pt 파일로도 저장 (디버그/보관용)
+    :return: 클립별 {부품명: mel 텐서 [1, 240, 240]} 딕셔너리 리스트
+    """
+    start_mel = time.time()
+    
+    total_sources = sources_batch.shape[1]
+    selected = []
+    for src_idx in range(min(total_sources, len(source_names))):
+        src_name = source_names[src_idx]
+        
+        # target_parts에 없는 부품은 건너뛰기 (noise는 이미 target_parts에서 제외됨)
+        if src_name not in target_parts:
+            print(f"⏭️ {src_name} 건너뛰기 (분석 대상 아님)")
+            continue
+        selected.append((src_idx, src_name))
+    
+    batch_size = sources_batch.shape[0]
+    all_part_mels = [{} for _ in range(batch_size)]
+    
+    if selected:
+        # [B, parts, channels, samples] → [B * parts, channels, samples] 한 번에 mel 변환
+        picked = sources_batch[:, [src_idx for src_idx, _ in selected]]
+        with stage_timer("mel"):
+            mels = compute_mel_batch(picked.reshape(-1, *picked.shape[2:]))
+        mels = mels.reshape(batch_size, len(selected), *mels.shape[1:])  # [B, parts, 1, 240, 240]
+        
+        # 타임스탬프 생성
+        timestamp_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        
+        for clip_idx in range(batch_size):
+            for part_idx, (_, src_name) in enumerate(selected):
+                mel = mels[clip_idx, part_idx]
+                all_part_mels[clip_idx][src_name] = mel
+                
+                if save_pt:  # 디버그/보관용 .pt 저장 (배치 처리 시 마이크 번호 자리에 클립 번호 사용)
+                    write_mel_tensor(mel, clip_idx + 1, src_name, timestamp_str)
+    
+    # 분리된 소스 수 정보 출력
+    print(f"🎛️ 총 {total_sources}개 소스 분리 완료 (mel 변환: {len(selected)}개, 건너뛰기: {total_sources - len(selected)}개)")
+    
+    end_mel = time.time()
+    print(f"🎼 mel 변환 시간: {(end_mel - start_mel):.2f}초 ({batch_size}개 클립)")
+    
+    return all_part_mels
+
+def process_audio(model, source_names, audio, target_parts=None, save_pt=SAVE_MEL_PT, profile=None):
+    """
+    로드된 오디오를 분리하고 부품별 mel 텐서를 메모리에서 반환합니다.
+    
+    :param model: 분리 모델
+    :param source_names: 부품 이름 리스트 (예: ['fan', 'pump', ...])
+    :param audio: load_wav_file이 반환한 오디오 텐서 (shape: [1, samples])
+    :param target_parts: 분석할 부품 리스트 (예: ['fan', 'pump']) - None이면 모든 부품 처리
+    :param save_pt: True면 mel 텐서를 .pt 파일로도 저장 (디버그/보관용)
+    :param profile: 분리 프로필 (None이면 SEPARATION_PROFILE)
+    :return: {부품명: mel 텐서 [1, 240, 240]} 딕셔너리
+    """
+    target_parts = resolve_target_parts(source_names, target_parts)
+    print(f"🎯 분석 대상 부품: {target_parts}")
+    
+    # 1. 적응적 레벨 조정
+    normalized_audio = normalize_audio(audio)
+    
     # 2. 분리
     start_sep = time.time()
-    sources = separate(model, normalized_audio)
+    sources = separate(model, normalized_audio, profile=profile)
     end_sep = time.time()
     print(f"🎛️ 소리 분리 시간: {(end_sep - start_sep):.2f}초")
     
-    # 3. 저장 (target_parts에 있는 부품만 저장)
-    start_save = time.time()
-    saved_count = 0
+    # 3. mel 변환 (target_parts에 있는 부품만, 한 번의 배치 연산)
+    return sources_to_part_mels(sources.unsqueeze(0), source_names, target_parts, save_pt=save_pt)[0]
+
+def process_wav_file(model, source_names, wav_path, target_parts=None, save_pt=SAVE_MEL_PT, profile=None):
+    """
+    WAV 파일을 처리하고 부품별 mel 텐서를 메모리에서 반환합니다.
     
-    for src_idx, src in enumerate(sources):
-        if src_idx < len(source_names):
-            src_name = source_names[src_idx]
-            
-            # target_parts에 없는 부품은 건너뛰기
-            if src_name not in target_parts:
-                print(f"⏭️ {src_name} 건너뛰기 (분석 대상 아님)")
-                continue
-            
-            # noise는 이미 target_parts에서 제외됨
-            file_path = save_mel_tensor(src, 1, src_name, timestamp_str, target_parts)  # 마이크 번호를 1로 고정
-            
-            if file_path:  # 저장이 성공한 경우
-                generated_files.append(file_path)
-                saved_count += 1
-                print(f"📁 저장 완료: {src_name}")
+    :param model: 분리 모델
+    :param source_names: 부품 이름 리스트 (예: ['fan', 'pump', ...])
+    :param wav_path: 입력 WAV 파일 경로, bytes, 또는 바이너리 파일 객체
+    :param target_parts: 분석할 부품 리스트 (예: ['fan', 'pump']) - None이면 모든 부품 처리
+    :param save_pt: True면 mel 텐서를 .pt 파일로도 저장 (디버그/보관용)
+    :param profile: 분리 프로필 (None이면 SEPARATION_PROFILE)
+    :return: {부품명: mel 텐서 [1, 240, 240]} 딕셔너리
+    """
+    print(f"\n🎵 WAV 파일 처리 시작: {describe_wav_source(wav_path)}")
     
-    # 분리된 소스 수 정보 출력
-    total_sources = len(sources)
-    print(f"🎛️ 총 {total_sources}개 소스 분리 완료 (저장: {saved_count}개, 건너뛰기: {total_sources - saved_count}개)")
+    # 유효하지 않은 부품이면 파일을 읽기 전에 실패
+    target_parts = resolve_target_parts(source_names, target_parts)
     
-    end_save = time.time()
-    print(f"💾 저장 시간: {(end_save - start_save):.2f}초")
+    start_load = time.time()
+    audio = load_wav_file(wav_path)
+    print(f"📂 파일 로드 시간: {(time.time() - start_load):.2f}초")
     
-    # 생성된 .pt 파일 경로들 반환
-    return generated_files
+    return process_audio(model, source_names, audio, target_parts=target_parts, save_pt=save_pt, profile=profile)
 
-def process_multiple_wav_files(model, source_names, wav_paths, target_parts=None):
+def process_audios_batch(model, source_names, audios, target_parts=None, save_pt=SAVE_MEL_PT,
+                         batch_size=SEPARATION_BATCH_SIZE, profile=None):
     """
-    여러 WAV 파일을 배치로 처리해서 .pt 파일들을 생성합니다.
+    로드된 여러 오디오를 [B, 2, T] 배치로 묶어 한 번의 분리 호출로 처리합니다.
     
     :param model: 분리 모델
     :param source_names: 부품 이름 리스트
-    :param wav_paths: WAV 파일 경로 리스트
+    :param audios: load_wav_file이 반환한 오디오 텐서 리스트 (로드 실패한 항목은 예외 객체)
     :param target_parts: 분석할 부품 리스트
-    :return: 모든 생성된 .pt 파일 경로들
+    :param save_pt: True면 mel 텐서를 .pt 파일로도 저장
+    :param batch_size: 한 번의 분리 호출에 넣을 최대 클립 수
+    :param profile: 분리 프로필 (None이면 SEPARATION_PROFILE)
+    :return: audios 순서의 {부품명: mel 텐서} 딕셔너리 리스트 (처리 실패한 항목은 예외 객체)
     """
-    all_generated_files = []
+    target_parts = resolve_target_parts(source_names, target_parts)
+    print(f"🎯 분석 대상 부품: {target_parts}")
     
+    results = [None] * len(audios)
+    
+    # 1. 적응적 레벨 조정 (로드 실패한 항목은 배치에서 제외)
+    prepared = []
+    for i, audio in enumerate(audios):
+        if isinstance(audio, Exception):
+            results[i] = audio
+            continue
+        try:
+            prepared.append((i, normalize_audio(audio)))
+        except Exception as e:
+            print(f"❌ 오디오 {i+1} 처리 중 오류 발생: {e}")
+            results[i] = e
+    
+    # 2. 분리 + 3. mel 변환 (batch_size 단위)
+    batch_size = max(1, batch_size)
+    for start in range(0, len(prepared), batch_size):
+        chunk = prepared[start:start + batch_size]
+        indices = [i for i, _ in chunk]
+        try:
+            start_sep = time.time()
+            sources_batch = separate_batch(model, [audio for _, audio in chunk], profile=profile)
+            end_sep = time.time()
+            print(f"🎛️ 배치 소리 분리 시간: {(end_sep - start_sep):.2f}초 ({len(chunk)}개 클립)")
+            
+            for i, part_mels in zip(indices, sources_to_part_mels(sources_batch, source_names, target_parts, save_pt=save_pt)):
+                results[i] = part_mels
+        except Exception as e:
+            print(f"❌ 배치 처리 중 오류 발생: {e}")
+            for i in indices:
+                results[i] = e
+    
+    return results
+
+def load_wav_files(wav_paths):
+    """
+    여러 WAV 파일을 로드합니다. 실패한 파일은 예외 객체로 채웁니다.
+    
+    :param wav_paths: WAV 파일 경로 (또는 bytes/파일 객체) 리스트
+    :return: wav_paths 순서의 오디오 텐서 [1, samples] 또는 예외 객체 리스트
+    """
+    audios = []
     for i, wav_path in enumerate(wav_paths):
-        print(f"\n🔄 파일 {i+1}/{len(wav_paths)} 처리 중: {wav_path}")
+        print(f"\n🔄 파일 {i+1}/{len(wav_paths)} 로드 중: {describe_wav_source(wav_path)}")
         try:
-            generated_files = process_wav_file(model, source_names, wav_path, target_parts=target_parts)
-            all_generated_files.extend(generated_files)
+            audios.append(load_wav_file(wav_path))
         except Exception as e:
-            print(f"❌ 파일 {wav_path} 처리 중 오류 발생: {e}")
+            print(f"❌ 파일 {describe_wav_source(wav_path)} 처리 중 오류 발생: {e}")
+            audios.append(e)
+    return audios
+
+def process_wav_files_batch(model, source_names, wav_paths, target_parts=None, save_pt=SAVE_MEL_PT,
+                            batch_size=SEPARATION_BATCH_SIZE, profile=None):
+    """
+    여러 WAV 파일을 [B, 2, T] 배치로 묶어 한 번의 분리 호출로 처리합니다.
     
-    return all_generated_files
+    :param model: 분리 모델
+    :param source_names: 부품 이름 리스트
+    :param wav_paths: WAV 파일 경로 (또는 bytes/파일 객체) 리스트
+    :param target_parts: 분석할 부품 리스트
+    :param save_pt: True면 mel 텐서를 .pt 파일로도 저장
+    :param batch_size: 한 번의 분리 호출에 넣을 최대 클립 수
+    :param profile: 분리 프로필 (None이면 SEPARATION_PROFILE)
+    :return: wav_paths 순서의 {부품명: mel 텐서} 딕셔너리 리스트 (처리 실패한 파일은 예외 객체)
+    """
+    target_parts = resolve_target_parts(source_names, target_parts)
+    return process_audios_batch(model, source_names, load_wav_files(wav_paths), target_parts=target_parts,
+                                save_pt=save_pt, batch_size=batch_size, profile=profile)
+
+def process_multiple_wav_files(model, source_names, wav_paths, target_parts=None, save_pt=SAVE_MEL_PT):
+    """
+    여러 WAV 파일을 배치로 처리해서 부품별 mel 텐서들을 생성합니다.
+    
+    :param model: 분리 모델
+    :param source_names: 부품 이름 리스트
+    :param wav_paths: WAV 파일 경로 리스트
+    :param target_parts: 분석할 부품 리스트
+    :param save_pt: True면 mel 텐서를 .pt 파일로도 저장
+    :return: 파일별 {부품명: mel 텐서} 딕셔너리 리스트 (실패한 파일은 제외)
+    """
+    results = process_wav_files_batch(model, source_names, wav_paths, target_parts=target_parts, save_pt=save_pt)
+    return [part_mels for part_mels in results if not isinstance(part_mels, Exception)]
 
 
 if __name__ == "__main__":
@@ -165,12 +334,12 @@ if __name__ == "__main__":
     target_parts = ["fan", "pump"]  # 이 WAV 파일에 포함된 부품들 (실제 상황에 맞게 수정)
     
     try:
-        generated_files = process_wav_file(model, source_names, wav_file_path, target_parts=target_parts)
+        part_mels = process_wav_file(model, source_names, wav_file_path, target_parts=target_parts, save_pt=True)
         
         # 결과 출력
-        print("\n📊 생성된 .pt 파일들:")
-        for file_path in generated_files:
-            print(f"  ✅ {file_path}")
+        print("\n📊 생성된 mel 텐서들:")
+        for part_name, mel in part_mels.items():
+            print(f"  ✅ {part_name}: {tuple(mel.shape)}")
         
     except Exception as e:
         print(f"❌ 오류 발생: {e}")
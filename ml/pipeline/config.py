@@ -1,16 +1,42 @@
-import torch
+import os
 
 SAMPLE_RATE = 44100
 MEL_SAMPLE_RATE = 16000
-SEGMENT_DURATION = 10
+SEGMENT_DURATION = 10  # 분석 윈도우 길이 (초), 긴 녹음은 이 길이의 겹치는 윈도우로 분석
+STREAM_HOP_DURATION = float(os.getenv("STREAM_HOP_DURATION", "5"))  # 스트리밍 분석 윈도우 간격 (초)
 MEL_SIZE = (240, 240)
 MODEL_PATH = "ml/models/demucs/6a76e118.th"
+# 메모리 매핑 가중치 (python -m ml.pipeline.convert_weights로 변환). 켜져 있고 변환 파일이 있으면
+# mmap + weights_only로 로드해 가중치를 복사하지 않고 파일 페이지를 매핑 (같은 노드의 프로세스/컨테이너가 페이지 캐시 공유)
+MODEL_MMAP = os.getenv("MODEL_MMAP", "true").lower() == "true"
+MODEL_MMAP_PATH = os.getenv("MODEL_MMAP_PATH", "ml/models/demucs/6a76e118.mmap.pt")
 NOISE_SAMPLE_PATH = "noise_sample.pt"
 OUTPUT_FOLDER = "output"
+SAVE_MEL_PT = os.getenv("SAVE_MEL_PT", "false").lower() == "true"  # 디버그/보관용 .pt 저장 여부
 #DEVICE = torch.device("cpu")
-DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+# DEVICE는 처음 사용할 때 결정 (모듈 하단 __getattr__). 라우터가 설정값만 import해도 torch를 로드하지 않도록
+# Demucs 분리 정밀도: fp32 | int8_dynamic (Linear/LSTM 동적 INT8 양자화, CPU 전용) | bf16 (CPU bfloat16 autocast)
+# 모드별 품질/속도 비교: python -m benchmarks.precision_report
+SEPARATION_PRECISION = os.getenv("SEPARATION_PRECISION", "fp32").lower()
 SOURCES = ["fan", "pump", "slider", "bearing", "gearbox", "noise"]  # 모델에 따라 조정 (noise 추가)
 FORCE_STEREO_INPUT = True  # 모델이 2채널 입력을 요구함
+SEPARATION_BATCH_SIZE = int(os.getenv("SEPARATION_BATCH_SIZE", "4"))  # 배치 분리 시 한 번에 처리할 클립 수
+# 분리 백엔드 (ml/pipeline/separation_backend.py): eager | compile | torchscript
+SEPARATION_BACKEND = os.getenv("SEPARATION_BACKEND", "eager").lower()
+SEPARATION_COMPILE_MODE = os.getenv("SEPARATION_COMPILE_MODE", "default")  # torch.compile mode (default, reduce-overhead, max-autotune)
+SEPARATION_TORCHSCRIPT_DIR = os.getenv("SEPARATION_TORCHSCRIPT_DIR", "ml/models/demucs/torchscript")  # export_separation 저장 폴더
+
+# 분리 품질/속도 프로필 (apply_model 인자). 요청마다 고를 수 있고, 지정하지 않으면 SEPARATION_PROFILE 사용
+# - fast: shift/청크 겹침 없이 10초 클립을 한 번에 실행 (대량 스크리닝용, 클립 길이 ≤ 모델 segment여야 함)
+# - balanced: 기존 설정 (shift 1회, 25% 겹침 청크)
+# - accurate: shift 2회 평균, 50% 겹침 청크 (이미 경보 중인 장치의 확인 분석용)
+# segment가 None이면 모델 학습 segment 길이 사용
+SEPARATION_PROFILES = {
+    "fast": {"shifts": 0, "split": False, "overlap": 0.25, "segment": None},
+    "balanced": {"shifts": 1, "split": True, "overlap": 0.25, "segment": None},
+    "accurate": {"shifts": 2, "split": True, "overlap": 0.5, "segment": None},
+}
+SEPARATION_PROFILE = os.getenv("SEPARATION_PROFILE", "balanced").lower()  # 서버 기본 프로필
 
 # RMS 정규화 설정
 TARGET_RMS_DB = -12.0  # 목표 RMS 레벨 (dB)
@@ -18,4 +44,19 @@ RMS_EPSILON = 1e-9     # 0으로 나누기 방지용 작은 값
 
 # 적응적 레벨 조정 설정
 MAX_GAIN_DB = 20.0           # 최대 증폭 게인 (dB)
-COMPRESSION_THRESHOLD = 0.7  # 압축 시작 임계값 (0~1)
\ No newline at end of file
+COMPRESSION_THRESHOLD = 0.7  # 압축 시작 임계값 (0~1)
+
+# ONNX 분류 마이크로 배칭 설정 (동시 요청의 같은 부품 입력을 모아 한 번에 추론)
+ONNX_MICRO_BATCHING = os.getenv("ONNX_MICRO_BATCHING", "true").lower() == "true"
+ONNX_BATCH_MAX_SIZE = int(os.getenv("ONNX_BATCH_MAX_SIZE", "8"))            # 최대 배치 크기
+ONNX_BATCH_MAX_WAIT_MS = float(os.getenv("ONNX_BATCH_MAX_WAIT_MS", "5"))    # 배치를 모으는 최대 대기 시간 (ms)
+
+
+def __getattr__(name):
+    """torch가 필요한 설정(DEVICE)을 처음 접근할 때 계산합니다."""
+    global DEVICE
+    if name == "DEVICE":
+        import torch
+        DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        return DEVICE
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,178 @@
+"""
+모델 가중치를 메모리 매핑 가능한 형식으로 한 번 변환합니다.
+
+- Demucs: 체크포인트(MODEL_PATH, pickle)를 weights_only로 읽을 수 있는 텐서 state_dict(MODEL_MMAP_PATH)로 저장
+  → load_model이 torch.load(mmap=True, weights_only=True) + load_state_dict(assign=True)로 복사 없이 매핑
+- ONNX: 부품 모델의 initializer를 페이지 경계에 맞춘 외부 데이터 파일로 분리해 *.ext.onnx로 저장
+  → ONNX Runtime이 외부 데이터를 읽어 복사하지 않고 메모리 매핑 (오프셋이 페이지 정렬되어 있어야 함)
+
+매핑된 페이지는 페이지 캐시에 올라가므로 같은 노드의 워커 프로세스/컨테이너가 같은 물리 메모리를 공유하고,
+시작 시에는 실제로 접근하는 페이지만 디스크에서 읽습니다. 원본 파일은 그대로 둡니다.
+
+실행 (프로젝트 루트에서):
+    python -m ml.pipeline.convert_weights
+    python -m ml.pipeline.convert_weights --skip-onnx
+    python -m ml.pipeline.convert_weights --skip-demucs --onnx-dir ml/models/onnx --parts fan,pump
+"""
+import os
+import mmap
+import time
+import argparse
+
+import numpy as np
+import onnx
+import onnxruntime as ort
+import torch
+from onnx.external_data_helper import set_external_data
+
+from .config import MODEL_PATH, MODEL_MMAP_PATH, SOURCES
+from .onnx import external_data_model_path, onnx_model_path_for_part, quantized_model_path
+
+# 외부 데이터 텐서 시작 오프셋 정렬 단위 (ONNX Runtime은 할당 단위에 맞는 오프셋만 매핑)
+EXTERNAL_DATA_ALIGNMENT = mmap.ALLOCATIONGRANULARITY
+
+
+def extract_model_state_dict(checkpoint, model_keys):
+    """
+    load_model이 실제로 로드하는 항목(모델 state_dict 키와 일치하는 텐서)만 남깁니다.
+    load_state_dict(strict=False)가 무시하는 나머지 항목은 변환 파일에 넣지 않습니다.
+    """
+    if not isinstance(checkpoint, dict):
+        raise ValueError(f"❌ state_dict 형식의 체크포인트가 아닙니다: {type(checkpoint).__name__}")
+    state_dict = {key: value.contiguous() for key, value in checkpoint.items()
+                  if key in model_keys and isinstance(value, torch.Tensor)}
+    if not state_dict:
+        raise ValueError(f"❌ 체크포인트에 모델 가중치 키가 없습니다 (최상위 키: {list(checkpoint)[:5]})")
+    return state_dict
+
+
+def convert_demucs_checkpoint(model_path=MODEL_PATH, output_path=MODEL_MMAP_PATH):
+    """
+    Demucs 체크포인트를 mmap 로드용 state_dict로 변환하고, mmap으로 다시 읽어 원본과 같은지 확인합니다.
+
+    :return: 저장된 파일 경로
+    """
+    from demucs.htdemucs import HTDemucs
+
+    model_keys = set(HTDemucs(sources=SOURCES).state_dict())
+    checkpoint = torch.load(model_path, map_location="cpu", weights_only=False)
+    state_dict = extract_model_state_dict(checkpoint, model_keys)
+    missing = model_keys - set(state_dict)
+    if missing:
+        print(f"⚠️ 체크포인트에 없는 모델 키 {len(missing)}개 (초기값 사용, 원본 로드와 동일): {sorted(missing)[:5]}")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    torch.save(state_dict, tmp_path)
+    os.replace(tmp_path, output_path)
+
+    start = time.perf_counter()
+    mapped = torch.load(output_path, map_location="cpu", mmap=True, weights_only=True)
+    mapped_seconds = time.perf_counter() - start
+    mismatched = [key for key, value in state_dict.items() if not torch.equal(value, mapped[key])]
+    if mismatched:
+        raise RuntimeError(f"❌ 변환 결과가 원본과 다릅니다: {mismatched[:5]}")
+
+    start = time.perf_counter()
+    torch.load(model_path, map_location="cpu", weights_only=False)
+    original_seconds = time.perf_counter() - start
+    print(f"✅ Demucs 메모리 매핑 가중치 저장: {output_path} (텐서 {len(state_dict)}개, "
+          f"{os.path.getsize(output_path) / 1e6:.1f}MB, 로드 {original_seconds:.3f}초 → mmap {mapped_seconds:.3f}초)")
+    return output_path
+
+
+def save_with_aligned_external_data(model, output_path, size_threshold=1024, alignment=EXTERNAL_DATA_ALIGNMENT):
+    """
+    size_threshold 이상인 initializer를 output_path + ".data"에 페이지 정렬 오프셋으로 써서 저장합니다.
+    (부품 분류 모델은 서브그래프가 없으므로 최상위 그래프의 initializer만 대상)
+    """
+    data_name = os.path.basename(output_path) + ".data"
+    data_path = os.path.join(os.path.dirname(output_path), data_name)
+    tmp_data_path = f"{data_path}.{os.getpid()}.tmp"
+    tmp_model_path = f"{output_path}.{os.getpid()}.tmp"
+
+    externalized = 0
+    with open(tmp_data_path, "wb") as f:
+        for tensor in model.graph.initializer:
+            if not tensor.HasField("raw_data") or len(tensor.raw_data) < size_threshold:
+                continue
+            offset = -(-f.tell() // alignment) * alignment
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(tensor.raw_data)
+            set_external_data(tensor, location=data_name, offset=offset, length=len(tensor.raw_data))
+            tensor.ClearField("raw_data")
+            externalized += 1
+
+    onnx.save_model(model, tmp_model_path)
+    # 데이터 파일을 먼저 교체해야 새 그래프가 항상 완성된 데이터를 가리킴
+    os.replace(tmp_data_path, data_path)
+    os.replace(tmp_model_path, output_path)
+    return externalized
+
+
+def _random_inputs(session, seed=0):
+    rng = np.random.default_rng(seed)
+    inputs = {}
+    for model_input in session.get_inputs():
+        shape = [dim if isinstance(dim, int) else 1 for dim in model_input.shape]
+        inputs[model_input.name] = rng.standard_normal(shape).astype(np.float32)
+    return inputs
+
+
+def convert_onnx_external_data(onnx_model_path, output_path=None, size_threshold=1024, atol=1e-5):
+    """
+    ONNX 모델을 외부 데이터 모델로 변환하고, 같은 입력에 대한 출력이 원본과 같은지 확인합니다.
+
+    :return: 저장된 *.ext.onnx 경로
+    """
+    output_path = output_path or external_data_model_path(onnx_model_path)
+    model = onnx.load(onnx_model_path)
+    externalized = save_with_aligned_external_data(model, output_path, size_threshold)
+
+    original = ort.InferenceSession(onnx_model_path, providers=["CPUExecutionProvider"])
+    converted = ort.InferenceSession(output_path, providers=["CPUExecutionProvider"])
+    inputs = _random_inputs(original)
+    expected, actual = original.run(None, inputs)[0], converted.run(None, inputs)[0]
+    if not np.allclose(expected, actual, atol=atol):
+        raise RuntimeError(f"❌ 변환 모델 출력이 원본과 다릅니다: {output_path} "
+                           f"(최대 차이 {np.abs(expected - actual).max():.2e})")
+
+    data_size = os.path.getsize(output_path + ".data")
+    print(f"✅ 외부 데이터 모델 저장: {output_path} (initializer {externalized}개, 데이터 {data_size / 1e6:.1f}MB)")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모델 가중치를 메모리 매핑 가능한 형식으로 변환")
+    parser.add_argument("--model-path", default=MODEL_PATH, help="Demucs 체크포인트")
+    parser.add_argument("--output", default=MODEL_MMAP_PATH, help="Demucs 변환 파일 경로 (MODEL_MMAP_PATH)")
+    parser.add_argument("--onnx-dir", default="ml/models/onnx", help="부품 ONNX 모델 폴더")
+    parser.add_argument("--parts", default=None, help="변환할 부품들 (콤마로 구분, 빈 값이면 noise 제외 전체)")
+    parser.add_argument("--size-threshold", type=int, default=1024, help="외부 데이터로 분리할 최소 initializer 크기 (bytes)")
+    parser.add_argument("--skip-demucs", action="store_true", help="Demucs 변환 생략")
+    parser.add_argument("--skip-onnx", action="store_true", help="ONNX 변환 생략")
+    args = parser.parse_args()
+
+    if not args.skip_demucs:
+        print("🔧 Demucs 체크포인트 변환")
+        convert_demucs_checkpoint(args.model_path, args.output)
+
+    if not args.skip_onnx:
+        parts = args.parts.split(",") if args.parts else [src for src in SOURCES if src.lower() != "noise"]
+        for part_name in parts:
+            fp32_path = onnx_model_path_for_part(args.onnx_dir, part_name, precision="fp32")
+            # INT8 모델이 있으면 그것도 변환 (ONNX_INT8_PARTS로 선택될 수 있으므로)
+            for onnx_model_path in (fp32_path, quantized_model_path(fp32_path)):
+                if not os.path.exists(onnx_model_path):
+                    if onnx_model_path == fp32_path:
+                        print(f"⚠️ {part_name} ONNX 모델 없음: {onnx_model_path}")
+                    continue
+                print(f"\n🔧 {os.path.basename(onnx_model_path)} 외부 데이터 변환")
+                convert_onnx_external_data(onnx_model_path, size_threshold=args.size_threshold)
+
+    print("\n💡 서버는 MODEL_MMAP=true, ONNX_EXTERNAL_DATA=true(기본값)이면 변환 파일을 자동으로 사용합니다.")
+    print("💡 워커별 메모리/시작 시간 비교: python -m benchmarks.worker_memory --workers 4")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# === export_separation.py ===
+"""
+HTDemucs를 배치 크기별 TorchScript로 export하고, eager 결과와 같은지 확인합니다.
+export된 모델은 SEPARATION_TORCHSCRIPT_DIR에 저장되며 SEPARATION_BACKEND=torchscript일 때 로드됩니다.
+
+- export: 학습 세그먼트 길이(model.segment × samplerate)의 고정 입력으로 torch.jit.trace
+  (apply_model은 모든 청크를 이 길이로 패딩하므로 배치 크기만 맞으면 trace 모델이 쓰임)
+  SEPARATION_PRECISION=int8_dynamic이면 양자화된 모델을 trace해 정밀도별 파일로 저장
+- 동등성 검사: 같은 입력을 eager 백엔드와 대상 백엔드(torchscript/compile)로 분리해
+  최대 절대 오차와 오차 SNR(dB)을 비교, 허용치를 넘으면 종료 코드 1
+
+실행 (프로젝트 루트에서):
+    python -m ml.pipeline.export_separation --batch-sizes 1,4
+    python -m ml.pipeline.export_separation --check-only --backend compile --wav-dir test_wav
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import warnings
+
+import torch
+
+from .config import SEPARATION_BATCH_SIZE, SEPARATION_TORCHSCRIPT_DIR, SAMPLE_RATE, SEGMENT_DURATION
+from .model import load_model, prepare_separation_input
+from .resample import init_resampler
+from .separation_backend import EagerBackend, create_separation_backend, torchscript_path
+
+
+def export_torchscript(model, batch_sizes, export_dir=SEPARATION_TORCHSCRIPT_DIR):
+    """
+    배치 크기별로 HTDemucs를 trace해 저장합니다.
+
+    :param model: load_model이 반환한 HTDemucs 모델
+    :param batch_sizes: export할 배치 크기 리스트
+    :param export_dir: 저장 폴더
+    :return: 저장된 파일 경로 리스트
+    """
+    precision = getattr(model, "separation_precision", "fp32")
+    if precision == "bf16":
+        raise ValueError("❌ bf16은 호출 시 autocast로 적용되므로 TorchScript export를 지원하지 않습니다 (eager/compile 사용)")
+    os.makedirs(export_dir, exist_ok=True)
+    training_length = model.valid_length(0)
+    device = next(model.parameters()).device
+    saved = []
+    for batch_size in batch_sizes:
+        example = 0.1 * torch.randn(batch_size, model.audio_channels, training_length, device=device)
+        start = time.perf_counter()
+        # 입력 길이에 따른 파이썬 분기는 고정 길이에서 한 번만 기록되면 되므로 trace 경고는 무시
+        with torch.no_grad(), warnings.catch_warnings():
+            warnings.simplefilter("ignore", torch.jit.TracerWarning)
+            traced = torch.jit.trace(model, example, check_trace=False)
+        path = torchscript_path(batch_size, precision, export_dir=export_dir)
+        traced.save(path)
+        saved.append(path)
+        print(f"💾 TorchScript 저장: {path} (입력 {tuple(example.shape)}, {time.perf_counter() - start:.1f}초)")
+    return saved
+
+
+def load_check_inputs(wav_dir, batch_size, seconds=SEGMENT_DURATION):
+    """
+    동등성 검사 입력 (모노 배치). WAV 폴더가 있으면 앞쪽 클립들을, 없으면 잡음을 사용합니다.
+    """
+    if wav_dir:
+        from .audio_preprocessing import load_wav_file
+        wav_paths = sorted(glob.glob(os.path.join(wav_dir, "*.wav")))[:batch_size]
+        if len(wav_paths) == batch_size:
+            return torch.stack([load_wav_file(path).squeeze(0) for path in wav_paths])
+        print(f"⚠️ {wav_dir}에 WAV가 {batch_size}개 미만이라 잡음 입력으로 검사합니다.")
+    return 0.1 * torch.randn(batch_size, int(seconds * SAMPLE_RATE))
+
+
+def error_snr_db(reference, estimate):
+    """reference 대비 (estimate - reference) 오차의 SNR (dB, 클수록 같음)"""
+    noise = torch.sum((estimate - reference) ** 2)
+    if noise == 0:
+        return float("inf")
+    return float(10 * torch.log10(torch.sum(reference ** 2) / noise))
+
+
+def check_equivalence(model, backend_name, batch_size, wav_dir=None, atol=1e-3, min_snr_db=60.0):
+    """
+    eager 분리 결과와 대상 백엔드 결과를 비교합니다.
+
+    :return: (통과 여부, 비교 결과 dict)
+    """
+    audio = prepare_separation_input(load_check_inputs(wav_dir, batch_size))
+    eager = EagerBackend(model)
+    backend = create_separation_backend(model, backend_name)
+
+    backend(audio)  # 첫 호출(compile 등)은 시간 측정에서 제외
+    timings = {}
+    outputs = {}
+    for name, run in (("eager", eager), (backend_name, backend)):
+        start = time.perf_counter()
+        outputs[name] = run(audio).cpu()
+        timings[name] = time.perf_counter() - start
+
+    reference, estimate = outputs["eager"], outputs[backend_name]
+    max_abs_diff = float(torch.max(torch.abs(estimate - reference)))
+    source_snr_db = {
+        source: round(error_snr_db(reference[:, i], estimate[:, i]), 2)
+        for i, source in enumerate(model.sources)
+    }
+    passed = max_abs_diff <= atol and min(source_snr_db.values()) >= min_snr_db
+    result = {
+        "backend": backend_name,
+        "batch_size": batch_size,
+        "max_abs_diff": max_abs_diff,
+        "error_snr_db": source_snr_db,
+        "eager_seconds": round(timings["eager"], 3),
+        "backend_seconds": round(timings[backend_name], 3),
+        "speedup": round(timings["eager"] / timings[backend_name], 2),
+        "backend_status": backend.get_status(),
+        "passed": passed
+    }
+    return passed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTDemucs TorchScript export 및 eager 동등성 검사")
+    parser.add_argument("--batch-sizes", default=f"1,{SEPARATION_BATCH_SIZE}",
+                        help="export할 배치 크기들 (콤마로 구분, 서버의 SEPARATION_BATCH_SIZE 포함 권장)")
+    parser.add_argument("--backend", choices=["torchscript", "compile"], default="torchscript", help="검사할 백엔드")
+    parser.add_argument("--check-only", action="store_true", help="export 없이 동등성 검사만 실행")
+    parser.add_argument("--wav-dir", default=None, help="검사 입력 WAV 폴더 (없으면 잡음)")
+    parser.add_argument("--atol", type=float, default=1e-3, help="허용 최대 절대 오차")
+    parser.add_argument("--min-snr-db", type=float, default=60.0, help="소스별 최소 오차 SNR (dB)")
+    args = parser.parse_args()
+
+    batch_sizes = sorted({int(b) for b in args.batch_sizes.split(",") if b.strip()})
+
+    model, _ = load_model()
+    init_resampler(model.samplerate)
+
+    if not args.check_only and args.backend == "torchscript":
+        export_torchscript(model, batch_sizes)
+
+    all_passed = True
+    print("\n📊 eager 대비 동등성 검사")
+    for batch_size in batch_sizes:
+        passed, result = check_equivalence(model, args.backend, batch_size, args.wav_dir, args.atol, args.min_snr_db)
+        all_passed = all_passed and passed
+        print(f"   {'✅' if passed else '❌'} 배치 {batch_size}: 최대 오차 {result['max_abs_diff']:.2e}, "
+              f"오차 SNR {min(result['error_snr_db'].values()):.1f}dB, "
+              f"{result['eager_seconds']:.2f}초 → {result['backend_seconds']:.2f}초 (x{result['speedup']})")
+        print(f"      {result['backend_status']}")
+
+    if not all_passed:
+        print("❌ eager 결과와 허용치 이상 다릅니다. 이 백엔드를 서버에 사용하지 마세요.")
+        sys.exit(1)
+    print(f"\n💡 서버에서 사용하려면 .env에 SEPARATION_BACKEND={args.backend}를 설정하세요.")
+
+
+if __name__ == "__main__":
+    main()
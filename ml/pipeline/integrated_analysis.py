@@ -1,7 +1,157 @@
 import os
 import json
 import glob
-from .onnx import predict_single_file_onnx_json
+import torch
+from .onnx import predict_mel_onnx_json, submit_mel_onnx, logit_to_result_json, onnx_model_path_for_part
+from .metrics import stage_timer, record_onnx_timing
+
+def _part_model_path(part_name, onnx_model_base_path):
+    """부품별 전용 ONNX 모델 경로를 만들고 존재 여부를 확인합니다."""
+    onnx_model_path = onnx_model_path_for_part(onnx_model_base_path, part_name)
+    
+    # 모델 파일 존재 확인
+    if not os.path.exists(onnx_model_path):
+        raise FileNotFoundError(f"❌ {part_name} 모델을 찾을 수 없습니다: {onnx_model_path}")
+    
+    return onnx_model_path
+
+def _part_result(part_name, onnx_model_path, classification_result, device_name):
+    """ONNX 분류 결과를 부품별 결과 딕셔너리로 정리합니다."""
+    print(f"✅ {part_name}: {'이상 감지' if classification_result['result'] else '정상'} "
+          f"(확률: {classification_result['probability']:.3f})")
+    
+    return {
+        "part_name": part_name,
+        "device_name": device_name,
+        "model_used": os.path.basename(onnx_model_path),
+        "anomaly_detected": classification_result["result"],
+        "anomaly_probability": classification_result["probability"]
+    }
+
+def classify_part_mel(part_name, mel, onnx_model_base_path="ml/models/onnx", device_name="unknown_device"):
+    """
+    한 부품의 mel 텐서를 해당 부품 전용 ONNX 모델로 분류합니다.
+    
+    Args:
+        part_name: 부품명 (예: fan)
+        mel: 정규화된 mel 텐서 (shape: [1, 240, 240])
+        onnx_model_base_path: ONNX 모델들이 저장된 폴더 경로
+        device_name: 장치명
+    
+    Returns:
+        dict: 부품별 분류 결과
+    """
+    onnx_model_path = _part_model_path(part_name, onnx_model_base_path)
+    print(f"🤖 {part_name} 분류 중... (모델: {os.path.basename(onnx_model_path)})")
+    
+    # ONNX 모델로 분류 (입력 채널 수는 레지스트리의 모델 메타데이터에서 결정)
+    classification_result = predict_mel_onnx_json(
+        onnx_model_path=onnx_model_path,
+        mel=mel,
+        device_name=device_name,
+        threshold=0.5
+    )
+    
+    return _part_result(part_name, onnx_model_path, classification_result, device_name)
+
+def summarize_classification_results(classification_results, device_name="unknown_device"):
+    """부품별 분류 결과를 최종 결과 딕셔너리로 정리합니다."""
+    # 분석할 부품명들 추출
+    analyzed_parts = [result["part_name"] for result in classification_results]
+    
+    return {
+        "device_name": device_name,
+        "analyzed_parts": analyzed_parts,
+        "total_parts": len(classification_results),
+        "anomaly_count": sum(1 for r in classification_results if r["anomaly_detected"]),
+        "results": classification_results
+    }
+
+def classify_part_mels(part_mels, onnx_model_base_path="ml/models/onnx", device_name="unknown_device"):
+    """
+    메모리의 부품별 mel 텐서들을 각 부품별 전용 ONNX 모델로 분류하는 함수 (.pt 파일 없이)
+    
+    Args:
+        part_mels: {부품명: mel 텐서} 딕셔너리 (process_wav_file 반환값)
+        onnx_model_base_path: ONNX 모델들이 저장된 폴더 경로
+        device_name: 장치명
+    
+    Returns:
+        dict: 분석 결과를 담은 딕셔너리
+    """
+    return classify_multiple_part_mels([part_mels], onnx_model_base_path, [device_name])[0]
+
+def classify_multiple_part_mels(part_mels_list, onnx_model_base_path="ml/models/onnx", device_names=None):
+    """
+    여러 클립의 부품별 mel 텐서들을 한꺼번에 분류합니다.
+    모든 추론을 먼저 제출하므로 부품별 마이크로 배처가 클립들을 한 배치로 묶을 수 있습니다.
+    
+    Args:
+        part_mels_list: 클립별 {부품명: mel 텐서} 딕셔너리 리스트
+        onnx_model_base_path: ONNX 모델들이 저장된 폴더 경로
+        device_names: 클립별 장치명 리스트 (None이면 unknown_device)
+    
+    Returns:
+        list: 클립별 분석 결과 딕셔너리 리스트
+    """
+    if device_names is None:
+        device_names = ["unknown_device"] * len(part_mels_list)
+    
+    # 모든 클립, 모든 부품의 추론을 먼저 제출
+    submitted_list = []
+    final_results = []
+    with stage_timer("onnx"):
+        for part_mels in part_mels_list:
+            submitted = []
+            for part_name, mel in part_mels.items():
+                onnx_model_path = _part_model_path(part_name, onnx_model_base_path)
+                print(f"🤖 {part_name} 분류 중... (모델: {os.path.basename(onnx_model_path)})")
+                submitted.append((part_name, onnx_model_path, submit_mel_onnx(onnx_model_path, mel)))
+            submitted_list.append(submitted)
+        
+        # 결과 수집
+        for submitted, device_name in zip(submitted_list, device_names):
+            classification_results = []
+            for part_name, onnx_model_path, future in submitted:
+                classification_result = logit_to_result_json(future.result(), device_name=device_name, threshold=0.5)
+                record_onnx_timing(part_name, future)
+                classification_results.append(_part_result(part_name, onnx_model_path, classification_result, device_name))
+            final_results.append(summarize_classification_results(classification_results, device_name))
+    
+    return final_results
+
+def aggregate_window_results(timeline, device_name="unknown_device", threshold=0.5):
+    """
+    윈도우별 분류 결과(타임라인)를 부품별 종합 점수로 집계합니다.
+    종합 이상 확률은 윈도우 평균이며, 최대 확률과 이상 윈도우 수를 함께 제공합니다.
+    
+    Args:
+        timeline: [{"parts": {부품명: 이상 확률}, ...}, ...] 윈도우 리스트
+        device_name: 장치명
+        threshold: 이상 판정 임계값
+    
+    Returns:
+        dict: classify_part_mels와 같은 형식의 종합 분석 결과
+    """
+    part_probabilities = {}
+    for window in timeline:
+        for part_name, probability in window["parts"].items():
+            part_probabilities.setdefault(part_name, []).append(probability)
+    
+    classification_results = []
+    for part_name, probabilities in part_probabilities.items():
+        mean_probability = sum(probabilities) / len(probabilities)
+        classification_results.append({
+            "part_name": part_name,
+            "device_name": device_name,
+            "anomaly_detected": mean_probability >= threshold,
+            "anomaly_probability": round(mean_probability, 3),
+            "max_probability": round(max(probabilities), 3),
+            "anomalous_windows": sum(1 for p in probabilities if p >= threshold),
+            "total_windows": len(probabilities)
+        })
+    
+    return summarize_classification_results(classification_results, device_name)
 
 def process_pt_files_with_classification(pt_files, onnx_model_base_path="ml/models/onnx", device_name="unknown_device"):
     """
@@ -24,64 +174,13 @@ def process_pt_files_with_classification(pt_files, onnx_model_base_path="ml/mode
         filename = os.path.basename(pt_file_path)
         part_name = filename.split('_')[-1].replace('.pt', '')
         
-        # 각 부품별 전용 ONNX 모델 경로 생성
-        onnx_model_path = os.path.join(onnx_model_base_path, f"fold0_best_model_{part_name}.onnx")
-        
-        # 모델 파일 존재 확인
-        if not os.path.exists(onnx_model_path):
-            raise FileNotFoundError(f"❌ {part_name} 모델을 찾을 수 없습니다: {onnx_model_path}")
-        
-        print(f"🤖 {part_name} 분류 중... (모델: {os.path.basename(onnx_model_path)})")
-        
-        # ONNX 모델로 분류 (in_ch=1 실패시 in_ch=2 시도)
-        classification_result = None
-        for in_ch in [1, 2]:
-            try:
-                classification_result = predict_single_file_onnx_json(
-                    onnx_model_path=onnx_model_path,
-                    pt_file_path=pt_file_path,
-                    device_name=device_name,
-                    in_ch=in_ch,
-                    threshold=0.5
-                )
-                break
-            except Exception as e:
-                if in_ch == 1:
-                    continue
-                else:
-                    raise e
-        
-        if classification_result is None:
-            raise RuntimeError(f"❌ {part_name} 분류 실패: 모든 채널 설정에서 실패")
-        
-        # 결과 통합
-        integrated_result = {
-            "part_name": part_name,
-            "pt_file_path": pt_file_path,
-            "device_name": device_name,
-            "model_used": os.path.basename(onnx_model_path),
-            "anomaly_detected": classification_result["result"],
-            "anomaly_probability": classification_result["probability"]
-        }
+        mel = torch.load(pt_file_path)
+        integrated_result = classify_part_mel(part_name, mel, onnx_model_base_path, device_name)
+        integrated_result["pt_file_path"] = pt_file_path
         
         classification_results.append(integrated_result)
-        
-        print(f"✅ {part_name}: {'이상 감지' if classification_result['result'] else '정상'} "
-              f"(확률: {classification_result['probability']:.3f})")
-    
-    # 분석할 부품명들 추출
-    analyzed_parts = [result["part_name"] for result in classification_results]
-    
-    # 최종 결과 정리
-    final_result = {
-        "device_name": device_name,
-        "analyzed_parts": analyzed_parts,
-        "total_parts": len(classification_results),
-        "anomaly_count": sum(1 for r in classification_results if r["anomaly_detected"]),
-        "results": classification_results
-    }
     
-    return final_result
+    return summarize_classification_results(classification_results, device_name)
 
 def analyze_pt_files_by_pattern(output_dir="output", onnx_model_base_path="ml/models/onnx", device_name="machine_001"):
     """
@@ -6,16 +6,16 @@ import os
 import sys
 from datetime import datetime
 
-# 1단계: .pt 파일 생성 (audio_preprocessing.py)
+# 1단계: 부품별 mel 텐서 생성 (audio_preprocessing.py)
 from .audio_preprocessing import process_wav_file, load_model
 from .resample import init_resampler
 
-# 2단계: .pt 파일 분석 (integrated_analysis.py)  
-from .integrated_analysis import process_pt_files_with_classification
+# 2단계: mel 텐서 분석 (integrated_analysis.py)  
+from .integrated_analysis import classify_part_mels
 
 def main_pipeline(wav_file_path, target_parts, onnx_model_base_path="ml/models/onnx", device_name="machine_001"):
     """
-    완전한 파이프라인: WAV 파일 → .pt 파일 생성 → ONNX 분류 분석
+    완전한 파이프라인: WAV 파일 → 부품별 mel 텐서 생성 → ONNX 분류 분석
     
     Args:
         wav_file_path: 입력 WAV 파일 경로
@@ -31,8 +31,8 @@ def main_pipeline(wav_file_path, target_parts, onnx_model_base_path="ml/models/o
     print("="*60)
     
     try:
-        # === 1단계: .pt 파일 생성 ===
-        print("📋 1단계: WAV 파일에서 .pt 파일 생성")
+        # === 1단계: 부품별 mel 텐서 생성 ===
+        print("📋 1단계: WAV 파일에서 부품별 mel 텐서 생성")
         print(f"📁 입력 파일: {wav_file_path}")
         print(f"🎯 대상 부품: {target_parts}")
         
@@ -41,22 +41,22 @@ def main_pipeline(wav_file_path, target_parts, onnx_model_base_path="ml/models/o
         model, source_names = load_model()
         init_resampler(model.samplerate)
         
-        # .pt 파일 생성
-        generated_files = process_wav_file(model, source_names, wav_file_path, target_parts=target_parts)
+        # mel 텐서 생성 (메모리)
+        part_mels = process_wav_file(model, source_names, wav_file_path, target_parts=target_parts)
         
-        if not generated_files:
-            raise ValueError("❌ .pt 파일이 생성되지 않았습니다.")
+        if not part_mels:
+            raise ValueError("❌ mel 텐서가 생성되지 않았습니다.")
         
-        print(f"✅ 1단계 완료: {len(generated_files)}개 .pt 파일 생성")
-        for file_path in generated_files:
-            print(f"  📄 {file_path}")
+        print(f"✅ 1단계 완료: {len(part_mels)}개 부품 mel 텐서 생성")
+        for part_name in part_mels:
+            print(f"  🎼 {part_name}")
         
-        # === 2단계: .pt 파일 분석 ===
+        # === 2단계: mel 텐서 분석 ===
         print(f"\n📋 2단계: 각 부품별 전용 ONNX 모델로 분류 분석")
         print(f"🤖 ONNX 모델 폴더: {onnx_model_base_path}")
         
-        analysis_results = process_pt_files_with_classification(
-            pt_files=generated_files,
+        analysis_results = classify_part_mels(
+            part_mels,
             onnx_model_base_path=onnx_model_base_path,
             device_name=device_name
         )
@@ -68,7 +68,7 @@ def main_pipeline(wav_file_path, target_parts, onnx_model_base_path="ml/models/o
             "pipeline_info": {
                 "input_wav_file": wav_file_path,
                 "target_parts": target_parts,
-                "generated_pt_files": generated_files,
+                "processed_parts": list(part_mels.keys()),
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             },
             "analysis_results": analysis_results
@@ -91,7 +91,7 @@ def print_final_results(results):
     pipeline_info = results["pipeline_info"]
     print(f"📁 입력 파일: {pipeline_info['input_wav_file']}")
     print(f"🎯 분석 대상: {pipeline_info['target_parts']}")
-    print(f"📄 생성된 .pt 파일: {len(pipeline_info['generated_pt_files'])}개")
+    print(f"🎼 처리된 부품: {len(pipeline_info['processed_parts'])}개")
     print(f"⏰ 처리 시간: {pipeline_info['timestamp']}")
     
     # 분석 결과
@@ -106,11 +106,7 @@ def print_final_results(results):
         model_info = f", 모델: {result['model_used']}" if 'model_used' in result else ""
         print(f"  {result['part_name']}: {status} "
               f"(확률: {result['anomaly_probability']:.3f}{model_info})")
-    
-    # 생성된 파일들
-    print(f"\n📄 생성된 .pt 파일들:")
-    for file_path in pipeline_info['generated_pt_files']:
-        print(f"  📄 {file_path}")
+
 
 def save_results_to_json(results, output_filename=None):
     """결과를 JSON 파일로 저장합니다."""
@@ -4,6 +4,112 @@ from torchaudio.transforms import MelSpectrogram, AmplitudeToDB, Resample
 from .config import SAMPLE_RATE, MEL_SIZE, OUTPUT_FOLDER, MEL_SAMPLE_RATE
 from datetime import datetime
 
+# 재사용 mel 프론트엔드 (전역 변수로 사용, 필터뱅크/윈도우/리샘플 커널을 호출 간 유지)
+MEL_FRONTEND = None
+
+
+class MelFrontend(torch.nn.Module):
+    """
+    분리된 소스 배치 [parts, time]을 정규화된 mel 배치 [parts, 1, 240, 240]로 한 번에 변환합니다.
+    Resample 커널, mel 필터뱅크, STFT 윈도우는 생성 시 한 번만 만들어집니다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # 샘플링 주파수가 다르면 Resample
+        self.resampler = (
+            Resample(orig_freq=SAMPLE_RATE, new_freq=MEL_SAMPLE_RATE)
+            if SAMPLE_RATE != MEL_SAMPLE_RATE else torch.nn.Identity()
+        )
+        # Mel 변환기
+        self.mel_transform = MelSpectrogram(
+            sample_rate=MEL_SAMPLE_RATE,
+            n_fft=1024,
+            hop_length=512,
+            n_mels=128,
+            power=2.0
+        )
+        self.db_transform = AmplitudeToDB(stype='power', top_db=80.0)
+
+    def forward(self, waveforms):
+        """
+        :param waveforms: 44100Hz 오디오 배치 (shape: [parts, time])
+        :return: 정규화된 mel 배치 (shape: [parts, 1, 240, 240])
+        """
+        waveforms = self.resampler(waveforms)
+        # [parts, 1, time] 형태로 넣어야 AmplitudeToDB의 top_db가 항목별로 적용됨
+        mel = self.mel_transform(waveforms.unsqueeze(1))   # [parts, 1, 128, time]
+        mel = self.db_transform(mel)                       # dB 변환
+
+        # 항목별 z-score 정규화
+        mean = mel.mean(dim=(1, 2, 3), keepdim=True)
+        std = mel.std(dim=(1, 2, 3), keepdim=True)
+        mel = (mel - mean) / (std + 1e-9)
+
+        # 크기 조정 (interpolate가 정확히 MEL_SIZE를 만들므로 패딩/크롭 불필요)
+        return torch.nn.functional.interpolate(
+            mel, size=MEL_SIZE, mode='bilinear', align_corners=False
+        )                                                  # [parts, 1, 240, 240]
+
+
+def get_mel_frontend():
+    """전역 mel 프론트엔드를 반환합니다. 없으면 한 번만 생성합니다."""
+    global MEL_FRONTEND
+
+    if MEL_FRONTEND is None:
+        MEL_FRONTEND = MelFrontend().eval()
+    return MEL_FRONTEND
+
+
+def compute_mel_batch(source_tensors):
+    """
+    여러 분리 소스의 mel 텐서를 한 번의 벡터화된 연산으로 계산합니다.
+
+    :param source_tensors: 소스 배치 (shape: [parts, time] 또는 [parts, channels, time])
+    :return: 정규화된 mel 배치 (shape: [parts, 1, 240, 240])
+    """
+    # ✅ 멀티채널일 경우 첫 번째 채널만 선택
+    if source_tensors.dim() == 3:
+        source_tensors = source_tensors[:, 0]        # [parts, time]
+
+    with torch.no_grad():
+        return get_mel_frontend()(source_tensors.float())
+
+
+def compute_mel_tensor(source_tensor):
+    """
+    MelSpectrogram을 계산해 정규화된 텐서를 메모리에서 반환합니다.
+
+    :param source_tensor: 입력 오디오 텐서 (shape: [1, time] 또는 [2, time])
+
+    입력 44100Hz tensor, 출력 16000Hz sampling rate mel spectrogram tensor
+    :return: 정규화된 mel 텐서 (shape: [1, 240, 240])
+    """
+    if source_tensor.dim() == 1:
+        source_tensor = source_tensor.unsqueeze(0)
+    return compute_mel_batch(source_tensor[0:1])[0]
+
+
+def write_mel_tensor(mel, mic_idx, source_name, timestamp_str):
+    """
+    계산된 mel 텐서를 .pt 파일로 저장합니다 (디버그/보관용).
+
+    :param mel: 정규화된 mel 텐서 (shape: [1, 240, 240])
+    :param mic_idx: 마이크 인덱스
+    :param source_name: 분리된 부품 이름 (예: 'fan')
+    :param timestamp_str: 파일명에 들어갈 시각 (예: '2025-07-16_15-03-20')
+    :return: 저장된 파일 경로
+    """
+    # 저장 - 새로운 파일명 형식: 시간_마이크명_부품명.pt
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    filename = f"{timestamp_str}_mic_{mic_idx}_{source_name}.pt"
+    path = os.path.join(OUTPUT_FOLDER, filename)
+    torch.save(mel.clone(), path)  # 배치 텐서의 view일 수 있으므로 해당 부분만 저장
+    print(f"✅ 저장 완료: {path}")
+    
+    return path  # 파일 경로 반환
+
+
 def save_mel_tensor(source_tensor, mic_idx, source_name, timestamp_str, parts_to_save=None):
     """
     MelSpectrogram을 계산하고 .pt 텐서를 저장합니다.
@@ -20,46 +126,5 @@ def save_mel_tensor(source_tensor, mic_idx, source_name, timestamp_str, parts_to
     if parts_to_save is not None and source_name not in parts_to_save:
         return None
 
-    # ✅ 멀티채널일 경우 첫 번째 채널만 선택
-    if source_tensor.dim() == 2 and source_tensor.size(0) > 1:
-        source_tensor = source_tensor[0:1]  # [1, time] - 더 효율적
-
-    # 샘플링 주파수가 다르면 Resample
-    if SAMPLE_RATE != MEL_SAMPLE_RATE:
-        resampler = Resample(orig_freq=SAMPLE_RATE, new_freq=MEL_SAMPLE_RATE)
-        source_tensor = resampler(source_tensor)
-
-    # Mel 변환기
-    mel_transform = MelSpectrogram(
-        sample_rate=MEL_SAMPLE_RATE,
-        n_fft=1024,
-        hop_length=512,
-        n_mels=128,
-        power=2.0
-    )
-    db_transform = AmplitudeToDB(stype='power', top_db=80.0)
-
-    with torch.no_grad():
-        mel = mel_transform(source_tensor)           # [1, 128, time]
-        mel = db_transform(mel)                      # dB 변환
-        
-        # 한 번만 정규화 적용
-        mel = (mel - mel.mean()) / (mel.std() + 1e-9)  # z-score 정규화
-        
-        # 크기 조정
-        mel = torch.nn.functional.interpolate(
-            mel.unsqueeze(0), size=MEL_SIZE, mode='bilinear', align_corners=False
-        ).squeeze(0)                                 # [1, 240, 240]
-
-    # 패딩 및 크롭 (이미 정규화된 데이터에 대해)
-    mel = torch.nn.functional.pad(mel, (0, max(0, MEL_SIZE[1] - mel.shape[-1])))
-    mel = mel[:, :MEL_SIZE[0], :MEL_SIZE[1]]
-    
-    # 저장 - 새로운 파일명 형식: 시간_마이크명_부품명.pt
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-    filename = f"{timestamp_str}_mic_{mic_idx}_{source_name}.pt"
-    path = os.path.join(OUTPUT_FOLDER, filename)
-    torch.save(mel, path)
-    print(f"✅ 저장 완료: {path}")
-    
-    return path  # 파일 경로 반환
+    mel = compute_mel_tensor(source_tensor)
+    return write_mel_tensor(mel, mic_idx, source_name, timestamp_str)
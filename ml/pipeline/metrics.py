@@ -0,0 +1,201 @@
+# === metrics.py ===
+"""
+Prometheus 메트릭 정의 (/server/metrics에서 노출)
+
+히스토그램 관측은 락 한 번 + 버킷 증가 수준이라 운영 환경에서 켜 둔 채로 사용합니다.
+process 실행기(INFERENCE_EXECUTOR=process)에서는 PROMETHEUS_MULTIPROC_DIR를 설정하면
+워커 프로세스들의 메트릭을 합쳐서 노출합니다.
+"""
+import os
+import time
+import contextvars
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+
+# 10초 클립 기준: 디코딩/mel은 ms 단위, CPU Demucs 분리는 수 초~수십 초
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "audix_pipeline_stage_seconds",
+    "파이프라인 단계별 소요 시간 (decode, normalize, separation, mel, onnx)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+SEPARATION_BATCH_CLIPS = Histogram(
+    "audix_separation_batch_clips",
+    "Demucs 분리 호출 한 번에 들어간 클립 수",
+    buckets=(1, 2, 4, 8, 16, 32)
+)
+ONNX_INFERENCE_SECONDS = Histogram(
+    "audix_onnx_inference_seconds",
+    "부품별 ONNX 세션 실행 시간 (마이크로 배치 1회 기준)",
+    ["model"],
+    buckets=LATENCY_BUCKETS
+)
+ONNX_BATCH_SIZE = Histogram(
+    "audix_onnx_batch_size",
+    "ONNX 세션 실행 1회의 배치 크기",
+    ["model"],
+    buckets=(1, 2, 4, 8, 16, 32)
+)
+REDIS_WRITE_SECONDS = Histogram(
+    "audix_redis_write_seconds",
+    "Redis 쓰기 소요 시간 (write-behind flush 또는 직접 쓰기)",
+    ["op"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_TOTAL = Counter(
+    "audix_requests_total",
+    "분석 요청 수 (endpoint, status별)",
+    ["endpoint", "status"]
+)
+REQUEST_SECONDS = Histogram(
+    "audix_request_seconds",
+    "분석 요청 전체 소요 시간",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS
+)
+INFERENCE_PENDING = Gauge(
+    "audix_inference_pending",
+    "추론 실행기의 실행 중 + 대기 중 작업 수",
+    multiprocess_mode="livesum"
+)
+ONNX_BATCH_QUEUE = Gauge(
+    "audix_onnx_batch_queue",
+    "ONNX 마이크로 배처 대기열 길이",
+    ["model"],
+    multiprocess_mode="livesum"
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "audix_model_load_seconds",
+    "모델 로딩 시간",
+    ["model"],
+    multiprocess_mode="max"
+)
+
+
+# 요청 단위 단계별 시간 수집기 (collect_timings 안에서만 설정됨)
+_CURRENT_TIMINGS = contextvars.ContextVar("audix_stage_timings", default=None)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class StageTimings:
+    """
+    한 요청의 단계별 wall/CPU 시간과 부품별 ONNX 실행 시간을 모읍니다.
+
+    - wall_ms: 경과 시간
+    - cpu_ms: 요청을 처리한 스레드의 CPU 시간 (torch/ORT 내부 워커 스레드 제외)
+    - process_cpu_ms: 프로세스 전체 CPU 시간 (내부 워커 스레드 포함, 동시 요청의 CPU도 섞임)
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.onnx_parts = {}
+        self._seen_batches = set()
+        self._start = time.perf_counter()
+
+    def add_stage(self, stage, wall, cpu, process_cpu):
+        entry = self.stages.setdefault(stage, {"wall_ms": 0.0, "cpu_ms": 0.0, "process_cpu_ms": 0.0, "calls": 0})
+        entry["wall_ms"] = round(entry["wall_ms"] + _ms(wall), 2)
+        entry["cpu_ms"] = round(entry["cpu_ms"] + _ms(cpu), 2)
+        entry["process_cpu_ms"] = round(entry["process_cpu_ms"] + _ms(process_cpu), 2)
+        entry["calls"] += 1
+
+    def add_onnx_part(self, part_name, timing):
+        """
+        :param part_name: 부품명
+        :param timing: ONNX Future에 붙은 실행 정보 (run_ms, cpu_ms, queue_ms, batch_size, batch_id)
+        """
+        entry = self.onnx_parts.setdefault(part_name, {"run_ms": 0.0, "cpu_ms": 0.0, "queue_ms": 0.0,
+                                                       "batch_sizes": [], "calls": 0})
+        entry["queue_ms"] = round(entry["queue_ms"] + timing["queue_ms"], 2)
+        entry["calls"] += 1
+
+        # 이 요청의 여러 클립이 같은 마이크로 배치로 실행되었으면 세션 실행 시간은 한 번만 집계
+        batch_key = (part_name, timing["batch_id"])
+        if timing["batch_id"] is not None and batch_key in self._seen_batches:
+            return
+        self._seen_batches.add(batch_key)
+        entry["run_ms"] = round(entry["run_ms"] + timing["run_ms"], 2)
+        entry["cpu_ms"] = round(entry["cpu_ms"] + timing["cpu_ms"], 2)
+        entry["batch_sizes"].append(timing["batch_size"])
+
+    def as_dict(self, config=None):
+        result = {
+            "total_ms": _ms(time.perf_counter() - self._start),
+            "stages": self.stages,
+            "onnx_parts": self.onnx_parts
+        }
+        if config is not None:
+            result["config"] = config
+        return result
+
+
+@contextmanager
+def collect_timings():
+    """
+    이 블록 안에서 실행된 stage_timer / record_onnx_timing 결과를 StageTimings에 모읍니다.
+
+    :return: StageTimings
+    """
+    timings = StageTimings()
+    token = _CURRENT_TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _CURRENT_TIMINGS.reset(token)
+
+
+@contextmanager
+def stage_timer(stage):
+    """
+    파이프라인 단계 소요 시간을 audix_pipeline_stage_seconds 히스토그램에 기록합니다.
+    collect_timings 안이면 요청 단위 wall/CPU 시간도 함께 기록합니다.
+
+    :param stage: 단계 이름 (decode, normalize, separation, mel, onnx)
+    """
+    timings = _CURRENT_TIMINGS.get()
+    if timings is not None:
+        cpu_start, process_cpu_start = time.thread_time(), time.process_time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        PIPELINE_STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+        if timings is not None:
+            timings.add_stage(stage, elapsed, time.thread_time() - cpu_start, time.process_time() - process_cpu_start)
+
+
+def record_onnx_timing(part_name, future):
+    """
+    ONNX 추론 Future의 실행 정보를 현재 요청의 StageTimings에 기록합니다 (collect_timings 밖이면 무시).
+
+    :param part_name: 부품명
+    :param future: submit_mel_onnx가 반환한 완료된 Future
+    """
+    timings = _CURRENT_TIMINGS.get()
+    timing = getattr(future, "timing", None)
+    if timings is not None and timing is not None:
+        timings.add_onnx_part(part_name, timing)
+
+
+def render_metrics():
+    """
+    Prometheus 텍스트 형식의 메트릭을 생성합니다.
+
+    :return: (본문 bytes, Content-Type)
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
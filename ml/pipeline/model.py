@@ -1,46 +1,179 @@
+import os
 from demucs.htdemucs import HTDemucs
 import torch
-from demucs.apply import apply_model
-from .config import MODEL_PATH, DEVICE, SOURCES, FORCE_STEREO_INPUT
+from .config import (MODEL_PATH, MODEL_MMAP, MODEL_MMAP_PATH, DEVICE, SOURCES, FORCE_STEREO_INPUT, SEPARATION_PRECISION, SEPARATION_PROFILES,
+                     SEPARATION_PROFILE)
 from .resample import maybe_resample
+from .metrics import stage_timer, SEPARATION_BATCH_CLIPS
+from .separation_backend import get_separation_backend
 
-def load_model():
+SEPARATION_PRECISIONS = ("fp32", "int8_dynamic", "bf16")
+
+# 프리포크 런처(prefork.py)가 부모 프로세스에서 미리 로드한 모델 (fork된 워커가 copy-on-write로 공유)
+_PRELOADED_MODEL = None
+
+
+def cpu_supports_bf16():
+    """CPU가 bfloat16 연산을 하드웨어로 지원하는지 (AVX512-BF16 또는 AMX). 아니면 bf16은 에뮬레이션되어 느림"""
+    checks = ("_is_avx512_bf16_supported", "_is_amx_tile_supported")
+    return any(getattr(torch.cpu, check, lambda: False)() for check in checks)
+
+
+def apply_separation_precision(model, precision):
+    """
+    분리 정밀도를 모델에 적용합니다.
+    - int8_dynamic: Linear(트랜스포머 FFN 포함)/LSTM 가중치를 INT8로 바꾼 동적 양자화 모델을 반환
+    - bf16: 모델은 그대로 두고 분리 백엔드가 호출 시 bfloat16 autocast를 적용
+    선택한 정밀도는 model.separation_precision에 기록됩니다.
+    """
+    if precision not in SEPARATION_PRECISIONS:
+        raise ValueError(f"❌ 지원하지 않는 SEPARATION_PRECISION: {precision} ({', '.join(SEPARATION_PRECISIONS)})")
+
+    if precision == "int8_dynamic":
+        if DEVICE.type != "cpu":
+            print(f"⚠️ int8_dynamic은 CPU 전용입니다 ({DEVICE}), fp32로 실행")
+            precision = "fp32"
+        else:
+            # 어텐션의 out_proj는 NonDynamicallyQuantizableLinear라 제외됨 (in_proj는 Linear가 아님)
+            # inplace: 모델 전체를 deepcopy하지 않아야 양자화되지 않는 층이 메모리 매핑 가중치를 그대로 사용
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8,
+                                                           inplace=True)
+    elif precision == "bf16":
+        if DEVICE.type != "cpu":
+            print(f"⚠️ bf16 autocast는 CPU 노드용입니다 ({DEVICE}), fp32로 실행")
+            precision = "fp32"
+        elif not cpu_supports_bf16():
+            print("⚠️ CPU에 bfloat16 하드웨어 지원이 없어 fp32보다 느릴 수 있습니다 (precision_report로 확인)")
+
+    model.separation_precision = precision
+    return model
+
+
+def mmap_weights_path(model_path=MODEL_PATH, mmap_path=MODEL_MMAP_PATH, enabled=MODEL_MMAP):
+    """
+    사용할 메모리 매핑 가중치 파일 경로. 꺼져 있거나, 변환 파일이 없거나, 원본 체크포인트보다 오래됐으면 None.
+    """
+    if not enabled:
+        return None
+    if not os.path.exists(mmap_path):
+        print(f"💡 메모리 매핑 가중치 없음 ({mmap_path}): 원본 체크포인트 로드 "
+              f"(python -m ml.pipeline.convert_weights로 변환)")
+        return None
+    if os.path.exists(model_path) and os.path.getmtime(mmap_path) < os.path.getmtime(model_path):
+        print(f"⚠️ 원본보다 오래된 메모리 매핑 가중치 무시 (다시 변환 필요): {mmap_path}")
+        return None
+    return mmap_path
+
+
+def load_model(precision=SEPARATION_PRECISION):
     """
     모델을 로드하고 평가 모드로 설정합니다.
+    :param precision: 분리 정밀도 (fp32, int8_dynamic, bf16)
     :return: (model, sources) 튜플
     """
-    print(f"📦 모델 로드 중 (Device: {DEVICE})")
+    print(f"📦 모델 로드 중 (Device: {DEVICE}, 정밀도: {precision})")
     
     model = HTDemucs(sources=SOURCES)
 
-    state_dict = torch.load(MODEL_PATH, map_location=DEVICE, weights_only=False)
-    model.load_state_dict(state_dict, strict=False)
+    mmap_path = mmap_weights_path()
+    if mmap_path is not None:
+        # 파일을 읽어 복사하지 않고 매핑만 해 두고(페이지는 접근할 때 로드), assign으로 모듈 파라미터가
+        # 매핑된 텐서를 그대로 가리키게 함. int8_dynamic은 Linear/LSTM 가중치를 새로 만들므로 그 부분은 공유되지 않음
+        state_dict = torch.load(mmap_path, map_location="cpu", mmap=True, weights_only=True)
+        model.load_state_dict(state_dict, strict=False, assign=True)
+        print(f"🗺️ 메모리 매핑 가중치 로드: {mmap_path}")
+    else:
+        state_dict = torch.load(MODEL_PATH, map_location=DEVICE, weights_only=False)
+        model.load_state_dict(state_dict, strict=False)
 
     model.to(DEVICE)
     model.eval()
+    model = apply_separation_precision(model, precision)
+    model.weights_mmap = mmap_path is not None and DEVICE.type == "cpu"  # GPU로 옮기면 매핑은 로딩에만 사용됨
 
     sources = model.sources if hasattr(model, 'sources') else [f"source_{i}" for i in range(getattr(model, 'nb_sources', 2))]
     return model, sources
 
 
-def separate(model, audio_np):
+def preload_model():
     """
-    오디오 데이터를 모델에 입력하여 소스 분리를 수행합니다.
-    :param model: 로드된 모델
-    :param audio_np: 입력 오디오 데이터 (numpy 배열)
-    :return: 분리된 소스들 (torch.Tensor)
+    워커를 fork하기 전에 부모 프로세스에서 모델을 한 번 로드해 둡니다.
+    분리 백엔드(compile/torchscript)도 함께 준비해 워커가 물려받게 합니다.
+    :return: (model, sources) 튜플
     """
-    # numpy to tensor 및 차원 조정
-    audio = torch.from_numpy(audio_np).float().unsqueeze(0)  # (samples,) → (1, samples)
+    global _PRELOADED_MODEL
+
+    _PRELOADED_MODEL = load_model()
+    get_separation_backend(_PRELOADED_MODEL[0])
+    return _PRELOADED_MODEL
+
+
+def load_shared_model():
+    """preload_model로 미리 로드된 모델이 있으면 그것을, 없으면 새로 로드한 모델을 반환합니다."""
+    if _PRELOADED_MODEL is not None:
+        print("📦 부모 프로세스에서 로드된 모델 사용 (copy-on-write 공유)")
+        return _PRELOADED_MODEL
+    return load_model()
+
+
+def resolve_separation_profile(profile=None):
+    """
+    분리 프로필 이름을 확인합니다. None이면 서버 기본값(SEPARATION_PROFILE)을 사용합니다.
+    :return: 프로필 이름
+    """
+    profile = (profile or SEPARATION_PROFILE).lower()
+    if profile not in SEPARATION_PROFILES:
+        raise ValueError(f"❌ 지원하지 않는 분리 프로필: {profile} ({', '.join(SEPARATION_PROFILES)})")
+    return profile
+
+
+def prepare_separation_input(audio_batch):
+    """
+    모노 오디오 배치를 모델 입력으로 바꿉니다 (스테레오 복제, DEVICE 이동, 모델 샘플링 레이트로 리샘플링).
+    :param audio_batch: 모노 오디오 배치 (numpy 배열 리스트 또는 [B, samples] 배열/텐서)
+    :return: 모델 입력 텐서 (shape: [B, channels, samples])
+    """
+    if isinstance(audio_batch, torch.Tensor):
+        audio = audio_batch.float()
+    else:
+        audio = torch.stack([torch.as_tensor(clip) for clip in audio_batch]).float()  # (B, samples)
+
+    audio = audio.unsqueeze(1)  # (B, samples) → (B, 1, samples)
 
     if FORCE_STEREO_INPUT:  # 모델이 2채널을 요구하는 경우 복제
-        audio = audio.repeat(2, 1)  # (1, samples) → (2, samples)
+        audio = audio.repeat(1, 2, 1)  # (B, 1, samples) → (B, 2, samples)
+
+    audio = audio.to(DEVICE)
+
+    return maybe_resample(audio)
 
-    # (channels, samples) → (batch=1, channels, samples)
-    audio = audio.unsqueeze(0).to(DEVICE)
 
-    audio = maybe_resample(audio)
+def separate_batch(model, audio_batch, profile=None):
+    """
+    여러 클립을 한 번의 분리 백엔드 호출(SEPARATION_BACKEND)로 분리합니다.
+    모든 클립은 같은 길이여야 합니다 (load_wav_file이 10초로 맞춤).
+    :param model: 로드된 모델
+    :param audio_batch: 모노 오디오 배치 (numpy 배열 리스트 또는 [B, samples] 배열/텐서)
+    :param profile: 분리 프로필 (fast, balanced, accurate, None이면 SEPARATION_PROFILE)
+    :return: 분리된 소스들 (torch.Tensor, shape: [B, sources, channels, samples])
+    """
+    apply_kwargs = SEPARATION_PROFILES[resolve_separation_profile(profile)]
+    audio = prepare_separation_input(audio_batch)
 
-    with torch.no_grad():
-        sources = apply_model(model, audio, split=True, shifts=1, progress=False)[0]
-    return sources.cpu()
\ No newline at end of file
+    SEPARATION_BATCH_CLIPS.observe(audio.shape[0])
+    backend = get_separation_backend(model)
+    with stage_timer("separation"):
+        sources = backend(audio, **apply_kwargs)
+    return sources.cpu()
+
+
+def separate(model, audio_np, profile=None):
+    """
+    오디오 데이터를 모델에 입력하여 소스 분리를 수행합니다.
+    :param model: 로드된 모델
+    :param audio_np: 입력 오디오 데이터 (numpy 배열)
+    :param profile: 분리 프로필 (None이면 SEPARATION_PROFILE)
+    :return: 분리된 소스들 (torch.Tensor)
+    """
+    # (samples,) → (batch=1, samples)
+    return separate_batch(model, [audio_np], profile=profile)[0]
@@ -1,9 +1,194 @@
 import torch
 import numpy as np
-import onnxruntime as ort
 from datetime import datetime
+import threading
+import time
 import re
 import os
+from concurrent.futures import Future
+from .config import ONNX_MICRO_BATCHING, ONNX_BATCH_MAX_SIZE
+from .onnx_config import ONNX_IO_BINDING, ONNX_EXTERNAL_DATA, create_inference_session, use_int8_model
+from .onnx_batching import get_micro_batcher, reset_micro_batchers
+from .metrics import ONNX_INFERENCE_SECONDS, ONNX_BATCH_SIZE
+
+# 부품별 ONNX 세션 레지스트리 (모델 경로 → OnnxSession), 프로세스 전역에서 재사용
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+class OnnxSession:
+    """한 번 로드된 ONNX 세션과 입출력 메타데이터"""
+
+    def __init__(self, onnx_model_path):
+        self.model_path = onnx_model_path
+        self.session, self.optimized_cache_hit = create_inference_session(onnx_model_path)
+
+        model_input = self.session.get_inputs()[0]
+        model_output = self.session.get_outputs()[0]
+        self.input_name = model_input.name
+        self.output_name = model_output.name
+
+        # 입력 메타데이터 [N, C, H, W]에서 채널 수 읽기 (심볼릭 차원이면 1로 가정)
+        shape = model_input.shape
+        self.in_ch = shape[1] if len(shape) == 4 and isinstance(shape[1], int) else 1
+        # 배치 차원이 고정(int)이 아니면 여러 입력을 한 번에 추론할 수 있음
+        self.batch_dynamic = len(shape) > 0 and not isinstance(shape[0], int)
+
+        # IO binding: 배치 차원 외의 출력 차원이 고정이어야 출력 버퍼를 미리 할당할 수 있음
+        output_dims = model_output.shape[1:]
+        self.io_binding = ONNX_IO_BINDING and all(isinstance(dim, int) for dim in output_dims)
+        self._output_dims = tuple(output_dims)
+        self._buffers = threading.local()  # 호출 스레드별 입출력 버퍼 (마이크로 배처는 부품당 스레드 하나)
+
+        model_label = os.path.splitext(os.path.basename(onnx_model_path))[0]
+        self._latency = ONNX_INFERENCE_SECONDS.labels(model=model_label)
+        self._batch_size = ONNX_BATCH_SIZE.labels(model=model_label)
+
+    def run(self, x):
+        """
+        :param x: 입력 배열 (shape: [N, C, H, W], float32)
+        :return: 로짓 배열 (shape: [N])
+        """
+        self._batch_size.observe(len(x))
+        with self._latency.time():
+            if self.io_binding:
+                return self._run_with_io_binding(x)
+            outputs = self.session.run([self.output_name], {self.input_name: x})
+        return outputs[0].reshape(len(x), -1)[:, 0]
+
+    def _thread_buffers(self, batch_size, sample_shape):
+        """현재 스레드의 입출력 버퍼와 IOBinding (배치가 더 크거나 입력 모양이 바뀌면 다시 할당)"""
+        buffers = self._buffers
+        current = getattr(buffers, "input", None)
+        if current is None or current.shape[1:] != sample_shape or len(current) < batch_size:
+            capacity = max(batch_size, ONNX_BATCH_MAX_SIZE)
+            buffers.input = np.empty((capacity,) + tuple(sample_shape), dtype=np.float32)
+            buffers.output = np.empty((capacity,) + self._output_dims, dtype=np.float32)
+            buffers.binding = self.session.io_binding()
+        return buffers
+
+    def stack_inputs(self, samples):
+        """
+        입력들을 [N, C, H, W] 배열로 쌓습니다. IO binding이 켜져 있으면 바인딩할 버퍼에 바로 씁니다.
+
+        :param samples: [C, H, W] float32 배열 리스트
+        """
+        if not self.io_binding:
+            return np.stack(samples)
+        batch = self._thread_buffers(len(samples), samples[0].shape).input[:len(samples)]
+        for i, sample in enumerate(samples):
+            batch[i] = sample
+        return batch
+
+    def _run_with_io_binding(self, x):
+        n = len(x)
+        buffers = self._thread_buffers(n, x.shape[1:])
+        x_bound = buffers.input[:n]
+        if x.base is not buffers.input:  # stack_inputs로 만든 배열이면 복사 생략
+            np.copyto(x_bound, x)
+        out = buffers.output[:n]
+
+        binding = buffers.binding
+        binding.bind_input(self.input_name, "cpu", 0, np.float32, list(x_bound.shape), x_bound.ctypes.data)
+        binding.bind_output(self.output_name, "cpu", 0, np.float32, list(out.shape), out.ctypes.data)
+        self.session.run_with_iobinding(binding)
+        return out.reshape(n, -1)[:, 0].copy()  # 버퍼는 다음 호출에서 재사용
+
+
+def get_onnx_session(onnx_model_path):
+    """
+    ONNX 세션을 레지스트리에서 가져옵니다. 없으면 한 번만 로드합니다.
+
+    :param onnx_model_path: ONNX 모델 경로
+    :return: OnnxSession
+    """
+    key = os.path.abspath(onnx_model_path)
+    entry = _SESSIONS.get(key)
+    if entry is not None:
+        return entry
+
+    with _SESSIONS_LOCK:
+        entry = _SESSIONS.get(key)
+        if entry is None:
+            start_load = time.time()
+            entry = OnnxSession(onnx_model_path)
+            _SESSIONS[key] = entry
+            print(f"📦 ONNX 세션 로드: {os.path.basename(onnx_model_path)} "
+                  f"(in_ch={entry.in_ch}, 최적화 캐시 {'적중' if entry.optimized_cache_hit else '미스'}, "
+                  f"io_binding={entry.io_binding}, {(time.time() - start_load):.2f}초)")
+    return entry
+
+
+def reset_onnx_sessions():
+    """
+    fork된 자식 프로세스에서 호출: 부모에서 만든 세션(ORT 스레드 풀, 스레드별 IO binding 버퍼)은
+    fork 후 사용할 수 없으므로 레지스트리를 비웁니다. 이후 get_onnx_session이 자식에서 다시 로드합니다.
+    """
+    global _SESSIONS, _SESSIONS_LOCK
+    _SESSIONS = {}
+    _SESSIONS_LOCK = threading.Lock()
+    reset_micro_batchers()
+
+
+def quantized_model_path(onnx_model_path):
+    """FP32 모델 경로에 대응하는 INT8 모델 경로 (예: fold0_best_model_fan.int8.onnx)"""
+    return os.path.splitext(onnx_model_path)[0] + ".int8.onnx"
+
+
+def external_data_model_path(onnx_model_path):
+    """모델 경로에 대응하는 외부 데이터 모델 경로 (예: fold0_best_model_fan.ext.onnx + .ext.onnx.data)"""
+    return os.path.splitext(onnx_model_path)[0] + ".ext.onnx"
+
+
+def onnx_model_path_for_part(onnx_model_base_path, part_name, precision=None):
+    """
+    부품별 전용 ONNX 모델 경로를 반환합니다.
+
+    :param onnx_model_base_path: ONNX 모델들이 저장된 폴더 경로
+    :param part_name: 부품명
+    :param precision: "fp32" 또는 "int8" (None이면 ONNX_INT8_PARTS 설정을 따르고,
+        INT8 모델 파일이 없으면 FP32 사용. ONNX_EXTERNAL_DATA가 켜져 있으면 외부 데이터 모델 우선)
+    """
+    fp32_path = os.path.join(onnx_model_base_path, f"fold0_best_model_{part_name}.onnx")
+    if precision == "fp32":
+        return fp32_path
+    if precision == "int8":
+        return quantized_model_path(fp32_path)
+
+    model_path = fp32_path
+    if use_int8_model(part_name):
+        int8_path = quantized_model_path(fp32_path)
+        if os.path.exists(int8_path):
+            model_path = int8_path
+    if ONNX_EXTERNAL_DATA:
+        external_path = external_data_model_path(model_path)
+        # 원본보다 오래된 변환 파일은 사용하지 않음
+        if os.path.exists(external_path) and (not os.path.exists(model_path)
+                                              or os.path.getmtime(external_path) >= os.path.getmtime(model_path)):
+            return external_path
+    return model_path
+
+
+def preload_onnx_sessions(onnx_model_base_path, parts):
+    """
+    서버 시작 시 부품별 ONNX 세션을 미리 로드합니다.
+
+    :param onnx_model_base_path: ONNX 모델들이 저장된 폴더 경로
+    :param parts: 부품 이름 리스트
+    :return: 로드된 부품 이름 리스트
+    """
+    loaded_parts = []
+    for part_name in parts:
+        onnx_model_path = onnx_model_path_for_part(onnx_model_base_path, part_name)
+        if not os.path.exists(onnx_model_path):
+            print(f"⚠️ {part_name} ONNX 모델 없음: {onnx_model_path}")
+            continue
+        if use_int8_model(part_name) and ".int8." not in os.path.basename(onnx_model_path):
+            int8_path = onnx_model_path_for_part(onnx_model_base_path, part_name, precision="int8")
+            print(f"⚠️ {part_name} INT8 모델 없음, FP32 사용: {int8_path} (python -m ml.pipeline.quantize로 생성)")
+        get_onnx_session(onnx_model_path)
+        loaded_parts.append(part_name)
+    return loaded_parts
 
 # def extract_datetime_from_filename(filename):
 #     """
@@ -17,36 +202,90 @@ import os
 #         # fallback: 현재 시간
 #         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-def predict_single_file_onnx_json(onnx_model_path, pt_file_path, device_name="unknown_device", in_ch=1, threshold=0.5):
-    # 1. ONNX 세션 생성
-    session = ort.InferenceSession(onnx_model_path, providers=['CPUExecutionProvider'])
-    input_name = session.get_inputs()[0].name
-    output_name = session.get_outputs()[0].name
+def mel_to_onnx_input(mel, in_ch):
+    """
+    mel 텐서를 분류 모델 입력 배열로 변환합니다.
 
-    # 2. .pt 파일 로드 및 전처리
-    x = torch.load(pt_file_path).float()
+    :param mel: mel 텐서 (shape: [H, W] 또는 [C, H, W])
+    :param in_ch: 모델 입력 채널 수 (채널이 다르면 복제)
+    :return: float32 배열 (shape: [in_ch, H, W])
+    """
+    x = mel.float()
     if x.ndim == 2:
         x = x.unsqueeze(0)
     if x.shape[0] != in_ch:
         x = x.repeat(in_ch, 1, 1)
 
-    x = x.unsqueeze(0).numpy().astype(np.float32)  # [1, C, H, W]
+    return x.numpy().astype(np.float32, copy=False)
 
-    # 3. ONNX 추론
-    outputs = session.run([output_name], {input_name: x})
-    logit = outputs[0][0][0]  # scalar
-    prob = float(1 / (1 + np.exp(-logit)))  # sigmoid
 
-    # 4. 파일명에서 datetime 추출
-    filename = os.path.basename(pt_file_path)
-    # created_at = extract_datetime_from_filename(filename)
+def submit_mel_onnx(onnx_model_path, mel, in_ch=None):
+    """
+    mel 텐서의 ONNX 추론을 제출합니다. 마이크로 배칭이 켜져 있으면 같은 부품의
+    동시 요청들과 한 번의 배치로 실행됩니다.
+
+    :param onnx_model_path: ONNX 모델 경로
+    :param mel: mel 텐서 (shape: [H, W] 또는 [C, H, W])
+    :param in_ch: 입력 채널 수 (None이면 모델 메타데이터 사용)
+    :return: 로짓(float)을 돌려주는 Future
+    """
+    # 1. ONNX 세션 가져오기 (레지스트리에서 재사용)
+    entry = get_onnx_session(onnx_model_path)
+    if in_ch is None:
+        in_ch = entry.in_ch
 
-    # 5. 결과 JSON 구성
-    result_json = {
+    # 2. 전처리
+    x = mel_to_onnx_input(mel, in_ch)  # [C, H, W]
+
+    # 3. ONNX 추론 (배치 또는 단건)
+    if ONNX_MICRO_BATCHING and entry.batch_dynamic:
+        return get_micro_batcher(entry).submit(x)
+
+    future = Future()
+    try:
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        logit = float(entry.run(x[np.newaxis])[0])  # [1, C, H, W]
+        future.timing = {
+            "run_ms": round((time.perf_counter() - start) * 1000, 2),
+            "cpu_ms": round((time.thread_time() - cpu_start) * 1000, 2),
+            "queue_ms": 0.0,
+            "batch_size": 1,
+            "batch_id": None
+        }
+        future.set_result(logit)
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def logit_to_result_json(logit, device_name="unknown_device", threshold=0.5):
+    """로짓을 sigmoid 확률과 판정 결과 JSON으로 변환합니다."""
+    prob = float(1 / (1 + np.exp(-logit)))  # sigmoid
+
+    return {
         "device_name": device_name,
         "result": prob >= threshold,
         "probability": round(prob, 3)
-        # "created_at": created_at
     }
 
-    return result_json
+
+def predict_mel_onnx_json(onnx_model_path, mel, device_name="unknown_device", in_ch=None, threshold=0.5):
+    """
+    메모리의 mel 텐서를 ONNX 모델로 분류합니다.
+
+    :param onnx_model_path: ONNX 모델 경로
+    :param mel: mel 텐서 (shape: [H, W] 또는 [C, H, W])
+    :param device_name: 장치명
+    :param in_ch: 입력 채널 수 (None이면 모델 메타데이터 사용)
+    :param threshold: 이상 판정 임계값
+    :return: 분류 결과 JSON
+    """
+    logit = submit_mel_onnx(onnx_model_path, mel, in_ch=in_ch).result()
+    return logit_to_result_json(logit, device_name=device_name, threshold=threshold)
+
+
+def predict_single_file_onnx_json(onnx_model_path, pt_file_path, device_name="unknown_device", in_ch=None, threshold=0.5):
+    """저장된 .pt mel 파일을 로드해 ONNX 모델로 분류합니다."""
+    # created_at = extract_datetime_from_filename(os.path.basename(pt_file_path))
+    mel = torch.load(pt_file_path)
+    return predict_mel_onnx_json(onnx_model_path, mel, device_name=device_name, in_ch=in_ch, threshold=threshold)
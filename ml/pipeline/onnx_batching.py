@@ -0,0 +1,142 @@
+# === onnx_batching.py ===
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .config import ONNX_BATCH_MAX_SIZE, ONNX_BATCH_MAX_WAIT_MS
+from .metrics import ONNX_BATCH_QUEUE
+
+# 모델 경로 → MicroBatcher (부품별로 하나의 배치 스레드)
+_BATCHERS = {}
+_BATCHERS_LOCK = threading.Lock()
+
+
+class MicroBatcher:
+    """
+    같은 부품(같은 ONNX 세션)에 대한 동시 요청들의 입력을 모아 한 번의 배치 추론으로 실행합니다.
+    최대 배치 크기에 도달하거나 첫 입력 이후 최대 대기 시간이 지나면 배치를 실행합니다.
+    """
+
+    def __init__(self, session, max_batch_size=ONNX_BATCH_MAX_SIZE, max_wait_ms=ONNX_BATCH_MAX_WAIT_MS):
+        """
+        :param session: OnnxSession (배치 차원이 동적이어야 함)
+        :param max_batch_size: 최대 배치 크기
+        :param max_wait_ms: 배치를 모으는 최대 대기 시간 (ms)
+        """
+        self.session = session
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._batches = 0
+        self._items = 0
+        self._queue_gauge = ONNX_BATCH_QUEUE.labels(model=os.path.splitext(os.path.basename(session.model_path))[0])
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"onnx-batcher-{session.model_path}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, x):
+        """
+        :param x: 단일 입력 (shape: [C, H, W], float32)
+        :return: 로짓(float)을 돌려주는 Future
+        """
+        future = Future()
+        self._queue_gauge.inc()
+        self._queue.put((x, future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        """첫 입력을 기다린 뒤 최대 대기 시간 동안 배치를 모읍니다."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())  # 이미 도착한 입력은 함께 처리
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._queue_gauge.dec(len(batch))
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                start, cpu_start = time.perf_counter(), time.thread_time()
+                logits = self.session.run(self.session.stack_inputs([x for x, _, _ in batch]))  # [N, C, H, W] → [N]
+                run_ms = round((time.perf_counter() - start) * 1000, 2)
+                cpu_ms = round((time.thread_time() - cpu_start) * 1000, 2)
+                for (_, future, submitted_at), logit in zip(batch, logits):
+                    # 요청 단위 시간 분석용 (metrics.record_onnx_timing)
+                    future.timing = {
+                        "run_ms": run_ms,
+                        "cpu_ms": cpu_ms,
+                        "queue_ms": round((start - submitted_at) * 1000, 2),
+                        "batch_size": len(batch),
+                        "batch_id": self._batches
+                    }
+                    future.set_result(float(logit))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+            self._batches += 1
+            self._items += len(batch)
+
+    def get_status(self):
+        """배치 통계를 반환합니다."""
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "queued": self._queue.qsize()
+        }
+
+
+def get_micro_batcher(session):
+    """
+    세션에 대한 MicroBatcher를 반환합니다. 없으면 한 번만 생성합니다.
+
+    :param session: OnnxSession
+    :return: MicroBatcher
+    """
+    batcher = _BATCHERS.get(session.model_path)
+    if batcher is not None:
+        return batcher
+
+    with _BATCHERS_LOCK:
+        batcher = _BATCHERS.get(session.model_path)
+        if batcher is None:
+            batcher = MicroBatcher(session)
+            _BATCHERS[session.model_path] = batcher
+            print(f"📦 ONNX 마이크로 배처 생성: {session.model_path} "
+                  f"(최대 배치: {batcher.max_batch_size}, 최대 대기: {batcher.max_wait * 1000:.1f}ms)")
+    return batcher
+
+
+def reset_micro_batchers():
+    """
+    fork된 자식 프로세스에서 호출: 부모의 배치 스레드는 자식에 없으므로 레지스트리를 비웁니다.
+    (fork 시점에 다른 스레드가 잡고 있던 락도 새로 만듦)
+    """
+    global _BATCHERS, _BATCHERS_LOCK
+    _BATCHERS = {}
+    _BATCHERS_LOCK = threading.Lock()
+
+
+def get_batching_status():
+    """모든 마이크로 배처의 통계를 반환합니다."""
+    return {path: batcher.get_status() for path, batcher in _BATCHERS.items()}
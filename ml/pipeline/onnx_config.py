@@ -0,0 +1,186 @@
+# === onnx_config.py ===
+"""
+ONNX Runtime 세션 설정 (.env에서 읽기)
+
+- 그래프 최적화 수준, intra/inter-op 스레드 수, 실행 모드, 메모리 arena/pattern
+- IO binding: 부품 세션마다 (호출 스레드별) 미리 할당한 입출력 버퍼에 바인딩해 실행
+- 최적화 모델 디스크 캐시: 첫 로드 때 ORT가 최적화한 그래프를 저장해 두고,
+  다음 시작부터는 저장된 모델을 그래프 최적화 없이 바로 로드
+- INT8 모델 선택: ONNX_INT8_PARTS에 있는 부품은 ml.pipeline.quantize로 만든 *.int8.onnx 사용
+- 외부 데이터 모델: ONNX_EXTERNAL_DATA가 켜져 있으면 ml.pipeline.convert_weights로 만든 *.ext.onnx
+  (그래프 + 페이지 정렬된 가중치 파일)를 사용해 가중치를 메모리 매핑으로 로드
+"""
+import os
+import shutil
+import hashlib
+import platform
+
+import onnxruntime as ort
+
+ONNX_PROVIDERS = [p.strip() for p in os.getenv("ONNX_PROVIDERS", "CPUExecutionProvider").split(",") if p.strip()]
+ONNX_GRAPH_OPTIMIZATION = os.getenv("ONNX_GRAPH_OPTIMIZATION", "all").lower()       # disable | basic | extended | all
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))                # 0이면 ORT 기본값 (물리 코어 수)
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "0"))                # parallel 모드에서만 사용
+ONNX_EXECUTION_MODE = os.getenv("ONNX_EXECUTION_MODE", "sequential").lower()        # sequential | parallel
+ONNX_ALLOW_SPINNING = os.getenv("ONNX_ALLOW_SPINNING", "true").lower() == "true"    # false면 유휴 스레드가 바로 잠듦 (torch와 CPU 경합 완화)
+ONNX_CPU_MEM_ARENA = os.getenv("ONNX_CPU_MEM_ARENA", "true").lower() == "true"
+ONNX_MEM_PATTERN = os.getenv("ONNX_MEM_PATTERN", "true").lower() == "true"
+ONNX_IO_BINDING = os.getenv("ONNX_IO_BINDING", "true").lower() == "true"
+ONNX_OPTIMIZED_MODEL_CACHE = os.getenv("ONNX_OPTIMIZED_MODEL_CACHE", "true").lower() == "true"
+ONNX_OPTIMIZED_MODEL_DIR = os.getenv("ONNX_OPTIMIZED_MODEL_DIR", "")                # 빈 값이면 모델 폴더의 .ort_cache
+# INT8 양자화 모델을 사용할 부품 (콤마로 구분, all이면 전체, 빈 값이면 사용 안 함)
+ONNX_INT8_PARTS = [p.strip() for p in os.getenv("ONNX_INT8_PARTS", "").split(",") if p.strip()]
+ONNX_EXTERNAL_DATA = os.getenv("ONNX_EXTERNAL_DATA", "true").lower() == "true"     # *.ext.onnx가 있으면 사용
+# 최적화 모델 캐시를 저장할 때 이 크기 이상의 initializer는 외부 데이터 파일로 분리
+ONNX_EXTERNAL_DATA_MIN_BYTES = 1024
+
+_GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+}
+_EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL
+}
+
+
+def build_session_options(graph_optimization=ONNX_GRAPH_OPTIMIZATION):
+    """
+    .env 설정으로 SessionOptions를 만듭니다.
+
+    :param graph_optimization: 그래프 최적화 수준 (disable, basic, extended, all)
+    :return: ort.SessionOptions
+    """
+    if graph_optimization not in _GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"❌ 지원하지 않는 ONNX_GRAPH_OPTIMIZATION: {graph_optimization} "
+                         f"({', '.join(_GRAPH_OPTIMIZATION_LEVELS)})")
+    if ONNX_EXECUTION_MODE not in _EXECUTION_MODES:
+        raise ValueError(f"❌ 지원하지 않는 ONNX_EXECUTION_MODE: {ONNX_EXECUTION_MODE} (sequential 또는 parallel)")
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = _GRAPH_OPTIMIZATION_LEVELS[graph_optimization]
+    options.execution_mode = _EXECUTION_MODES[ONNX_EXECUTION_MODE]
+    options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+    options.inter_op_num_threads = ONNX_INTER_OP_THREADS
+    options.enable_cpu_mem_arena = ONNX_CPU_MEM_ARENA
+    options.enable_mem_pattern = ONNX_MEM_PATTERN
+    options.add_session_config_entry("session.intra_op.allow_spinning", "1" if ONNX_ALLOW_SPINNING else "0")
+    return options
+
+
+def optimized_model_path(onnx_model_path):
+    """
+    최적화 모델 캐시 경로. 원본 모델(크기/수정 시각), 최적화 수준, ORT 버전, CPU 아키텍처가
+    바뀌면 경로도 바뀌므로 오래된 캐시를 잘못 로드하지 않습니다.
+    """
+    stat = os.stat(onnx_model_path)
+    digest = hashlib.sha1(
+        f"{stat.st_size}:{stat.st_mtime_ns}:{ONNX_GRAPH_OPTIMIZATION}:{ort.__version__}:{platform.machine()}".encode()
+    ).hexdigest()[:12]
+    cache_dir = ONNX_OPTIMIZED_MODEL_DIR or os.path.join(os.path.dirname(onnx_model_path), ".ort_cache")
+    stem = os.path.splitext(os.path.basename(onnx_model_path))[0]
+    return os.path.join(cache_dir, f"{stem}.{ONNX_GRAPH_OPTIMIZATION}.{digest}.onnx")
+
+
+def create_inference_session(onnx_model_path):
+    """
+    설정을 적용해 InferenceSession을 만듭니다. 최적화 모델 캐시가 켜져 있으면
+    캐시된 모델을 그래프 최적화 없이 로드하고, 없으면 최적화하면서 캐시를 씁니다.
+
+    :param onnx_model_path: 원본 ONNX 모델 경로
+    :return: (ort.InferenceSession, 캐시 적중 여부)
+    """
+    if not ONNX_OPTIMIZED_MODEL_CACHE or ONNX_GRAPH_OPTIMIZATION == "disable":
+        return ort.InferenceSession(onnx_model_path, sess_options=build_session_options(),
+                                    providers=ONNX_PROVIDERS), False
+
+    cached_path = optimized_model_path(onnx_model_path)
+    if os.path.exists(cached_path):
+        try:
+            session = ort.InferenceSession(cached_path, sess_options=build_session_options("disable"),
+                                           providers=ONNX_PROVIDERS)
+            return session, True
+        except Exception as e:
+            print(f"⚠️ 최적화 모델 캐시 로드 실패, 원본에서 다시 최적화: {cached_path} ({e})")
+
+    options = build_session_options()
+    # 다른 워커가 읽는 중에 덮어쓰지 않도록 pid별 임시 폴더에 쓴 뒤 교체
+    # (외부 데이터 파일명은 모델 파일 기준 상대 경로로 모델 안에 기록되므로, 임시 폴더에서도 최종 이름으로 씀)
+    data_name = f"{os.path.basename(cached_path)}.data"
+    tmp_dir = f"{cached_path}.{os.getpid()}.tmp"
+    tmp_path = os.path.join(tmp_dir, os.path.basename(cached_path))
+    external_data = uses_external_data(onnx_model_path)
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        options.optimized_model_filepath = tmp_path
+        if external_data:
+            # 캐시 모델도 가중치를 인라인하지 않아야 메모리 매핑으로 로드됨
+            options.add_session_config_entry("session.optimized_model_external_initializers_file_name", data_name)
+            options.add_session_config_entry("session.optimized_model_external_initializers_min_size_in_bytes",
+                                             str(ONNX_EXTERNAL_DATA_MIN_BYTES))
+    except OSError as e:
+        print(f"⚠️ 최적화 모델 캐시 폴더를 만들 수 없음 (캐시 없이 진행): {e}")
+        tmp_path = None
+
+    session = ort.InferenceSession(onnx_model_path, sess_options=options, providers=ONNX_PROVIDERS)
+    if tmp_path is not None:
+        try:
+            if os.path.exists(tmp_path):
+                # 데이터 파일을 먼저 교체해야 캐시 모델이 항상 완성된 데이터를 가리킴
+                tmp_data_path = os.path.join(tmp_dir, data_name)
+                if os.path.exists(tmp_data_path):
+                    os.replace(tmp_data_path, os.path.join(os.path.dirname(cached_path), data_name))
+                os.replace(tmp_path, cached_path)
+                print(f"💾 최적화 모델 캐시 저장: {cached_path}")
+                remove_stale_optimized_models(cached_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return session, False
+
+
+def remove_stale_optimized_models(cached_path):
+    """
+    같은 모델/최적화 수준의 이전 캐시 키(원본 모델이나 ORT 버전이 바뀌기 전)의 캐시 모델과 외부 데이터 파일을 지웁니다.
+    이미 매핑해 쓰고 있는 워커는 파일이 지워져도 영향을 받지 않습니다.
+    """
+    cache_dir, current = os.path.split(cached_path)
+    prefix = current[:current.rindex(".", 0, current.rindex("."))] + "."  # "{stem}.{수준}."
+    for name in os.listdir(cache_dir):
+        if not name.startswith(prefix) or name in (current, f"{current}.data"):
+            continue
+        if name.endswith(".onnx") or name.endswith(".data"):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+                print(f"🧹 오래된 최적화 모델 캐시 삭제: {name}")
+            except OSError:
+                pass
+
+
+def uses_external_data(onnx_model_path):
+    """ml.pipeline.convert_weights로 만든 외부 데이터 모델(*.ext.onnx)인지"""
+    return onnx_model_path.endswith(".ext.onnx")
+
+
+def use_int8_model(part_name):
+    """ONNX_INT8_PARTS 설정상 이 부품에 INT8 모델을 사용해야 하는지"""
+    return "all" in ONNX_INT8_PARTS or part_name in ONNX_INT8_PARTS
+
+
+def get_onnx_runtime_settings():
+    """적용 중인 ONNX Runtime 설정 (상태/시간 분석 응답용)"""
+    return {
+        "providers": ONNX_PROVIDERS,
+        "graph_optimization": ONNX_GRAPH_OPTIMIZATION,
+        "intra_op_threads": ONNX_INTRA_OP_THREADS,
+        "inter_op_threads": ONNX_INTER_OP_THREADS,
+        "execution_mode": ONNX_EXECUTION_MODE,
+        "allow_spinning": ONNX_ALLOW_SPINNING,
+        "cpu_mem_arena": ONNX_CPU_MEM_ARENA,
+        "mem_pattern": ONNX_MEM_PATTERN,
+        "io_binding": ONNX_IO_BINDING,
+        "optimized_model_cache": ONNX_OPTIMIZED_MODEL_CACHE,
+        "int8_parts": ONNX_INT8_PARTS,
+        "external_data": ONNX_EXTERNAL_DATA
+    }
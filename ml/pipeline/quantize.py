@@ -0,0 +1,151 @@
+# === quantize.py ===
+"""
+부품별 ONNX 분류 모델(fold0_best_model_{part}.onnx)의 INT8 양자화 모델을 만듭니다.
+결과는 같은 폴더의 fold0_best_model_{part}.int8.onnx로 저장되며,
+ONNX_INT8_PARTS에 부품을 지정하면 서버가 INT8 모델을 사용합니다.
+
+- dynamic: 가중치만 INT8로 저장, 활성값 스케일은 실행 중 계산 (보정 데이터 불필요)
+- static: 보정(calibration) mel로 활성값 범위를 미리 구해 QDQ 형식으로 저장 (CNN에서 더 빠름)
+  보정 mel은 save_mel_tensor가 저장한 .pt 파일(SAVE_MEL_PT=true일 때 output/의 *_{part}.pt)을 사용
+
+실행 (프로젝트 루트에서):
+    python -m ml.pipeline.quantize --mode dynamic
+    python -m ml.pipeline.quantize --mode static --calibration-dir output --parts fan,pump
+"""
+import os
+import glob
+import argparse
+import tempfile
+
+import torch
+from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType,
+                                      quantize_dynamic, quantize_static)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+from .config import SOURCES
+from .onnx import OnnxSession, mel_to_onnx_input, onnx_model_path_for_part, quantized_model_path
+
+_CALIBRATION_METHODS = {
+    "minmax": CalibrationMethod.MinMax,
+    "entropy": CalibrationMethod.Entropy,
+    "percentile": CalibrationMethod.Percentile
+}
+
+
+class MelCalibrationReader(CalibrationDataReader):
+    """save_mel_tensor가 저장한 부품별 mel .pt 파일을 정적 양자화 보정 입력으로 제공합니다."""
+
+    def __init__(self, pt_paths, input_name, in_ch):
+        self._pt_paths = iter(pt_paths)
+        self._input_name = input_name
+        self._in_ch = in_ch
+
+    def get_next(self):
+        pt_path = next(self._pt_paths, None)
+        if pt_path is None:
+            return None
+        mel = torch.load(pt_path)
+        return {self._input_name: mel_to_onnx_input(mel, self._in_ch)[None]}  # [1, C, H, W]
+
+
+def find_calibration_mels(calibration_dir, part_name, max_samples):
+    """보정 폴더에서 해당 부품의 mel .pt 파일들을 찾습니다 (파일명: 시간_mic_N_{part}.pt)."""
+    pt_paths = sorted(glob.glob(os.path.join(calibration_dir, "**", f"*_{part_name}.pt"), recursive=True))
+    return pt_paths[:max_samples]
+
+
+def preprocess_for_quantization(onnx_model_path, output_path):
+    """
+    양자화 전처리 (shape 추론 + 그래프 정리). 실패하면 원본 경로를 그대로 반환합니다.
+    """
+    try:
+        quant_pre_process(onnx_model_path, output_path)
+        return output_path
+    except Exception as e:
+        print(f"⚠️ 양자화 전처리 생략 ({os.path.basename(onnx_model_path)}): {e}")
+        return onnx_model_path
+
+
+def quantize_part_model(onnx_model_path, mode="dynamic", calibration_dir=None, part_name=None,
+                        max_calibration_samples=200, calibration_method="minmax", per_channel=True):
+    """
+    부품 모델 하나를 INT8로 양자화합니다.
+
+    :param onnx_model_path: FP32 ONNX 모델 경로
+    :param mode: "dynamic" 또는 "static"
+    :param calibration_dir: static 모드의 보정 mel(.pt) 폴더
+    :param part_name: 보정 mel을 찾을 부품명
+    :param max_calibration_samples: 사용할 최대 보정 mel 수
+    :param calibration_method: minmax, entropy, percentile
+    :param per_channel: 채널별 가중치 양자화 여부
+    :return: 저장된 INT8 모델 경로
+    """
+    output_path = quantized_model_path(onnx_model_path)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_input = preprocess_for_quantization(onnx_model_path, os.path.join(tmp_dir, "preprocessed.onnx"))
+
+        if mode == "dynamic":
+            quantize_dynamic(model_input, output_path, weight_type=QuantType.QInt8, per_channel=per_channel)
+        elif mode == "static":
+            if calibration_method not in _CALIBRATION_METHODS:
+                raise ValueError(f"❌ 지원하지 않는 보정 방식: {calibration_method} ({', '.join(_CALIBRATION_METHODS)})")
+            pt_paths = find_calibration_mels(calibration_dir, part_name, max_calibration_samples)
+            if not pt_paths:
+                raise FileNotFoundError(f"❌ {calibration_dir}에 {part_name} 보정 mel(*_{part_name}.pt)이 없습니다. "
+                                        f"SAVE_MEL_PT=true로 분석을 실행해 생성하세요.")
+            print(f"📐 {part_name} 보정 mel {len(pt_paths)}개 사용")
+
+            session = OnnxSession(onnx_model_path)
+            reader = MelCalibrationReader(pt_paths, session.input_name, session.in_ch)
+            quantize_static(
+                model_input, output_path, reader,
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=per_channel,
+                calibrate_method=_CALIBRATION_METHODS[calibration_method]
+            )
+        else:
+            raise ValueError(f"❌ 지원하지 않는 양자화 방식: {mode} (dynamic 또는 static)")
+
+    fp32_size = os.path.getsize(onnx_model_path)
+    int8_size = os.path.getsize(output_path)
+    print(f"✅ INT8 모델 저장: {output_path} ({fp32_size / 1e6:.1f}MB → {int8_size / 1e6:.1f}MB)")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="부품별 ONNX 분류 모델 INT8 양자화")
+    parser.add_argument("--onnx-dir", default="ml/models/onnx", help="FP32 ONNX 모델 폴더")
+    parser.add_argument("--parts", default=None, help="양자화할 부품들 (콤마로 구분, 빈 값이면 noise 제외 전체)")
+    parser.add_argument("--mode", choices=["dynamic", "static"], default="dynamic", help="양자화 방식")
+    parser.add_argument("--calibration-dir", default="output", help="static 모드 보정 mel(.pt) 폴더")
+    parser.add_argument("--max-calibration-samples", type=int, default=200, help="부품당 최대 보정 mel 수")
+    parser.add_argument("--calibration-method", default="minmax", help="minmax, entropy, percentile")
+    parser.add_argument("--per-tensor", action="store_true", help="채널별 대신 텐서 단위 가중치 양자화")
+    args = parser.parse_args()
+
+    parts = args.parts.split(",") if args.parts else [src for src in SOURCES if src.lower() != "noise"]
+    for part_name in parts:
+        onnx_model_path = onnx_model_path_for_part(args.onnx_dir, part_name, precision="fp32")
+        if not os.path.exists(onnx_model_path):
+            print(f"⚠️ {part_name} ONNX 모델 없음: {onnx_model_path}")
+            continue
+        print(f"\n🔧 {part_name} 양자화 ({args.mode})")
+        quantize_part_model(
+            onnx_model_path,
+            mode=args.mode,
+            calibration_dir=args.calibration_dir,
+            part_name=part_name,
+            max_calibration_samples=args.max_calibration_samples,
+            calibration_method=args.calibration_method,
+            per_channel=not args.per_tensor
+        )
+
+    print("\n💡 서버에서 사용하려면 .env에 ONNX_INT8_PARTS=all (또는 부품 목록)을 설정하세요.")
+    print("💡 정확도/지연 비교: python -m benchmarks.quantization_report --wav-dir test_wav")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# === separation_backend.py ===
+"""
+Demucs 분리 백엔드 (SEPARATION_BACKEND로 선택)
+
+- eager: 기존 방식 (HTDemucs 모듈 + demucs.apply.apply_model)
+- compile: torch.compile로 컴파일한 모델을 apply_model에 넣음
+  (첫 호출 시 입력 모양별로 컴파일되므로 warmup 권장)
+- torchscript: export_separation으로 미리 trace해 둔 모델 (배치 크기별 파일)
+  apply_model이 자르는 청크 모양이 trace 모양과 다르면 그 청크만 eager로 실행
+
+어느 백엔드든 청크 분할/shift/overlap은 apply_model이 그대로 처리하고,
+모델 호출(model(chunk))만 바뀝니다.
+정밀도(SEPARATION_PRECISION)는 load_model이 model.separation_precision에 기록하며,
+bf16이면 백엔드 호출을 CPU bfloat16 autocast 안에서 실행합니다 (torchscript는 trace 당시 정밀도로 고정).
+
+ONNX Runtime 백엔드는 제공하지 않습니다: HTDemucs는 forward 안에서 iSTFT를 쓰는데
+ONNX에는 iSTFT 연산자가 없어 fixed 10초 그래프도 export되지 않습니다.
+"""
+import os
+import glob
+import re
+import threading
+import contextlib
+
+import torch
+from demucs.apply import apply_model
+
+from .config import (MODEL_PATH, DEVICE, SEPARATION_BACKEND, SEPARATION_COMPILE_MODE,
+                     SEPARATION_TORCHSCRIPT_DIR)
+
+# separate_batch의 기존 apply_model 인자
+DEFAULT_APPLY_KWARGS = {"split": True, "shifts": 1, "overlap": 0.25}
+
+
+class EagerBackend:
+    """HTDemucs 모듈을 그대로 실행하는 기본 백엔드"""
+
+    name = "eager"
+
+    def __init__(self, model):
+        self.model = model
+
+    @property
+    def precision(self):
+        return getattr(self.model, "separation_precision", "fp32")
+
+    def _runnable(self):
+        """apply_model에 넘길 모델 (samplerate, segment, sources, valid_length 등을 제공해야 함)"""
+        return self.model
+
+    def _precision_context(self):
+        if self.precision == "bf16":
+            return torch.autocast("cpu", dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
+    def __call__(self, audio, **apply_kwargs):
+        """
+        :param audio: 모델 샘플링 레이트의 입력 (shape: [B, channels, samples])
+        :param apply_kwargs: apply_model 인자 (split, shifts, overlap, segment)
+        :return: 분리된 소스들 (shape: [B, sources, channels, samples], float32)
+        """
+        kwargs = {**DEFAULT_APPLY_KWARGS, **apply_kwargs}
+        with torch.no_grad(), self._precision_context():
+            sources = apply_model(self._runnable(), audio, progress=False, **kwargs)
+        return sources.float()
+
+    def get_status(self):
+        return {"backend": self.name, "precision": self.precision,
+                "weights_mmap": getattr(self.model, "weights_mmap", False)}
+
+
+class CompiledBackend(EagerBackend):
+    """torch.compile로 컴파일한 HTDemucs (OptimizedModule은 원본 모듈의 속성을 그대로 노출)"""
+
+    name = "compile"
+
+    def __init__(self, model, mode=SEPARATION_COMPILE_MODE):
+        super().__init__(model)
+        self.mode = mode
+        self.compiled = torch.compile(model, mode=mode, dynamic=False)
+
+    def _runnable(self):
+        return self.compiled
+
+    def get_status(self):
+        return {**super().get_status(), "mode": self.mode}
+
+
+class _TracedHTDemucs:
+    """
+    trace된 HTDemucs들을 apply_model이 쓰는 모델처럼 보이게 하는 래퍼.
+    입력 모양이 같은 trace 모델이 있으면 그것을, 없으면 eager 모델을 호출합니다.
+    """
+
+    def __init__(self, model, traced_by_shape):
+        self.model = model
+        self.traced_by_shape = traced_by_shape  # {(B, channels, samples): ScriptModule}
+        self.samplerate = model.samplerate
+        self.segment = model.segment
+        self.sources = model.sources
+        self.audio_channels = model.audio_channels
+        self.traced_calls = 0
+        self.eager_calls = 0
+
+    def valid_length(self, length):
+        return self.model.valid_length(length)
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+    def __call__(self, mix):
+        traced = self.traced_by_shape.get(tuple(mix.shape))
+        if traced is None:
+            self.eager_calls += 1
+            return self.model(mix)
+        self.traced_calls += 1
+        return traced(mix)
+
+
+def torchscript_path(batch_size, precision="fp32", model_path=MODEL_PATH, export_dir=SEPARATION_TORCHSCRIPT_DIR):
+    """정밀도/배치 크기별 trace 모델 경로 (예: ml/models/demucs/torchscript/6a76e118.fp32.b4.ts)"""
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(export_dir, f"{stem}.{precision}.b{batch_size}.ts")
+
+
+class TorchScriptBackend(EagerBackend):
+    """export_separation이 저장한 배치 크기별 TorchScript 모델을 사용하는 백엔드"""
+
+    name = "torchscript"
+
+    def __init__(self, model, model_path=MODEL_PATH, export_dir=SEPARATION_TORCHSCRIPT_DIR):
+        super().__init__(model)
+        traced_by_shape = {}
+        pattern = torchscript_path("*", self.precision, model_path, export_dir)
+        for path in sorted(glob.glob(pattern)):
+            # 가중치 파일이 바뀌었으면 예전 trace는 사용하지 않음
+            if os.path.exists(model_path) and os.path.getmtime(path) < os.path.getmtime(model_path):
+                print(f"⚠️ 모델보다 오래된 TorchScript 무시 (다시 export 필요): {path}")
+                continue
+            batch_size = int(re.search(r"\.b(\d+)\.ts$", path).group(1))
+            traced = torch.jit.load(path, map_location=DEVICE)
+            traced_by_shape[(batch_size, model.audio_channels, model.valid_length(0))] = traced
+
+        if not traced_by_shape:
+            print(f"⚠️ TorchScript 모델 없음 ({pattern}): 모든 청크를 eager로 실행 "
+                  f"(python -m ml.pipeline.export_separation으로 생성)")
+        else:
+            print(f"📦 TorchScript 분리 모델 로드: 배치 크기 {sorted(shape[0] for shape in traced_by_shape)}")
+        self.wrapper = _TracedHTDemucs(model, traced_by_shape)
+
+    def _runnable(self):
+        return self.wrapper
+
+    def get_status(self):
+        return {
+            **super().get_status(),
+            "traced_batch_sizes": sorted(shape[0] for shape in self.wrapper.traced_by_shape),
+            "traced_calls": self.wrapper.traced_calls,
+            "eager_calls": self.wrapper.eager_calls
+        }
+
+
+_BACKEND_CLASSES = {
+    "eager": EagerBackend,
+    "compile": CompiledBackend,
+    "torchscript": TorchScriptBackend
+}
+
+# 모델별 백엔드 레지스트리 (id(model) → 백엔드), 프로세스 전역에서 재사용
+_BACKENDS = {}
+_BACKENDS_LOCK = threading.Lock()
+
+
+def create_separation_backend(model, backend=SEPARATION_BACKEND):
+    """
+    백엔드를 새로 만듭니다.
+
+    :param model: load_model이 반환한 HTDemucs 모델
+    :param backend: eager, compile, torchscript
+    """
+    if backend not in _BACKEND_CLASSES:
+        raise ValueError(f"❌ 지원하지 않는 SEPARATION_BACKEND: {backend} ({', '.join(_BACKEND_CLASSES)})")
+    return _BACKEND_CLASSES[backend](model)
+
+
+def get_separation_backend(model):
+    """모델의 분리 백엔드를 레지스트리에서 가져옵니다. 없으면 SEPARATION_BACKEND로 한 번만 만듭니다."""
+    key = id(model)
+    entry = _BACKENDS.get(key)
+    if entry is not None and entry.model is model:
+        return entry
+
+    with _BACKENDS_LOCK:
+        entry = _BACKENDS.get(key)
+        if entry is None or entry.model is not model:
+            entry = create_separation_backend(model)
+            _BACKENDS[key] = entry
+            print(f"🎛️ 분리 백엔드: {entry.name}")
+    return entry
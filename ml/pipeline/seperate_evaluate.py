@@ -2,17 +2,17 @@ import os
 import torchaudio
 import torch
 import numpy as np
-from model import load_model, separate  # 너의 Demucs 로딩 함수 사용
-from rms_normalize import adaptive_level_adjust  # 적응적 레벨 조정 사용 (main.py와 동일)
-from config import SOURCES as CONFIG_SOURCES  # config.py의 SOURCES 사용
-from pathlib import Path
+from .model import load_model, separate  # 너의 Demucs 로딩 함수 사용
+from .rms_normalize import adaptive_level_adjust  # 적응적 레벨 조정 사용 (main.py와 동일)
+from .config import SOURCES as CONFIG_SOURCES  # config.py의 SOURCES 사용
+
+# 실행 (프로젝트 루트에서): python -m ml.pipeline.seperate_evaluate
+# 정밀도별 비교는 benchmarks.precision_report가 compute_sisdr / evaluate_demucs_on_folder를 사용
 
 # === 사용자 설정 ===
 FOLDER = "C:/Users/dotor/Desktop/Audix_Preprocessing/test_wav"
 # config.py와 일치하는 SOURCES 사용하되, noise는 평가에서 제외
 EVAL_SOURCES = [src for src in CONFIG_SOURCES if src.lower() != 'noise']
-print(f"평가할 소스들: {EVAL_SOURCES}")
-print(f"모델 전체 소스들: {CONFIG_SOURCES}")
 
 # === SI-SDR 계산 함수 ===
 def compute_sisdr(est, ref):
@@ -25,12 +25,14 @@ def compute_sisdr(est, ref):
     return sisdr.item()
 
 # === 분리 및 평가 ===
-def evaluate_demucs_on_folder(folder):
+def evaluate_demucs_on_folder(folder, model=None, model_sources=None):
     """
     Demucs 모델의 소스 분리 성능을 평가합니다.
     분리된 소스와 Ground Truth 모두에 적응적 레벨 조정을 적용하여 평가합니다.
     
     :param folder: 평가 데이터가 있는 폴더 경로
+    :param model: 평가할 모델 (None이면 load_model로 로드, 정밀도별 비교 시 전달)
+    :param model_sources: model의 소스 이름 리스트
     :return: 소스별 SI-SDR 점수 딕셔너리
     """
     # 0. 폴더와 필수 파일 존재 확인
@@ -62,7 +64,8 @@ def evaluate_demucs_on_folder(folder):
     print(f"정규화 후 타입: {type(mixture_np_normalized)}, 형태: {mixture_np_normalized.shape}")
     
     # 2. 모델 로드 및 분리
-    model, model_sources = load_model()
+    if model is None:
+        model, model_sources = load_model()
     print(f"모델이 출력하는 소스: {model_sources}")
     
     model.eval()
@@ -137,6 +140,7 @@ def evaluate_demucs_on_folder(folder):
 if __name__ == "__main__":
     try:
         print("🚀 Demucs 모델 평가 시작")
+        print(f"모델 전체 소스들: {CONFIG_SOURCES}")
         print(f"📁 평가 폴더: {FOLDER}")
         print(f"📊 평가 대상 소스: {EVAL_SOURCES}")
         
@@ -0,0 +1,122 @@
+# === streaming.py ===
+import time
+
+import torchaudio
+
+from .config import SAMPLE_RATE, SEGMENT_DURATION, STREAM_HOP_DURATION, SEPARATION_BATCH_SIZE, SAVE_MEL_PT
+from .model import separate_batch
+from .audio_preprocessing import conform_waveform, normalize_audio, resolve_target_parts, sources_to_part_mels
+from .wav_io import WavPcmReader, torchaudio_source
+
+
+def window_offsets(num_frames, window_frames, hop_frames):
+    """
+    슬라이딩 윈도우 시작 위치들을 계산합니다. 마지막 윈도우는 파일 끝을 덮도록 추가되며
+    (짧으면 패딩됨), 파일이 윈도우보다 짧으면 윈도우 하나만 만듭니다.
+
+    :param num_frames: 전체 프레임 수
+    :param window_frames: 윈도우 길이 (프레임)
+    :param hop_frames: 윈도우 간격 (프레임)
+    :return: 시작 프레임 리스트
+    """
+    offsets = [0]
+    while offsets[-1] + window_frames < num_frames:
+        offsets.append(offsets[-1] + hop_frames)
+    return offsets
+
+
+def iter_wav_windows(wav_path, hop_seconds=STREAM_HOP_DURATION, window_seconds=SEGMENT_DURATION):
+    """
+    긴 WAV 파일을 겹치는 윈도우 단위로 읽습니다. 파일 전체를 디코딩하지 않고
+    윈도우마다 필요한 구간만 읽습니다.
+
+    :param wav_path: 입력 WAV 파일 경로, bytes, 또는 바이너리 파일 객체
+    :param hop_seconds: 윈도우 간격 (초)
+    :param window_seconds: 윈도우 길이 (초)
+    :return: (시작 초, 끝 초, 오디오 텐서 [1, SAMPLE_RATE * SEGMENT_DURATION]) 제너레이터
+    """
+    if hop_seconds <= 0:
+        raise ValueError(f"❌ hop은 0보다 커야 합니다: {hop_seconds}")
+
+    reader = None
+    try:
+        reader = WavPcmReader(wav_path)
+        sample_rate, num_frames = reader.sample_rate, reader.num_frames
+        read_window = reader.read
+    except ValueError as e:
+        # 파일 객체/bytes도 윈도우마다 처음으로 되감아 필요한 구간만 디코딩
+        print(f"⚠️ {e} → torchaudio로 디코딩")
+        info = torchaudio.info(torchaudio_source(wav_path))
+        sample_rate, num_frames = info.sample_rate, info.num_frames
+        read_window = lambda offset, frames: torchaudio.load(
+            torchaudio_source(wav_path), frame_offset=offset, num_frames=frames
+        )[0]
+
+    window_frames = int(window_seconds * sample_rate)
+    hop_frames = max(1, int(hop_seconds * sample_rate))
+
+    # 리샘플러는 파일당 한 번만 생성
+    resampler = None
+    if sample_rate != SAMPLE_RATE:
+        print(f"⚠️ 샘플링 레이트 불일치: {sample_rate}Hz -> {SAMPLE_RATE}Hz로 리샘플링")
+        resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=SAMPLE_RATE)
+
+    offsets = window_offsets(num_frames, window_frames, hop_frames)
+    print(f"📼 스트리밍 분석: {num_frames / sample_rate:.1f}초, 윈도우 {window_seconds}초, "
+          f"hop {hop_seconds}초 → {len(offsets)}개 윈도우")
+
+    try:
+        for offset in offsets:
+            waveform = read_window(offset, window_frames)
+            if resampler is not None:
+                waveform = resampler(waveform)
+            end_frame = min(offset + window_frames, num_frames)
+            yield offset / sample_rate, end_frame / sample_rate, conform_waveform(waveform, SAMPLE_RATE)
+    finally:
+        if reader is not None:
+            reader.close()
+
+
+def iter_stream_part_mels(model, source_names, wav_path, target_parts=None, hop_seconds=STREAM_HOP_DURATION,
+                          batch_size=SEPARATION_BATCH_SIZE, save_pt=SAVE_MEL_PT, profile=None):
+    """
+    긴 WAV 파일의 겹치는 10초 윈도우들을 batch_size 단위로 분리하고 mel 텐서를 만듭니다.
+    메모리에는 한 배치 분량의 윈도우만 유지됩니다.
+
+    :param model: 분리 모델
+    :param source_names: 부품 이름 리스트
+    :param wav_path: 입력 WAV 파일 경로, bytes, 또는 바이너리 파일 객체
+    :param target_parts: 분석할 부품 리스트
+    :param hop_seconds: 윈도우 간격 (초)
+    :param batch_size: 한 번의 분리 호출에 넣을 최대 윈도우 수
+    :param save_pt: True면 mel 텐서를 .pt 파일로도 저장
+    :param profile: 분리 프로필 (None이면 SEPARATION_PROFILE)
+    :return: [(윈도우 정보, {부품명: mel 텐서}), ...] 배치 제너레이터
+    """
+    target_parts = resolve_target_parts(source_names, target_parts)
+    batch_size = max(1, batch_size)
+
+    window_infos = []
+    window_audios = []
+
+    def flush():
+        start_sep = time.time()
+        sources_batch = separate_batch(model, window_audios, profile=profile)
+        print(f"🎛️ 윈도우 배치 분리 시간: {(time.time() - start_sep):.2f}초 ({len(window_audios)}개 윈도우)")
+        part_mels_list = sources_to_part_mels(sources_batch, source_names, target_parts, save_pt=save_pt)
+        return list(zip(window_infos, part_mels_list))
+
+    for window_index, (start_sec, end_sec, waveform) in enumerate(iter_wav_windows(wav_path, hop_seconds)):
+        window_infos.append({
+            "window_index": window_index,
+            "start_sec": round(start_sec, 3),
+            "end_sec": round(end_sec, 3)
+        })
+        window_audios.append(normalize_audio(waveform))
+
+        if len(window_audios) >= batch_size:
+            yield flush()
+            window_infos, window_audios = [], []
+
+    if window_audios:
+        yield flush()
@@ -0,0 +1,221 @@
+# === wav_io.py ===
+import io
+import os
+import struct
+
+import numpy as np
+import torch
+import torchaudio
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavPcmReader:
+    """
+    RIFF/WAVE PCM 리더. 파일 경로, bytes, 파일 객체를 모두 받아 헤더만 파싱한 뒤
+    요청한 프레임 구간만 float32 텐서로 디코딩합니다.
+
+    - bytes/BytesIO: memoryview로 data 청크를 복사 없이 참조 (디코딩 시 float32 변환 1회)
+    - 경로/파일 객체: 필요한 구간만 seek 후 미리 할당한 버퍼에 readinto (readinto가 없으면 read)
+
+    지원 형식: PCM 8/16/24/32bit, IEEE float 32/64bit (WAVE_FORMAT_EXTENSIBLE 포함).
+    그 외 형식은 ValueError를 발생시키므로 호출 측에서 torchaudio로 대체합니다.
+    """
+
+    def __init__(self, source):
+        """
+        :param source: WAV 파일 경로, bytes/bytearray/memoryview, 또는 바이너리 파일 객체
+        """
+        self._file = None
+        self._owns_file = False
+        self._buffer = None
+
+        if isinstance(source, (str, os.PathLike)):
+            self._file = open(source, "rb")
+            self._owns_file = True
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            self._buffer = memoryview(source).cast("B")
+        elif isinstance(source, io.BytesIO):
+            self._buffer = source.getbuffer()
+        elif hasattr(source, "read") and hasattr(source, "seek"):
+            self._file = source
+        else:
+            raise TypeError(f"❌ 지원하지 않는 WAV 입력 형식: {type(source)}")
+
+        try:
+            self._parse_header()
+        except Exception:
+            self.close()
+            raise
+
+    # === 헤더 파싱 ===
+    def _read_at(self, offset, size):
+        """offset부터 size 바이트를 읽습니다 (bytes 입력이면 복사 없는 memoryview)."""
+        if self._buffer is not None:
+            return self._buffer[offset:offset + size]
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def _parse_header(self):
+        riff = bytes(self._read_at(0, 12))
+        if len(riff) < 12 or riff[0:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise ValueError("❌ RIFF/WAVE 형식이 아닙니다.")
+
+        fmt = None
+        offset = 12
+        while True:
+            chunk_header = bytes(self._read_at(offset, 8))
+            if len(chunk_header) < 8:
+                raise ValueError("❌ data 청크를 찾을 수 없습니다.")
+            chunk_id, chunk_size = chunk_header[0:4], struct.unpack("<I", chunk_header[4:8])[0]
+
+            if chunk_id == b"fmt ":
+                fmt = bytes(self._read_at(offset + 8, chunk_size))
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("❌ fmt 청크가 data 청크보다 뒤에 있습니다.")
+                self._data_offset = offset + 8
+                self._data_size = chunk_size
+                break
+            offset += 8 + chunk_size + (chunk_size & 1)  # 청크는 짝수 바이트로 정렬됨
+
+        format_tag, channels, sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            format_tag = struct.unpack("<H", fmt[24:26])[0]  # SubFormat GUID의 앞 2바이트
+
+        if format_tag == WAVE_FORMAT_PCM and bits in (8, 16, 24, 32):
+            pass
+        elif format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+            pass
+        else:
+            raise ValueError(f"❌ 지원하지 않는 WAV 인코딩: format={format_tag:#x}, bits={bits}")
+
+        self.format_tag = format_tag
+        self.num_channels = channels
+        self.sample_rate = sample_rate
+        self.bits_per_sample = bits
+        self.block_align = block_align
+
+        # 스트리밍 녹음 등으로 data 크기가 실제보다 크게 기록된 경우 실제 길이로 제한
+        if self._buffer is not None:
+            available = len(self._buffer) - self._data_offset
+        else:
+            available = self._file.seek(0, io.SEEK_END) - self._data_offset
+        self._data_size = min(self._data_size, max(0, available))
+        self.num_frames = self._data_size // block_align
+
+    # === 디코딩 ===
+    def _decode(self, raw):
+        """인터리브된 PCM 바이트를 [channels, frames] float32 배열로 변환합니다."""
+        bits = self.bits_per_sample
+        if self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            samples = np.frombuffer(raw, dtype="<f4" if bits == 32 else "<f8").astype(np.float32)
+        elif bits == 8:
+            samples = np.frombuffer(raw, dtype=np.uint8).astype(np.float32)
+            samples -= 128.0
+            samples *= 1.0 / 128.0
+        elif bits == 16:
+            samples = np.frombuffer(raw, dtype="<i2").astype(np.float32)
+            samples *= 1.0 / 32768.0
+        elif bits == 24:
+            packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+            samples = (
+                packed[:, 0].astype(np.int32)
+                | (packed[:, 1].astype(np.int32) << 8)
+                | (packed[:, 2].astype(np.int8).astype(np.int32) << 16)  # 부호 확장
+            ).astype(np.float32)
+            samples *= 1.0 / 8388608.0
+        else:
+            samples = np.frombuffer(raw, dtype="<i4").astype(np.float32)
+            samples *= 1.0 / 2147483648.0
+
+        # [frames * channels] → [channels, frames]
+        return samples.reshape(-1, self.num_channels).T
+
+    def read(self, frame_offset=0, num_frames=-1):
+        """
+        프레임 구간을 디코딩합니다.
+
+        :param frame_offset: 시작 프레임
+        :param num_frames: 읽을 프레임 수 (-1이면 끝까지)
+        :return: 오디오 텐서 (shape: [channels, frames], float32, -1~1)
+        """
+        frame_offset = min(max(0, frame_offset), self.num_frames)
+        if num_frames < 0:
+            num_frames = self.num_frames - frame_offset
+        num_frames = min(num_frames, self.num_frames - frame_offset)
+
+        start = self._data_offset + frame_offset * self.block_align
+        size = num_frames * self.block_align
+
+        if self._buffer is not None:
+            raw = self._buffer[start:start + size]
+        elif hasattr(self._file, "readinto"):
+            raw = np.empty(size, dtype=np.uint8)
+            self._file.seek(start)
+            read_size = self._file.readinto(memoryview(raw))
+            raw = raw[:read_size - read_size % self.block_align]
+        else:
+            # Python 3.11 미만의 SpooledTemporaryFile(UploadFile.file) 등 readinto가 없는 파일 객체
+            self._file.seek(start)
+            raw = np.frombuffer(self._file.read(size), dtype=np.uint8)
+            raw = raw[:len(raw) - len(raw) % self.block_align]
+
+        # 모노 16bit 등은 전치 후에도 연속 메모리가 아니므로 torch 변환 전에 정렬
+        return torch.from_numpy(np.ascontiguousarray(self._decode(raw)))
+
+    def close(self):
+        if self._owns_file and self._file is not None:
+            self._file.close()
+        self._file = None
+        self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def describe_wav_source(source):
+    """로그/결과용 입력 설명 (경로면 그대로, 메모리 입력이면 크기)."""
+    if isinstance(source, (str, os.PathLike)):
+        return str(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return f"<memory: {memoryview(source).nbytes} bytes>"
+    if isinstance(source, io.BytesIO):
+        return f"<memory: {source.getbuffer().nbytes} bytes>"
+    return str(getattr(source, "name", "<stream>"))
+
+
+def decode_wav(source, max_seconds=None):
+    """
+    WAV를 디코딩합니다. 경로, bytes, 파일 객체를 모두 받으며,
+    WavPcmReader가 지원하지 않는 인코딩은 torchaudio로 대체합니다.
+
+    :param source: WAV 파일 경로, bytes, 또는 바이너리 파일 객체
+    :param max_seconds: 앞에서부터 디코딩할 최대 길이 (초, None이면 전체)
+    :return: (오디오 텐서 [channels, frames], 샘플링 레이트)
+    """
+    try:
+        with WavPcmReader(source) as reader:
+            num_frames = -1 if max_seconds is None else int(max_seconds * reader.sample_rate)
+            return reader.read(0, num_frames), reader.sample_rate
+    except ValueError as e:
+        print(f"⚠️ {e} → torchaudio로 디코딩")
+
+    return torchaudio.load(torchaudio_source(source))
+
+
+def torchaudio_source(source):
+    """
+    torchaudio.info/load에 넘길 입력으로 바꿉니다. bytes는 BytesIO로 감싸고,
+    파일 객체는 처음으로 되감습니다 (torchaudio는 현재 위치부터 읽으므로 호출마다 다시 가져와야 함).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+    return source
@@ -3,9 +3,43 @@ ML Services 패키지
 오디오 분석 관련 ML 서비스들을 관리합니다.
 """
 
-from .audio_service import AudioAnalysisService, get_audio_service
+import importlib
+
+# audio_service/prescreen은 torch와 모델 파이프라인을 import하므로 처음 사용할 때 로드
+_LAZY_EXPORTS = {
+    **dict.fromkeys(["AudioAnalysisService", "get_audio_service"], ".audio_service"),
+    **dict.fromkeys(["InferenceExecutor", "InferenceQueueFullError"], ".inference_executor"),
+    **dict.fromkeys(["LRUTTLCache", "AnalysisResultCache", "SeparationCache"], ".cache"),
+    **dict.fromkeys(["MixturePreScreener"], ".prescreen"),
+    **dict.fromkeys(["ReadinessTracker", "ModelsNotReadyError", "get_readiness",
+                     "start_model_initialization"], ".readiness"),
+}
 
 __all__ = [
     "AudioAnalysisService",
-    "get_audio_service"
+    "get_audio_service",
+    "InferenceExecutor",
+    "InferenceQueueFullError",
+    "LRUTTLCache",
+    "AnalysisResultCache",
+    "SeparationCache",
+    "MixturePreScreener",
+    "ReadinessTracker",
+    "ModelsNotReadyError",
+    "get_readiness",
+    "start_model_initialization"
 ]
+
+
+def __getattr__(name):
+    """공개 이름을 처음 접근할 때 해당 모듈을 import합니다 (torch/demucs/onnxruntime import 지연)."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
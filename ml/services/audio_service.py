@@ -6,13 +6,29 @@ ML 모델 서비스 클래스
 import os
 import sys
 import json
+import time
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import BinaryIO, List, Dict, Optional, Union
 
 # ml.pipeline 패키지의 모듈들을 import
-from ml.pipeline.audio_preprocessing import process_wav_file, load_model
+from ml.pipeline.audio_preprocessing import (load_wav_file, load_wav_files, process_audios_batch,
+                                             resolve_target_parts, normalize_audio)
+from ml.pipeline.model import load_shared_model, resolve_separation_profile
 from ml.pipeline.resample import init_resampler
-from ml.pipeline.integrated_analysis import process_pt_files_with_classification
+from ml.pipeline.integrated_analysis import classify_part_mels, classify_multiple_part_mels, aggregate_window_results
+from ml.pipeline.streaming import iter_stream_part_mels
+from ml.pipeline.config import (SAMPLE_RATE, SEGMENT_DURATION, STREAM_HOP_DURATION, MODEL_PATH, SEPARATION_BATCH_SIZE,
+                                SEPARATION_PRECISION, SEPARATION_PROFILE, ONNX_MICRO_BATCHING, ONNX_BATCH_MAX_SIZE, ONNX_BATCH_MAX_WAIT_MS)
+from ml.pipeline.onnx import preload_onnx_sessions, onnx_model_path_for_part, get_onnx_session, mel_to_onnx_input
+from ml.pipeline.onnx_batching import get_batching_status
+from ml.pipeline.onnx_config import get_onnx_runtime_settings
+from ml.pipeline.separation_backend import get_separation_backend
+from ml.pipeline.wav_io import describe_wav_source
+from ml.pipeline.metrics import MODEL_LOAD_SECONDS, collect_timings
+from .inference_executor import InferenceExecutor, PROCESS_WORKER_LOCAL_STATS
+from .cache import AnalysisResultCache, SeparationCache, audio_content_hash, model_version_fingerprint
+from .prescreen import MixturePreScreener
+from .readiness import get_readiness
 
 
 class AudioAnalysisService:
@@ -28,103 +44,569 @@ class AudioAnalysisService:
         self.onnx_model_base_path = onnx_model_base_path
         self.model = None
         self.source_names = None
+        self.loaded_parts = []
         self._initialize_models()
+        # 같은 오디오 + 부품 + 모델 버전이면 분석 결과 재사용
+        self.result_cache = AnalysisResultCache(model_version_fingerprint(
+            [MODEL_PATH] + [onnx_model_path_for_part(onnx_model_base_path, part) for part in self.get_available_parts()],
+            variant=SEPARATION_PRECISION
+        ))
+        # 같은 오디오의 다른 부품 요청은 분리 없이 ONNX 단계만 실행 (Demucs 버전/정밀도만 영향)
+        self.separation_cache = SeparationCache(model_version_fingerprint([MODEL_PATH], variant=SEPARATION_PRECISION))
+        # 장치별 정상 기준선으로 확실히 정상인 혼합음은 분리 없이 응답 (PRESCREEN_ENABLED)
+        self.prescreener = MixturePreScreener()
+        # 모델 로딩 후 실행기 생성 (process 모드는 로드된 모델을 fork로 물려받음)
+        self.executor = InferenceExecutor(self)
     
     def _initialize_models(self):
         """Demucs 모델을 초기화합니다."""
+        # 구성 요소별 진행 상태는 /server/ready에서 확인
+        readiness = get_readiness()
+        readiness.expect(["demucs"] + [f"onnx:{part}" for part in self.get_available_parts()])
         try:
             print("🔧 Demucs 모델 로딩 중...")
-            self.model, self.source_names = load_model()
-            init_resampler(self.model.samplerate)
+            with MODEL_LOAD_SECONDS.labels(model="demucs").time(), readiness.track("demucs"):
+                self.model, self.source_names = load_shared_model()
+                init_resampler(self.model.samplerate)
+                # 분리 백엔드(compile/torchscript)도 fork 전에 준비해 워커가 물려받게 함
+                get_separation_backend(self.model)
             print("✅ Demucs 모델 로딩 완료")
+            
+            # 부품별 ONNX 세션을 한 번만 로드해 요청 간 재사용
+            print("🔧 ONNX 모델 로딩 중...")
+            loaded_parts = []
+            with MODEL_LOAD_SECONDS.labels(model="onnx").time():
+                for part in self.get_available_parts():
+                    with readiness.track(f"onnx:{part}"):
+                        loaded = preload_onnx_sessions(self.onnx_model_base_path, [part])
+                    if loaded:
+                        loaded_parts.extend(loaded)
+                    else:
+                        readiness.mark(f"onnx:{part}", "missing", "ONNX 모델 파일 없음")
+            self.loaded_parts = loaded_parts
+            print(f"✅ ONNX 모델 로딩 완료: {loaded_parts}")
         except Exception as e:
             print(f"❌ 모델 로딩 실패: {e}")
             raise
     
+    def warm_up(self) -> Dict:
+        """
+        더미 10초 클립으로 Demucs 분리(+ mel)와 로드된 모든 ONNX 세션을 한 번씩 실행합니다.
+        첫 요청이 커널 선택/메모리 할당/최적화 비용을 떠안지 않도록 준비 완료 전에 호출합니다.
+        캐시와 사전 선별은 거치지 않습니다.
+
+        Returns:
+            dict: 구성 요소별 워밍업 지연 (ms)
+        """
+        import torch
+
+        readiness = get_readiness()
+        latencies = {}
+        print("🔥 워밍업 추론 시작...")
+
+        # 잡음 클립 (무음이면 레벨 조정 단계가 실제 경로와 다르게 동작)
+        generator = torch.Generator().manual_seed(0)
+        dummy = 0.1 * torch.randn(1, SAMPLE_RATE * SEGMENT_DURATION, generator=generator)
+
+        start = time.perf_counter()
+        part_mels = process_audios_batch(self.model, self.source_names, [dummy], self.loaded_parts, save_pt=False)[0]
+        if isinstance(part_mels, Exception):
+            raise part_mels
+        latencies["demucs"] = time.perf_counter() - start
+        readiness.record_warmup("demucs", latencies["demucs"])
+
+        for part in self.loaded_parts:
+            entry = get_onnx_session(onnx_model_path_for_part(self.onnx_model_base_path, part))
+            x = mel_to_onnx_input(part_mels[part], entry.in_ch)[None]
+            start = time.perf_counter()
+            entry.run(x)
+            latencies[f"onnx:{part}"] = time.perf_counter() - start
+            readiness.record_warmup(f"onnx:{part}", latencies[f"onnx:{part}"])
+
+        latencies_ms = {name: round(seconds * 1000, 2) for name, seconds in latencies.items()}
+        print(f"✅ 워밍업 완료: {latencies_ms}")
+        return latencies_ms
+
     def analyze_audio_file(
         self, 
-        wav_file_path: str, 
+        wav_file_path: Union[str, bytes], 
         target_parts: List[str] = None,
-        device_name: str = "machine_001"
+        device_name: str = "machine_001",
+        include_timings: bool = False,
+        separation_profile: Optional[str] = None,
+        allow_prescreen: bool = True
     ) -> Dict:
         """
         WAV 파일을 분석하여 이상 감지 결과를 반환합니다.
         
         Args:
-            wav_file_path: 입력 WAV 파일 경로
+            wav_file_path: 입력 WAV 파일 경로 또는 업로드된 WAV bytes
             target_parts: 분석할 부품 리스트
             device_name: 장치명
+            include_timings: True면 pipeline_info.timings_ms에 단계별 wall/CPU 시간,
+                부품별 ONNX 실행 시간, 스레드/배치 설정을 포함
+            separation_profile: 분리 프로필 (fast, balanced, accurate, None이면 서버 기본값)
+            allow_prescreen: False면 사전 선별 없이 항상 전체 분리 경로 (확인 분석용)
         
         Returns:
             dict: 분석 결과
         """
+        if not include_timings:
+            return self._analyze_audio_file(wav_file_path, target_parts, device_name, separation_profile,
+                                            allow_prescreen)
+        
+        # 실행기 워커 스레드(또는 프로세스) 안에서 수집해야 단계 타이머가 이 요청에 기록됨
+        with collect_timings() as timings:
+            result = self._analyze_audio_file(wav_file_path, target_parts, device_name, separation_profile,
+                                              allow_prescreen)
+        if "pipeline_info" in result:
+            result["pipeline_info"]["timings_ms"] = timings.as_dict(config=self._runtime_config())
+        return result
+    
+    def _analyze_audio_file(self, wav_file_path, target_parts, device_name, separation_profile=None,
+                            allow_prescreen=True) -> Dict:
+        """analyze_audio_file 본체"""
         if target_parts is None:
             target_parts = ["fan", "pump", "slider", "gearbox", "bearing"]
         
         try:
-            print(f"🚀 오디오 분석 시작: {wav_file_path}")
+            profile = resolve_separation_profile(separation_profile)
+            print(f"🚀 오디오 분석 시작: {describe_wav_source(wav_file_path)} (분리 프로필: {profile})")
             print(f"🎯 대상 부품: {target_parts}")
             
-            # === 1단계: .pt 파일 생성 ===
-            print("📋 1단계: WAV 파일에서 .pt 파일 생성")
-            generated_files = process_wav_file(
-                self.model, 
-                self.source_names, 
-                wav_file_path, 
-                target_parts=target_parts
-            )
+            # === 0단계: 디코딩 + 결과 캐시 조회 ===
+            audio = load_wav_file(wav_file_path)
+            audio_hash = audio_content_hash(audio)
+            cache_key = self.result_cache.make_key(audio_hash, target_parts, profile)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                print("⚡ 결과 캐시 적중: 분리/분류 생략")
+                cached = self._in_requested_order(cached, target_parts)
+                return self._build_success_result(
+                    wav_file_path, target_parts, cached["processed_parts"],
+                    self._with_device_name(cached["analysis_results"], device_name), profile, cache_hit=True
+                )
             
-            if not generated_files:
-                raise ValueError("❌ .pt 파일이 생성되지 않았습니다.")
+            # === 0.5단계: 혼합음 사전 선별 (확실히 정상이면 분리/분류 생략) ===
+            features, prescreen_info = None, None
+            if self.prescreener.enabled and allow_prescreen:
+                features, decision = self.prescreener.screen(device_name, normalize_audio(audio), target_parts)
+                prescreen_info = {key: value for key, value in decision.items() if key != "analysis_results"}
+                if decision["screened"]:
+                    print(f"⚡ 사전 선별: 확실히 정상 (점수 {decision['score']}), 최근 정상 결과로 응답")
+                    analysis_results = self._with_device_name(decision["analysis_results"], device_name)
+                    analysis_results["screened"] = True
+                    result = self._build_success_result(wav_file_path, target_parts, list(target_parts),
+                                                        analysis_results, profile)
+                    result["pipeline_info"]["prescreen"] = prescreen_info
+                    return result
+                print(f"🔎 사전 선별 통과 못함 ({decision['reason']}): 전체 분리 경로로 진행")
             
-            print(f"✅ 1단계 완료: {len(generated_files)}개 .pt 파일 생성")
+            # === 1단계: 부품별 mel 텐서 생성 (메모리) ===
+            print("📋 1단계: WAV 파일에서 부품별 mel 텐서 생성")
+            part_mels = self._get_part_mels([audio], [audio_hash], target_parts, profile)[0]
+            if isinstance(part_mels, Exception):
+                raise part_mels
             
-            # === 2단계: .pt 파일 분석 ===
+            if not part_mels:
+                raise ValueError("❌ mel 텐서가 생성되지 않았습니다.")
+            
+            print(f"✅ 1단계 완료: {len(part_mels)}개 부품 mel 텐서 생성")
+            
+            # === 2단계: mel 텐서 분류 ===
             print("📋 2단계: 각 부품별 전용 ONNX 모델로 분류 분석")
-            analysis_results = process_pt_files_with_classification(
-                pt_files=generated_files,
+            analysis_results = classify_part_mels(
+                part_mels,
                 onnx_model_base_path=self.onnx_model_base_path,
                 device_name=device_name
             )
             
             print(f"✅ 2단계 완료: {analysis_results['total_parts']}개 부품 분석")
             
+            self.result_cache.set(cache_key, {
+                "processed_parts": list(part_mels.keys()),
+                "analysis_results": analysis_results
+            })
+            
+            if features is not None:
+                self.prescreener.update(device_name, features, analysis_results)
+            
+            # === 최종 결과 통합 ===
+            result = self._build_success_result(wav_file_path, target_parts, list(part_mels.keys()), analysis_results,
+                                                profile)
+            if prescreen_info is not None:
+                result["pipeline_info"]["prescreen"] = prescreen_info
+            return result
+            
+        except Exception as e:
+            print(f"❌ 분석 실행 중 오류 발생: {e}")
+            return self._build_error_result(e)
+    
+    def analyze_audio_files(
+        self,
+        wav_file_paths: List[Union[str, bytes]],
+        target_parts: List[str] = None,
+        device_names: List[str] = None,
+        separation_profile: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        여러 WAV 파일을 배치 분리([B, 2, T] 한 번의 apply_model)로 분석합니다.
+        
+        Args:
+            wav_file_paths: 입력 WAV 파일 경로 (또는 WAV bytes) 리스트
+            target_parts: 분석할 부품 리스트
+            device_names: 파일별 장치명 리스트
+            separation_profile: 분리 프로필 (None이면 서버 기본값)
+        
+        Returns:
+            list: 파일 순서의 분석 결과 리스트 (파일별로 success 또는 error)
+        """
+        if target_parts is None:
+            target_parts = ["fan", "pump", "slider", "gearbox", "bearing"]
+        if device_names is None:
+            device_names = ["machine_001"] * len(wav_file_paths)
+        
+        try:
+            profile = resolve_separation_profile(separation_profile)
+            print(f"🚀 배치 오디오 분석 시작: {len(wav_file_paths)}개 파일 (분리 프로필: {profile})")
+            print(f"🎯 대상 부품: {target_parts}")
+            
+            # === 0단계: 디코딩 + 결과 캐시 조회 (적중한 파일은 분리/분류 생략) ===
+            audios = load_wav_files(wav_file_paths)
+            audio_hashes = [None] * len(audios)
+            cache_keys = [None] * len(audios)
+            results = [None] * len(audios)
+            for i, audio in enumerate(audios):
+                if isinstance(audio, Exception):
+                    continue
+                audio_hashes[i] = audio_content_hash(audio)
+                cache_keys[i] = self.result_cache.make_key(audio_hashes[i], target_parts, profile)
+                cached = self.result_cache.get(cache_keys[i])
+                if cached is not None:
+                    cached = self._in_requested_order(cached, target_parts)
+                    results[i] = self._build_success_result(
+                        wav_file_paths[i], target_parts, cached["processed_parts"],
+                        self._with_device_name(cached["analysis_results"], device_names[i]), profile, cache_hit=True
+                    )
+            pending = [i for i in range(len(audios)) if results[i] is None]
+            print(f"⚡ 결과 캐시 적중: {len(audios) - len(pending)}/{len(audios)}개 파일")
+            
+            # === 1단계: 배치 분리 + 부품별 mel 텐서 생성 ===
+            mel_results = self._get_part_mels(
+                [audios[i] for i in pending],
+                [audio_hashes[i] for i in pending],
+                target_parts,
+                profile
+            )
+            
+            # === 2단계: 성공한 파일들을 한꺼번에 분류 ===
+            succeeded = [(i, part_mels) for i, part_mels in zip(pending, mel_results)
+                         if part_mels and not isinstance(part_mels, Exception)]
+            analysis_results_list = classify_multiple_part_mels(
+                [part_mels for _, part_mels in succeeded],
+                onnx_model_base_path=self.onnx_model_base_path,
+                device_names=[device_names[i] for i, _ in succeeded]
+            )
+            
             # === 최종 결과 통합 ===
-            final_result = {
+            for (i, part_mels), analysis_results in zip(succeeded, analysis_results_list):
+                self.result_cache.set(cache_keys[i], {
+                    "processed_parts": list(part_mels.keys()),
+                    "analysis_results": analysis_results
+                })
+                results[i] = self._build_success_result(wav_file_paths[i], target_parts, list(part_mels.keys()),
+                                                        analysis_results, profile)
+            for i, part_mels in zip(pending, mel_results):
+                if results[i] is None:
+                    error = part_mels if isinstance(part_mels, Exception) else ValueError("❌ mel 텐서가 생성되지 않았습니다.")
+                    results[i] = self._build_error_result(error)
+            
+            print(f"✅ 배치 분석 완료: {sum(r['status'] == 'success' for r in results)}/{len(wav_file_paths)}개 성공")
+            return results
+            
+        except Exception as e:
+            print(f"❌ 배치 분석 실행 중 오류 발생: {e}")
+            return [self._build_error_result(e) for _ in wav_file_paths]
+    
+    def analyze_long_audio_file(
+        self,
+        wav_file_path: Union[str, bytes, BinaryIO],
+        target_parts: List[str] = None,
+        device_name: str = "machine_001",
+        hop_seconds: float = STREAM_HOP_DURATION,
+        separation_profile: Optional[str] = None
+    ) -> Dict:
+        """
+        10초보다 긴 WAV 파일을 겹치는 10초 윈도우로 나눠 전체를 분석합니다.
+        파일 전체를 메모리에 디코딩하지 않고 윈도우 배치 단위로 읽어 처리합니다.
+        
+        Args:
+            wav_file_path: 입력 WAV 파일 경로, 업로드된 WAV bytes, 또는 업로드 파일 객체 (thread 모드)
+            target_parts: 분석할 부품 리스트
+            device_name: 장치명
+            hop_seconds: 윈도우 간격 (초)
+            separation_profile: 분리 프로필 (None이면 서버 기본값)
+        
+        Returns:
+            dict: 종합 분석 결과 + 윈도우별 확률 타임라인
+        """
+        if target_parts is None:
+            target_parts = ["fan", "pump", "slider", "gearbox", "bearing"]
+        
+        try:
+            profile = resolve_separation_profile(separation_profile)
+            print(f"🚀 스트리밍 오디오 분석 시작: {describe_wav_source(wav_file_path)} "
+                  f"(hop: {hop_seconds}초, 분리 프로필: {profile})")
+            print(f"🎯 대상 부품: {target_parts}")
+            
+            timeline = []
+            for window_batch in iter_stream_part_mels(
+                self.model,
+                self.source_names,
+                wav_file_path,
+                target_parts=target_parts,
+                hop_seconds=hop_seconds,
+                profile=profile
+            ):
+                # 윈도우 배치 단위로 분류 (부품별 마이크로 배처가 윈도우들을 함께 처리)
+                window_results = classify_multiple_part_mels(
+                    [part_mels for _, part_mels in window_batch],
+                    onnx_model_base_path=self.onnx_model_base_path,
+                    device_names=[device_name] * len(window_batch)
+                )
+                for (window_info, _), window_result in zip(window_batch, window_results):
+                    timeline.append({
+                        **window_info,
+                        "parts": {r["part_name"]: r["anomaly_probability"] for r in window_result["results"]},
+                        "anomaly_count": window_result["anomaly_count"]
+                    })
+            
+            if not timeline:
+                raise ValueError("❌ 분석할 윈도우가 없습니다.")
+            
+            analysis_results = aggregate_window_results(timeline, device_name=device_name)
+            analysis_results["timeline"] = timeline
+            print(f"✅ 스트리밍 분석 완료: {len(timeline)}개 윈도우")
+            
+            return {
                 "status": "success",
                 "pipeline_info": {
-                    "input_wav_file": wav_file_path,
+                    "input_wav_file": describe_wav_source(wav_file_path),
                     "target_parts": target_parts,
-                    "generated_pt_files": generated_files,
+                    "processed_parts": analysis_results["analyzed_parts"],
+                    "window_seconds": SEGMENT_DURATION,
+                    "hop_seconds": hop_seconds,
+                    "separation_profile": profile,
+                    "total_windows": len(timeline),
                     "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 },
                 "analysis_results": analysis_results,
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
             
-            return final_result
-            
         except Exception as e:
-            print(f"❌ 분석 실행 중 오류 발생: {e}")
-            return {
-                "status": "error",
-                "error_message": str(e),
+            print(f"❌ 스트리밍 분석 실행 중 오류 발생: {e}")
+            return self._build_error_result(e)
+    
+    def _get_part_mels(self, audios, audio_hashes, target_parts, profile) -> List:
+        """
+        오디오들의 target_parts mel 텐서를 반환합니다. 분리 캐시에 없는 오디오만 배치 분리하며,
+        이후 다른 부품 요청에 재사용할 수 있도록 noise를 제외한 모든 부품의 mel을 만들어 캐시합니다.
+
+        Args:
+            audios: load_wav_file이 반환한 오디오 텐서 리스트 (로드 실패한 항목은 예외 객체)
+            audio_hashes: audios 순서의 오디오 해시 리스트
+            target_parts: 분석할 부품 리스트
+            profile: 분리 프로필 (resolve_separation_profile로 확인된 이름)
+
+        Returns:
+            list: audios 순서의 {부품명: mel 텐서} 딕셔너리 (처리 실패한 항목은 예외 객체)
+        """
+        target_parts = resolve_target_parts(self.source_names, target_parts)
+        all_parts = resolve_target_parts(self.source_names)
+        
+        all_part_mels = [None] * len(audios)
+        for i, audio_hash in enumerate(audio_hashes):
+            if audio_hash is not None:
+                all_part_mels[i] = self.separation_cache.get(audio_hash, profile)
+        
+        missing = [i for i, part_mels in enumerate(all_part_mels) if part_mels is None]
+        if len(missing) < len(audios):
+            print(f"⚡ 분리 캐시 적중: {len(audios) - len(missing)}/{len(audios)}개 오디오 (분리 생략)")
+        if missing:
+            separated = process_audios_batch(self.model, self.source_names, [audios[i] for i in missing],
+                                             target_parts=all_parts, profile=profile)
+            for i, part_mels in zip(missing, separated):
+                if not isinstance(part_mels, Exception):
+                    self.separation_cache.set(audio_hashes[i], profile, part_mels)
+                all_part_mels[i] = part_mels
+        
+        return [
+            part_mels if isinstance(part_mels, Exception) else {part: part_mels[part] for part in target_parts}
+            for part_mels in all_part_mels
+        ]
+    
+    def _build_success_result(self, wav_file_path, target_parts, processed_parts, analysis_results, profile,
+                              cache_hit=False) -> Dict:
+        """분석 성공 결과를 구성합니다."""
+        return {
+            "status": "success",
+            "pipeline_info": {
+                "input_wav_file": describe_wav_source(wav_file_path),
+                "target_parts": target_parts,
+                "processed_parts": processed_parts,
+                "separation_profile": profile,
+                "cache_hit": cache_hit,
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
+            },
+            "analysis_results": analysis_results,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+    
+    @staticmethod
+    def _in_requested_order(cached: Dict, target_parts: List[str]) -> Dict:
+        """
+        캐시 키는 정렬된 부품 목록으로 만들므로, 캐시된 결과의 부품 순서를 현재 요청의 순서로 맞춥니다.
+        """
+        order = {part: index for index, part in enumerate(target_parts)}
+        by_request = lambda part: order.get(part, len(order))
+        analysis_results = cached["analysis_results"]
+        cached["processed_parts"] = sorted(cached["processed_parts"], key=by_request)
+        analysis_results["results"] = sorted(analysis_results["results"], key=lambda r: by_request(r["part_name"]))
+        analysis_results["analyzed_parts"] = [r["part_name"] for r in analysis_results["results"]]
+        return cached
+    
+    @staticmethod
+    def _with_device_name(analysis_results: Dict, device_name: str) -> Dict:
+        """캐시된 분석 결과의 장치명을 현재 요청의 장치명으로 바꿉니다 (분류 결과는 장치와 무관)."""
+        analysis_results["device_name"] = device_name
+        for part_result in analysis_results["results"]:
+            part_result["device_name"] = device_name
+        return analysis_results
+    
+    def _build_error_result(self, error: Exception) -> Dict:
+        """분석 실패 결과를 구성합니다."""
+        return {
+            "status": "error",
+            "error_message": str(error),
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
     
+    def _runtime_config(self) -> Dict:
+        """요청 시간 분석(timings_ms)에 함께 담을 스레드/배치 설정 (현재 워커 기준)"""
+        import torch
+        return {
+            "pid": os.getpid(),
+            "executor_type": self.executor.executor_type,
+            "executor_workers": self.executor.max_workers,
+            "torch_threads": torch.get_num_threads(),
+            "torch_interop_threads": torch.get_num_interop_threads(),
+            "separation_batch_size": SEPARATION_BATCH_SIZE,
+            "separation_backend": get_separation_backend(self.model).get_status(),
+            "default_separation_profile": SEPARATION_PROFILE,
+            "onnx_micro_batching": ONNX_MICRO_BATCHING,
+            "onnx_batch_max_size": ONNX_BATCH_MAX_SIZE,
+            "onnx_batch_max_wait_ms": ONNX_BATCH_MAX_WAIT_MS,
+            "onnx_runtime": get_onnx_runtime_settings()
+        }
+    
+    async def analyze_audio_file_async(
+        self,
+        wav_file_path: Union[str, bytes],
+        target_parts: List[str] = None,
+        device_name: str = "machine_001",
+        include_timings: bool = False,
+        separation_profile: Optional[str] = None,
+        allow_prescreen: bool = True
+    ) -> Dict:
+        """
+        analyze_audio_file을 추론 실행기에서 실행합니다 (이벤트 루프를 막지 않음).
+
+        Raises:
+            InferenceQueueFullError: 추론 대기열이 가득 찬 경우
+        """
+        return await self.executor.run(
+            "analyze_audio_file",
+            wav_file_path,
+            target_parts=target_parts,
+            device_name=device_name,
+            include_timings=include_timings,
+            separation_profile=separation_profile,
+            allow_prescreen=allow_prescreen
+        )
+
+    async def analyze_audio_files_async(
+        self,
+        wav_file_paths: List[Union[str, bytes]],
+        target_parts: List[str] = None,
+        device_names: List[str] = None,
+        separation_profile: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        analyze_audio_files를 추론 실행기에서 실행합니다 (이벤트 루프를 막지 않음).
+
+        Raises:
+            InferenceQueueFullError: 추론 대기열이 가득 찬 경우
+        """
+        return await self.executor.run(
+            "analyze_audio_files",
+            wav_file_paths,
+            target_parts=target_parts,
+            device_names=device_names,
+            separation_profile=separation_profile
+        )
+
+    async def analyze_long_audio_file_async(
+        self,
+        wav_file_path: Union[str, bytes, BinaryIO],
+        target_parts: List[str] = None,
+        device_name: str = "machine_001",
+        hop_seconds: float = STREAM_HOP_DURATION,
+        separation_profile: Optional[str] = None
+    ) -> Dict:
+        """
+        analyze_long_audio_file을 추론 실행기에서 실행합니다 (이벤트 루프를 막지 않음).
+
+        Raises:
+            InferenceQueueFullError: 추론 대기열이 가득 찬 경우
+        """
+        return await self.executor.run(
+            "analyze_long_audio_file",
+            wav_file_path,
+            target_parts=target_parts,
+            device_name=device_name,
+            hop_seconds=hop_seconds,
+            separation_profile=separation_profile
+        )
+
+    def shutdown(self):
+        """추론 실행기를 종료합니다."""
+        self.executor.shutdown()
+
     def get_health_status(self) -> Dict:
         """서비스 상태를 확인합니다."""
         try:
             model_status = "ready" if self.model is not None else "not_loaded"
             onnx_models_exist = os.path.exists(self.onnx_model_base_path)
             
-            return {
+            health_status = {
                 "status": "healthy",
                 "demucs_model": model_status,
+                "separation_backend": get_separation_backend(self.model).get_status() if self.model is not None else None,
                 "onnx_models_path": self.onnx_model_base_path,
                 "onnx_models_available": onnx_models_exist,
+                "inference_executor": self.executor.get_status(),
+                "onnx_batching": get_batching_status(),
+                "result_cache": self.result_cache.get_status(),
+                "separation_cache": self.separation_cache.get_status(),
+                "prescreen": self.prescreener.get_status(),
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
+            if self.executor.executor_type == "process":
+                # 캐시/기준선/배처는 워커 프로세스마다 따로 있어 부모 값은 의미가 없음
+                for key in PROCESS_WORKER_LOCAL_STATS:
+                    health_status.pop(key)
+            return health_status
         except Exception as e:
             return {
                 "status": "unhealthy",
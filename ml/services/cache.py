@@ -0,0 +1,303 @@
+"""
+분석 결과 캐시 (Content-addressed Result Cache)
+디코딩된 PCM의 해시 + 대상 부품 + 모델 버전을 키로 분석 결과를 재사용합니다.
+
+- 로컬: 크기 제한 LRU + TTL (프로세스별)
+- Redis (선택): 여러 레플리카/워커 프로세스가 적중 결과를 공유
+
+분리 캐시 (Separation Cache)
+같은 오디오에 대해 다른 부품 조합을 요청하면 Demucs 분리를 다시 하지 않도록
+모든 부품의 mel 텐서를 짧은 시간 동안 보관합니다 (로컬 전용).
+"""
+
+import os
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# 캐시 설정 (.env 파일에서 읽기)
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "600"))
+RESULT_CACHE_REDIS = os.getenv("RESULT_CACHE_REDIS", "false").lower() == "true"  # Redis 공유 캐시 사용 여부
+RESULT_CACHE_REDIS_TIMEOUT_SECONDS = float(os.getenv("RESULT_CACHE_REDIS_TIMEOUT_SECONDS", "0.5"))   # 연결/명령 타임아웃
+RESULT_CACHE_REDIS_BACKOFF_SECONDS = float(os.getenv("RESULT_CACHE_REDIS_BACKOFF_SECONDS", "30"))  # 실패 후 Redis 계층 건너뛰는 시간
+
+SEPARATION_CACHE_ENABLED = os.getenv("SEPARATION_CACHE_ENABLED", "true").lower() == "true"
+SEPARATION_CACHE_MAX_ENTRIES = int(os.getenv("SEPARATION_CACHE_MAX_ENTRIES", "32"))   # 클립당 약 1.2MB (부품 5개 mel)
+SEPARATION_CACHE_TTL_SECONDS = float(os.getenv("SEPARATION_CACHE_TTL_SECONDS", "120"))
+
+REDIS_KEY_PREFIX = "audix:analysis"
+
+
+def audio_content_hash(waveform) -> str:
+    """
+    디코딩된 오디오의 내용 해시를 계산합니다 (컨테이너/메타데이터가 달라도 같은 PCM이면 같은 해시).
+
+    Args:
+        waveform: load_wav_file이 반환한 오디오 텐서 (shape: [1, samples])
+
+    Returns:
+        str: sha256 hex digest
+    """
+    return hashlib.sha256(waveform.contiguous().numpy().data).hexdigest()
+
+
+def model_version_fingerprint(model_paths: List[str], variant: str = "") -> str:
+    """
+    모델 파일들의 크기/수정 시각으로 버전 지문을 만듭니다.
+    모델 파일이 교체되면 지문이 바뀌어 이전 캐시 항목을 더 이상 조회하지 않습니다.
+    variant에는 같은 파일이라도 결과가 달라지는 실행 설정(예: 분리 정밀도)을 넣습니다.
+    """
+    digest = hashlib.sha1(variant.encode())
+    for path in sorted(model_paths):
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()[:12]
+
+
+class LRUTTLCache:
+    """크기 제한 LRU + TTL 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, ttl_seconds: float = RESULT_CACHE_TTL_SECONDS):
+        """
+        Args:
+            max_entries: 최대 항목 수 (초과 시 가장 오래 사용되지 않은 항목 제거)
+            ttl_seconds: 항목 유효 시간 (초)
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key → (만료 시각, 값)
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """값을 반환합니다. 없거나 만료되었으면 None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class AnalysisResultCache:
+    """분석 결과 캐시 (로컬 LRU/TTL + 선택적 Redis 계층)"""
+
+    def __init__(
+        self,
+        model_version: str,
+        enabled: bool = RESULT_CACHE_ENABLED,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = RESULT_CACHE_TTL_SECONDS,
+        use_redis: bool = RESULT_CACHE_REDIS,
+        redis_backoff_seconds: float = RESULT_CACHE_REDIS_BACKOFF_SECONDS
+    ):
+        """
+        Args:
+            model_version: 모델 버전 지문 (model_version_fingerprint)
+            enabled: False면 항상 미스 (저장하지 않음)
+            max_entries: 로컬 캐시 최대 항목 수
+            ttl_seconds: 항목 유효 시간 (초, Redis 항목에도 동일 적용)
+            use_redis: True면 Redis를 공유 계층으로 사용
+            redis_backoff_seconds: Redis 조회/저장이 실패하면 이 시간 동안 Redis 계층을 건너뜀
+        """
+        self.model_version = model_version
+        self.enabled = enabled
+        self.use_redis = use_redis
+        self._local = LRUTTLCache(max_entries, ttl_seconds)
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+        self.redis_backoff_seconds = redis_backoff_seconds
+        self._redis_client = None
+        self._redis_retry_at = 0.0  # time.monotonic() 기준, 이 시각 전에는 Redis 계층을 건너뜀
+
+    def make_key(self, audio_hash: str, target_parts: List[str], profile: str) -> str:
+        """캐시 키: 모델 버전 + 분리 프로필 + 오디오 해시 + 대상 부품 (순서/중복과 무관하도록 정렬)"""
+        return f"{REDIS_KEY_PREFIX}:{self.model_version}:{profile}:{audio_hash}:{','.join(sorted(set(target_parts)))}"
+
+    def _redis(self):
+        """
+        결과 캐시 전용 Redis 클라이언트를 반환합니다. 최근에 실패했으면 None (백오프 동안 Redis 계층 생략).
+        공용 get_redis_client()는 연결 실패 시 매번 새로 연결(ping)하므로, Redis가 내려가 있으면
+        조회/저장마다 연결 타임아웃만큼 추론 워커를 붙잡게 됩니다.
+        """
+        if not self.use_redis or time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis_client is None:
+            import redis
+            from redis.backoff import NoBackoff
+            from redis.retry import Retry
+            from service.redis_config import REDIS_HOST, REDIS_PORT, REDIS_DB
+            # 생성 시에는 연결하지 않음 (첫 명령에서 연결, 끊기면 커넥션 풀이 다시 연결)
+            self._redis_client = redis.Redis(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                db=REDIS_DB,
+                decode_responses=True,
+                socket_connect_timeout=RESULT_CACHE_REDIS_TIMEOUT_SECONDS,
+                socket_timeout=RESULT_CACHE_REDIS_TIMEOUT_SECONDS,
+                retry=Retry(NoBackoff(), 0)  # 실패는 재시도 대신 백오프로 처리
+            )
+        return self._redis_client
+
+    def _redis_failed(self, action: str, error: Exception):
+        """Redis 오류를 기록하고 백오프 시간 동안 Redis 계층을 건너뛰도록 합니다."""
+        self.redis_errors += 1
+        self._redis_retry_at = time.monotonic() + self.redis_backoff_seconds
+        print(f"⚠️ Redis 결과 캐시 {action} 실패, {self.redis_backoff_seconds:.0f}초 동안 로컬 캐시만 사용: {error}")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        캐시된 결과를 반환합니다 (로컬 → Redis 순서). 반환값은 복사본이므로 수정해도 됩니다.
+        """
+        if not self.enabled:
+            return None
+
+        value = self._local.get(key)
+        if value is not None:
+            self.local_hits += 1
+            return copy.deepcopy(value)
+
+        client = self._redis()
+        if client is not None:
+            try:
+                raw = client.get(key)
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._local.set(key, value)
+                    self.redis_hits += 1
+                    return copy.deepcopy(value)
+            except Exception as e:
+                self._redis_failed("조회", e)
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict):
+        """결과를 저장합니다 (JSON 직렬화 가능한 딕셔너리)."""
+        if not self.enabled:
+            return
+
+        value = copy.deepcopy(value)
+        self._local.set(key, value)
+
+        client = self._redis()
+        if client is not None:
+            try:
+                client.setex(key, max(1, int(self._local.ttl_seconds)), json.dumps(value, ensure_ascii=False))
+            except Exception as e:
+                self._redis_failed("저장", e)
+
+    def get_status(self) -> Dict:
+        """캐시 적중/미스 통계를 반환합니다."""
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "model_version": self.model_version,
+            "entries": len(self._local),
+            "max_entries": self._local.max_entries,
+            "ttl_seconds": self._local.ttl_seconds,
+            "redis": self.use_redis,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.local_hits + self.redis_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self._local.evictions,
+            "expirations": self._local.expirations,
+            "redis_errors": self.redis_errors,
+            "redis_backoff_remaining_seconds": round(max(0.0, self._redis_retry_at - time.monotonic()), 1)
+        }
+
+
+class SeparationCache:
+    """
+    오디오 해시 → 모든 부품의 mel 텐서 캐시 (로컬 LRU/TTL)
+
+    분리된 스템 원본(소스 6개 x 2채널 x 10초 ≈ 21MB/클립) 대신 부품별 mel
+    ([1, 240, 240] x 5 ≈ 1.2MB/클립)을 보관합니다. 후속 요청은 ONNX 단계만 실행합니다.
+    텐서는 Redis로 공유하지 않습니다.
+    """
+
+    def __init__(
+        self,
+        model_version: str,
+        enabled: bool = SEPARATION_CACHE_ENABLED,
+        max_entries: int = SEPARATION_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = SEPARATION_CACHE_TTL_SECONDS
+    ):
+        """
+        Args:
+            model_version: 모델 버전 지문 (model_version_fingerprint)
+            enabled: False면 항상 미스 (저장하지 않음)
+            max_entries: 최대 클립 수
+            ttl_seconds: 항목 유효 시간 (초)
+        """
+        self.model_version = model_version
+        self.enabled = enabled
+        self._local = LRUTTLCache(max_entries, ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, audio_hash: str, profile: str) -> Optional[Dict]:
+        """
+        {부품명: mel 텐서}를 반환합니다. 텐서는 캐시와 공유되므로 제자리 수정하면 안 됩니다.
+        같은 오디오라도 분리 프로필이 다르면 별도 항목입니다.
+        """
+        if not self.enabled:
+            return None
+
+        part_mels = self._local.get(f"{self.model_version}:{profile}:{audio_hash}")
+        if part_mels is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(part_mels)
+
+    def set(self, audio_hash: str, profile: str, part_mels: Dict):
+        if self.enabled:
+            self._local.set(f"{self.model_version}:{profile}:{audio_hash}", dict(part_mels))
+
+    def get_status(self) -> Dict:
+        """캐시 적중/미스 통계를 반환합니다."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._local),
+            "max_entries": self._local.max_entries,
+            "ttl_seconds": self._local.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self._local.evictions
+        }
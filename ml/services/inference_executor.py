@@ -0,0 +1,170 @@
+"""
+추론 실행기 (Inference Executor)
+Demucs + ONNX 분석 파이프라인을 이벤트 루프 밖의 스레드/프로세스 풀에서 실행합니다.
+
+- thread: 같은 프로세스의 AudioAnalysisService(모델)를 워커 스레드에서 사용
+- process: fork된 워커 프로세스가 부모에서 로드된 Demucs 모델을 그대로 물려받아 사용
+  (ONNX 세션은 fork 안전하지 않으므로 워커 시작 시 다시 로드)
+  결과/분리 캐시, 프리스크린 기준선, 마이크로 배처 통계는 워커 프로세스마다 따로 존재하며
+  부모 프로세스와 공유되지 않으므로 /server/health에서 제외됩니다.
+"""
+
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, List
+
+from ml.pipeline.metrics import INFERENCE_PENDING
+
+# 실행기 설정 (.env 파일에서 읽기)
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")  # thread | process
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "16"))  # 실행 중 + 대기 중 작업 상한
+INFERENCE_TORCH_THREADS = int(os.getenv("INFERENCE_TORCH_THREADS", "0"))  # 0이면 torch 기본값 사용
+
+# process 모드에서 워커 프로세스마다 따로 쌓이는 상태 (부모의 헬스체크 값은 항상 0이므로 응답에서 제외)
+PROCESS_WORKER_LOCAL_STATS = ("onnx_batching", "result_cache", "separation_cache", "prescreen")
+
+
+class InferenceQueueFullError(RuntimeError):
+    """대기 중인 추론 작업이 상한을 넘었을 때 발생합니다."""
+
+
+def _init_process_worker(torch_threads: int, onnx_model_base_path: str, parts: List[str]):
+    """
+    프로세스 워커 초기화: fork 이후 torch 스레드 수를 다시 설정하고 ONNX 세션을 새로 로드합니다.
+    부모의 ONNX 세션(ORT 스레드 풀, 스레드별 IO binding 버퍼)과 마이크로 배처 스레드는
+    fork를 거치면 쓸 수 없어 그대로 쓰면 첫 분류에서 멈출 수 있습니다.
+    """
+    import torch
+    from ml.pipeline.onnx import reset_onnx_sessions, preload_onnx_sessions
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+    reset_onnx_sessions()
+    preload_onnx_sessions(onnx_model_base_path, parts)
+    print(f"🧵 추론 워커 프로세스 시작 (pid: {os.getpid()}, torch threads: {torch.get_num_threads()})")
+
+
+def _run_in_process_worker(method_name: str, *args, **kwargs):
+    """워커 프로세스에서 (fork로 물려받은) 전역 서비스의 메서드를 실행합니다."""
+    from .audio_service import get_audio_service
+    service = get_audio_service()
+    return getattr(service, method_name)(*args, **kwargs)
+
+
+class InferenceExecutor:
+    """분석 서비스 메서드를 제한된 풀에서 실행하고 awaitable로 돌려주는 실행기"""
+
+    def __init__(
+        self,
+        service,
+        executor_type: str = INFERENCE_EXECUTOR,
+        max_workers: int = INFERENCE_WORKERS,
+        max_pending: int = INFERENCE_MAX_PENDING,
+        torch_threads: int = INFERENCE_TORCH_THREADS
+    ):
+        """
+        실행기 초기화
+
+        Args:
+            service: 모델을 소유한 AudioAnalysisService 인스턴스
+            executor_type: "thread" 또는 "process"
+            max_workers: 동시에 실행할 워커 수
+            max_pending: 실행 중 + 대기 중 작업 상한 (초과 시 InferenceQueueFullError)
+            torch_threads: 워커에서 사용할 torch 스레드 수 (0이면 기본값)
+        """
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"❌ 지원하지 않는 실행기 유형: {executor_type} (thread 또는 process)")
+
+        self.service = service
+        self.executor_type = executor_type
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self.torch_threads = torch_threads
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+        if executor_type == "process":
+            # fork: 부모에서 로드된 Demucs 모델을 자식이 복사 없이 물려받음 (copy-on-write)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_process_worker,
+                initargs=(torch_threads, service.onnx_model_base_path, list(service.loaded_parts))
+            )
+        else:
+            if torch_threads > 0:
+                import torch
+                torch.set_num_threads(torch_threads)
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inference"
+            )
+
+        print(f"🧵 추론 실행기 준비: {executor_type} x {self.max_workers} (최대 대기: {self.max_pending})")
+
+    @property
+    def pending(self) -> int:
+        """실행 중 + 대기 중인 작업 수"""
+        return self._pending
+
+    async def run(self, method_name: str, *args, **kwargs):
+        """
+        서비스 메서드를 풀에서 실행하고 결과를 기다립니다.
+
+        Args:
+            method_name: 실행할 AudioAnalysisService 메서드 이름
+            *args, **kwargs: 메서드 인자 (process 모드에서는 pickle 가능해야 함)
+
+        Returns:
+            메서드 반환값
+        """
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise InferenceQueueFullError(
+                f"추론 대기열이 가득 찼습니다 ({self._pending}/{self.max_pending})"
+            )
+
+        if self.executor_type == "process":
+            call = functools.partial(_run_in_process_worker, method_name, *args, **kwargs)
+        else:
+            call = functools.partial(getattr(self.service, method_name), *args, **kwargs)
+
+        # _pending은 이벤트 루프 스레드에서만 변경되므로 별도 락이 필요 없음
+        self._pending += 1
+        INFERENCE_PENDING.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._pool, call)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+            INFERENCE_PENDING.dec()
+
+    def get_status(self) -> Dict:
+        """실행기 상태를 반환합니다."""
+        status = {
+            "executor_type": self.executor_type,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected
+        }
+        if self.executor_type == "process":
+            status["worker_local_stats"] = list(PROCESS_WORKER_LOCAL_STATS)
+        return status
+
+    def shutdown(self, wait: bool = True):
+        """풀을 종료합니다."""
+        self._pool.shutdown(wait=wait)
+        print("🛑 추론 실행기 종료")
@@ -0,0 +1,206 @@
+"""
+혼합음 사전 선별 (Pre-screen)
+Demucs 분리 전에 원본 혼합음의 mel로 장치별 정상 기준선과의 거리를 계산해,
+확실히 정상인 클립은 분리/부품 분류 없이 그 장치의 최근 정상 결과로 응답합니다.
+
+- 기준선: 전체 경로에서 모든 부품이 정상으로 판정된 클립의 mel 대역별 평균/시간 변동 (Welford 누적 평균/분산)
+- 점수: 기준선 대비 특징 z-score 제곱의 평균 (기준선 분포와 같으면 약 1)
+- 선별(screened): 기준선 샘플이 충분하고, 점수가 임계값 이하이고, 최근 정상 결과가 있고 오래되지 않았을 때
+- 애매하거나 기준선이 없는 클립, 주기적 재확인 차례인 클립은 전체 분리 경로로 진행
+
+기준선은 프로세스별 메모리에 보관합니다 (process 실행기에서는 워커마다 따로 학습).
+"""
+
+import os
+import copy
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from ml.pipeline.mel import compute_mel_tensor
+from ml.pipeline.metrics import stage_timer
+from ml.pipeline.integrated_analysis import summarize_classification_results
+
+# 사전 선별 설정 (.env 파일에서 읽기)
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "false").lower() == "true"
+PRESCREEN_MIN_SAMPLES = int(os.getenv("PRESCREEN_MIN_SAMPLES", "20"))              # 선별을 시작할 최소 정상 클립 수
+PRESCREEN_SCORE_THRESHOLD = float(os.getenv("PRESCREEN_SCORE_THRESHOLD", "1.5"))   # 이 점수 이하면 확실히 정상
+PRESCREEN_MAX_PROBABILITY = float(os.getenv("PRESCREEN_MAX_PROBABILITY", "0.3"))   # 기준선에 넣을 정상 결과의 최대 이상 확률
+PRESCREEN_MAX_AGE_SECONDS = float(os.getenv("PRESCREEN_MAX_AGE_SECONDS", "3600"))  # 재사용할 정상 결과의 최대 나이
+PRESCREEN_FULL_EVERY = int(os.getenv("PRESCREEN_FULL_EVERY", "10"))                # 연속 선별 N회마다 전체 경로로 재확인
+PRESCREEN_MAX_DEVICES = int(os.getenv("PRESCREEN_MAX_DEVICES", "1024"))
+
+_VARIANCE_FLOOR = 1e-4  # 분산이 거의 0인 특징이 점수를 지배하지 않도록
+
+
+def mixture_features(normalized_audio) -> np.ndarray:
+    """
+    레벨 조정된 혼합음의 mel 특징 (mel 대역별 시간 평균 + 시간 표준편차, 길이 480)
+
+    :param normalized_audio: normalize_audio가 반환한 모노 오디오 (numpy 배열, shape: [samples])
+    """
+    mel = compute_mel_tensor(torch.as_tensor(normalized_audio).float())[0]  # [240, 240] (mel, time)
+    return torch.cat([mel.mean(dim=1), mel.std(dim=1)]).numpy().astype(np.float64)
+
+
+class DeviceBaseline:
+    """한 장치의 정상 혼합음 특징 분포와 최근 정상 분석 결과"""
+
+    def __init__(self, num_features: int):
+        self.count = 0
+        self.mean = np.zeros(num_features)
+        self.m2 = np.zeros(num_features)
+        self.last_result = None          # 최근 전체 경로 정상 결과 (analysis_results)
+        self.last_result_at = 0.0
+        self.screened_since_full = 0
+
+    def add(self, features: np.ndarray):
+        """Welford 방식으로 평균/분산을 누적합니다."""
+        self.count += 1
+        delta = features - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (features - self.mean)
+
+    def score(self, features: np.ndarray) -> float:
+        variance = np.maximum(self.m2 / max(1, self.count - 1), _VARIANCE_FLOOR)
+        return float(np.mean((features - self.mean) ** 2 / variance))
+
+
+class MixturePreScreener:
+    """장치별 정상 기준선으로 분리 전에 확실히 정상인 클립을 선별합니다 (스레드 안전)."""
+
+    def __init__(
+        self,
+        enabled: bool = PRESCREEN_ENABLED,
+        min_samples: int = PRESCREEN_MIN_SAMPLES,
+        score_threshold: float = PRESCREEN_SCORE_THRESHOLD,
+        max_probability: float = PRESCREEN_MAX_PROBABILITY,
+        max_age_seconds: float = PRESCREEN_MAX_AGE_SECONDS,
+        full_every: int = PRESCREEN_FULL_EVERY,
+        max_devices: int = PRESCREEN_MAX_DEVICES
+    ):
+        """
+        Args:
+            enabled: False면 항상 전체 경로
+            min_samples: 선별을 시작할 장치별 최소 정상 클립 수
+            score_threshold: 이 점수 이하면 확실히 정상으로 선별
+            max_probability: 모든 부품 이상 확률이 이 값 이하인 결과만 기준선/재사용 대상
+            max_age_seconds: 재사용할 정상 결과의 최대 나이 (초)
+            full_every: 연속 선별 N회마다 한 번은 전체 경로로 재확인 (0이면 사용 안 함)
+            max_devices: 기준선을 보관할 최대 장치 수 (LRU)
+        """
+        self.enabled = enabled
+        self.min_samples = min_samples
+        self.score_threshold = score_threshold
+        self.max_probability = max_probability
+        self.max_age_seconds = max_age_seconds
+        self.full_every = full_every
+        self.max_devices = max_devices
+        self._baselines = OrderedDict()  # device_name → DeviceBaseline
+        self._lock = threading.Lock()
+        self.screened = 0
+        self.passed_through = 0
+
+    def check(self, device_name: str, features: np.ndarray, target_parts: List[str]) -> Dict:
+        """
+        선별 여부를 판정합니다.
+
+        Returns:
+            dict: {"screened": bool, "score": float|None, "reason": str, "analysis_results": dict|None}
+                screened가 True면 analysis_results에 target_parts로 추린 최근 정상 결과가 들어 있음
+        """
+        with self._lock:
+            baseline = self._baselines.get(device_name)
+            if baseline is not None:
+                self._baselines.move_to_end(device_name)
+            decision = self._decide(baseline, features, target_parts)
+            if decision["screened"]:
+                baseline.screened_since_full += 1
+                self.screened += 1
+            else:
+                self.passed_through += 1
+        return decision
+
+    def _decide(self, baseline: Optional[DeviceBaseline], features, target_parts) -> Dict:
+        if baseline is None or baseline.count < self.min_samples:
+            return {"screened": False, "score": None, "reason": "baseline_warming_up", "analysis_results": None}
+
+        score = round(baseline.score(features), 3)
+        if score > self.score_threshold:
+            return {"screened": False, "score": score, "reason": "ambiguous", "analysis_results": None}
+        if baseline.last_result is None:
+            return {"screened": False, "score": score, "reason": "no_recent_normal_result", "analysis_results": None}
+        if time.time() - baseline.last_result_at > self.max_age_seconds:
+            return {"screened": False, "score": score, "reason": "normal_result_expired", "analysis_results": None}
+        if self.full_every > 0 and baseline.screened_since_full >= self.full_every:
+            return {"screened": False, "score": score, "reason": "periodic_full_check", "analysis_results": None}
+
+        results_by_part = {r["part_name"]: r for r in baseline.last_result["results"]}
+        if not all(part in results_by_part for part in target_parts):
+            return {"screened": False, "score": score, "reason": "parts_not_covered", "analysis_results": None}
+
+        return {
+            "screened": True,
+            "score": score,
+            "reason": "confidently_normal",
+            "result_age_seconds": round(time.time() - baseline.last_result_at, 1),
+            "analysis_results": summarize_classification_results(
+                [copy.deepcopy(results_by_part[part]) for part in target_parts], baseline.last_result["device_name"]
+            )
+        }
+
+    def update(self, device_name: str, features: np.ndarray, analysis_results: Dict):
+        """
+        전체 경로 결과로 기준선을 갱신합니다. 확실한 정상 결과만 기준선에 넣고,
+        이상이 하나라도 나오면 다음 정상 결과가 나올 때까지 선별을 멈춥니다.
+        """
+        is_normal = analysis_results["anomaly_count"] == 0 and all(
+            r["anomaly_probability"] <= self.max_probability for r in analysis_results["results"]
+        )
+        with self._lock:
+            baseline = self._baselines.get(device_name)
+            if baseline is None:
+                baseline = DeviceBaseline(len(features))
+                self._baselines[device_name] = baseline
+                while len(self._baselines) > self.max_devices:
+                    self._baselines.popitem(last=False)
+            self._baselines.move_to_end(device_name)
+
+            baseline.screened_since_full = 0
+            if is_normal:
+                baseline.add(features)
+                baseline.last_result = copy.deepcopy(analysis_results)
+                baseline.last_result_at = time.time()
+            else:
+                baseline.last_result = None
+
+    def screen(self, device_name: str, normalized_audio, target_parts: List[str]):
+        """
+        특징을 계산하고 선별 여부를 판정합니다.
+
+        Returns:
+            tuple: (특징, check 결과)
+        """
+        with stage_timer("prescreen"):
+            features = mixture_features(normalized_audio)
+            return features, self.check(device_name, features, target_parts)
+
+    def get_status(self) -> Dict:
+        """선별 통계를 반환합니다."""
+        with self._lock:
+            total = self.screened + self.passed_through
+            ready = sum(1 for b in self._baselines.values() if b.count >= self.min_samples)
+            return {
+                "enabled": self.enabled,
+                "devices": len(self._baselines),
+                "devices_ready": ready,
+                "min_samples": self.min_samples,
+                "score_threshold": self.score_threshold,
+                "screened": self.screened,
+                "passed_through": self.passed_through,
+                "screened_rate": round(self.screened / total, 3) if total else 0.0
+            }
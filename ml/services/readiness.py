@@ -0,0 +1,183 @@
+"""
+모델 로딩/워밍업 준비 상태 (Readiness)
+서버는 포트를 먼저 열고, 무거운 import(torch/demucs/onnxruntime)·모델 로딩·워밍업 추론은
+백그라운드 스레드에서 진행합니다.
+
+- /server/health: 프로세스가 살아 있는지 (liveness, 로딩 중에도 즉시 200)
+- /server/ready: 모든 구성 요소가 로드되고 워밍업까지 끝났는지 (readiness, 준비 전에는 503)
+
+구성 요소별로 상태(pending → loading → ready/missing/failed), 로딩 시간, 워밍업 추론 지연을 기록합니다.
+이 모듈은 torch를 import하지 않습니다.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# 준비 상태 설정 (.env 파일에서 읽기)
+BACKGROUND_MODEL_LOAD = os.getenv("BACKGROUND_MODEL_LOAD", "true").lower() == "true"  # false면 startup에서 동기 로딩
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() == "true"                   # 더미 클립으로 워밍업 추론
+
+
+class ModelsNotReadyError(RuntimeError):
+    """백그라운드 모델 로딩이 끝나기 전에 서비스를 요청했을 때 발생합니다."""
+
+
+class ReadinessTracker:
+    """구성 요소별 로딩/워밍업 진행 상태 (스레드 안전)"""
+
+    def __init__(self):
+        self.state = "not_started"  # not_started → importing → loading → warming_up → ready | failed
+        self.background = False
+        self.service = None         # 로딩이 끝난 AudioAnalysisService
+        self.error = None
+        self._components = OrderedDict()  # 이름 → {"status", "load_seconds", "warmup_ms", "error"}
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._ready_at = None
+
+    def _component(self, name: str) -> Dict:
+        return self._components.setdefault(
+            name, {"status": "pending", "load_seconds": None, "warmup_ms": None, "error": None}
+        )
+
+    def set_state(self, state: str):
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = time.perf_counter()
+            self.state = state
+            if state == "ready":
+                self._ready_at = time.perf_counter()
+        print(f"🚦 준비 상태: {state}")
+
+    def expect(self, names: List[str]):
+        """앞으로 로드할 구성 요소들을 pending으로 등록합니다 (진행률 계산용)."""
+        with self._lock:
+            for name in names:
+                self._component(name)
+
+    @contextmanager
+    def track(self, name: str):
+        """구성 요소 로딩 구간을 기록합니다. 예외가 나면 failed로 표시하고 다시 발생시킵니다."""
+        with self._lock:
+            self._component(name)["status"] = "loading"
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                component = self._component(name)
+                component["status"] = "failed"
+                component["error"] = str(e)
+            raise
+        with self._lock:
+            component = self._component(name)
+            if component["status"] == "loading":
+                component["status"] = "ready"
+            component["load_seconds"] = round(time.perf_counter() - start, 3)
+
+    def mark(self, name: str, status: str, error: Optional[str] = None):
+        """구성 요소 상태를 직접 지정합니다 (예: 모델 파일이 없으면 missing)."""
+        with self._lock:
+            component = self._component(name)
+            component["status"] = status
+            component["error"] = error
+
+    def record_warmup(self, name: str, seconds: float):
+        with self._lock:
+            self._component(name)["warmup_ms"] = round(seconds * 1000, 2)
+
+    def fail(self, error: Exception):
+        with self._lock:
+            self.state = "failed"
+            self.error = str(error)
+        print(f"❌ 모델 초기화 실패: {error}")
+
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+
+    def get_status(self) -> Dict:
+        """구성 요소별 진행 상태와 워밍업 지연을 반환합니다."""
+        with self._lock:
+            components = {name: dict(component) for name, component in self._components.items()}
+            now = time.perf_counter()
+            elapsed = round(now - self._started_at, 3) if self._started_at is not None else None
+            startup = round(self._ready_at - self._started_at, 3) if self._ready_at is not None else None
+            state, error = self.state, self.error
+
+        done = sum(1 for c in components.values() if c["status"] in ("ready", "missing"))
+        warmup_ms = [c["warmup_ms"] for c in components.values() if c["warmup_ms"] is not None]
+        return {
+            "ready": state == "ready",
+            "state": state,
+            "background": self.background,
+            "progress": round(done / len(components), 3) if components else 0.0,
+            "elapsed_seconds": elapsed,
+            "startup_seconds": startup,
+            "warmup_total_ms": round(sum(warmup_ms), 2) if warmup_ms else None,
+            "components": components,
+            "error": error,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+
+def _initialize_models(tracker: ReadinessTracker, warmup: bool):
+    """무거운 import → 서비스(모델) 생성 → 워밍업 순서로 초기화합니다."""
+    tracker.expect(["imports"])
+    tracker.set_state("importing")
+    with tracker.track("imports"):
+        from .audio_service import get_audio_service
+
+    tracker.set_state("loading")
+    service = get_audio_service()  # 구성 요소별 로딩은 AudioAnalysisService가 기록
+    tracker.service = service
+
+    if warmup:
+        tracker.set_state("warming_up")
+        service.warm_up()
+    tracker.set_state("ready")
+
+
+def _initialize_in_background(tracker: ReadinessTracker, warmup: bool):
+    try:
+        _initialize_models(tracker, warmup)
+    except Exception as e:
+        tracker.fail(e)
+
+
+def start_model_initialization(background: bool = BACKGROUND_MODEL_LOAD, warmup: bool = MODEL_WARMUP):
+    """
+    모델 초기화를 시작합니다.
+
+    Args:
+        background: True면 데몬 스레드에서 초기화하고 바로 반환 (그동안 /server/ready는 503)
+        warmup: True면 로딩 후 더미 클립으로 Demucs와 모든 ONNX 세션을 한 번 실행
+    """
+    tracker = get_readiness()
+    tracker.background = background
+    if not background:
+        try:
+            _initialize_models(tracker, warmup)
+        except Exception as e:
+            tracker.fail(e)
+            raise
+        return
+
+    thread = threading.Thread(
+        target=_initialize_in_background, args=(tracker, warmup), name="model-initialization", daemon=True
+    )
+    thread.start()
+    print("🧵 백그라운드 모델 초기화 시작 (진행 상태: /server/ready)")
+
+
+# 전역 준비 상태
+_readiness = ReadinessTracker()
+
+
+def get_readiness() -> ReadinessTracker:
+    """전역 준비 상태 추적기를 반환합니다."""
+    return _readiness
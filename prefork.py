@@ -0,0 +1,144 @@
+"""
+멀티 워커 프리포크 런처
+`uvicorn main:app --workers N`은 워커마다 Demucs 체크포인트를 따로 torch.load하므로 RSS가 워커 수만큼 늘어납니다.
+이 런처는 부모 프로세스에서 Demucs 가중치를 한 번 로드한 뒤 워커를 fork해,
+읽기 전용 가중치 페이지를 copy-on-write로 공유합니다.
+
+- 부모: 포트 바인딩, Demucs 로드(preload_model), gc.freeze, 워커 fork 및 감시(죽으면 다시 fork)
+- 워커: 물려받은 소켓으로 uvicorn 실행, startup에서 ONNX 세션/실행기/Redis 풀을 워커별로 생성
+  (ONNX Runtime 세션은 생성 시 스레드 풀을 만들어 fork 안전하지 않으므로 워커에서 생성)
+
+실행 (프로젝트 루트에서):
+    python prefork.py --workers 4
+    PREFORK_WORKERS=4 python prefork.py
+
+워커별 메모리 비교: python -m benchmarks.worker_memory --workers 4
+"""
+
+import os
+import gc
+import signal
+import socket
+import argparse
+
+from dotenv import load_dotenv
+
+# .env 파일 로드 (config 모듈들이 import 시점에 환경 변수를 읽으므로 가장 먼저)
+load_dotenv()
+
+PREFORK_WORKERS = int(os.getenv("PREFORK_WORKERS", "2"))
+# 워커별 torch 스레드 수 (0이면 CPU 코어 수 / 워커 수)
+PREFORK_TORCH_THREADS = int(os.getenv("PREFORK_TORCH_THREADS", "0"))
+
+
+def preload_shared_models():
+    """
+    부모 프로세스에서 Demucs 모델을 로드하고, 지금까지 만든 객체를 GC 추적에서 제외합니다.
+    gc.freeze를 하지 않으면 워커의 GC가 부모 객체 헤더를 건드려 공유 페이지가 복사됩니다.
+    """
+    from ml.pipeline.model import preload_model
+    model, source_names = preload_model()
+    gc.collect()
+    gc.freeze()
+    print(f"🧊 공유 모델 준비 완료 (GC freeze: {gc.get_freeze_count()}개 객체)")
+    return model, source_names
+
+
+def worker_torch_threads(workers):
+    """워커들이 코어를 나눠 쓰도록 워커별 torch 스레드 수를 정합니다."""
+    if PREFORK_TORCH_THREADS > 0:
+        return PREFORK_TORCH_THREADS
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def bind_socket(host, port):
+    """부모에서 한 번만 바인딩해 모든 워커가 같은 listen 소켓에서 accept합니다."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, host, port, torch_threads):
+    """fork된 워커에서 uvicorn 서버를 실행합니다 (반환하지 않음)."""
+    import torch
+    import uvicorn
+
+    # 부모의 시그널 핸들러 대신 uvicorn의 graceful shutdown 핸들러 사용
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    torch.set_num_threads(torch_threads)
+    print(f"👷 워커 시작 (pid: {os.getpid()}, torch threads: {torch_threads})")
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="info"))
+    exit_code = 0
+    try:
+        server.run(sockets=[sock])
+    except BaseException as e:
+        print(f"❌ 워커 종료 (pid: {os.getpid()}): {e}")
+        exit_code = 1
+    finally:
+        # fork된 자식은 부모의 atexit/정리 코드를 실행하지 않도록 바로 종료
+        os._exit(exit_code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Demucs 가중치를 공유하는 멀티 워커 프리포크 런처")
+    parser.add_argument("--workers", type=int, default=PREFORK_WORKERS, help="워커 프로세스 수")
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8000")))
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    torch_threads = worker_torch_threads(workers)
+    sock = bind_socket(args.host, args.port)
+    print(f"🚀 프리포크 런처 시작: {args.host}:{args.port}, 워커 {workers}개 (pid: {os.getpid()})")
+
+    preload_shared_models()
+    # 앱/라우터 모듈도 fork 전에 import해 워커가 공유 (모델 이외의 서비스 초기화는 워커 startup에서 실행)
+    from main import app
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            run_worker(app, sock, args.host, args.port, torch_threads)
+        children.add(pid)
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        print(f"🛑 종료 신호 수신 ({signal.Signals(signum).name}), 워커 종료 중...")
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    for _ in range(workers):
+        spawn()
+
+    # 워커 감시: 비정상 종료된 워커는 다시 fork (부모의 공유 모델을 그대로 물려받음)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️ 워커 종료됨 (pid: {pid}, 상태: {os.waitstatus_to_exitcode(status)}), 다시 시작")
+            spawn()
+
+    sock.close()
+    print("✅ 모든 워커 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,23 @@
 오디오 분석, 부품 목록 등 개발/테스트에 필요한 엔드포인트들
 """
 import os
-import tempfile
+import time
 import shutil
+import tempfile
 from typing import List, Optional
 from datetime import datetime
 
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form, BackgroundTasks
 from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from redis.exceptions import RedisError
 
-from service import get_audio_service
-from service.device_redis_repository import update_device_normal_score
+from service import get_audio_service, ModelsNotReadyError
+from ml.services.inference_executor import InferenceQueueFullError
+from ml.pipeline.metrics import REQUESTS_TOTAL, REQUEST_SECONDS
+from ml.pipeline.config import SEPARATION_PROFILES
+from service.device_redis_repository import record_normal_score, update_device_fields, get_device_fields
 from service.redis_pubsub import publish_low_normal_score_alert
 
 # 라우터 생성
@@ -59,22 +65,6 @@ async def update_device_status(request: DeviceUpdateRequest):
     - **aiText**: AI 분석 텍스트
     """
     try:
-        # Redis 연결 및 업데이트
-        import redis
-        
-        # Redis 클라이언트 생성
-        redis_client = redis.Redis(host='redis-server', port=6379, db=0, decode_responses=True)
-        
-        # 디바이스 키
-        device_key = f"device:{request.deviceId}"
-        
-        # 기존 디바이스 존재 확인
-        if not redis_client.exists(device_key):
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Device {request.deviceId} not found in Redis"
-            )
-        
         # Redis HSET으로 필드 업데이트
         update_data = {
             "normalScore": str(request.normalScore),
@@ -82,8 +72,12 @@ async def update_device_status(request: DeviceUpdateRequest):
             "aiText": request.aiText
         }
         
-        # 업데이트 수행
-        updated_fields = redis_client.hset(device_key, mapping=update_data)
+        # 기존 디바이스 존재 확인 + 업데이트 (공유 커넥션 풀, 한 번의 왕복)
+        if not await update_device_fields(request.deviceId, update_data):
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Device {request.deviceId} not found in Redis"
+            )
         
         print(f"📊 Device {request.deviceId} 업데이트 완료:")
         print(f"   - normalScore: {request.normalScore}")
@@ -93,7 +87,7 @@ async def update_device_status(request: DeviceUpdateRequest):
         # normalScore가 0.6 이하면 알림 발행
         if request.normalScore <= 0.6:
             try:
-                publish_low_normal_score_alert(request.deviceId, request.normalScore)
+                await publish_low_normal_score_alert(request.deviceId, request.normalScore)
                 print(f"🚨 낮은 normalScore 알림 발행: {request.normalScore}")
             except Exception as alert_error:
                 print(f"⚠️ 알림 발행 실패: {alert_error}")
@@ -105,7 +99,7 @@ async def update_device_status(request: DeviceUpdateRequest):
             timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         )
         
-    except redis.RedisError as redis_error:
+    except RedisError as redis_error:
         print(f"❌ Redis 오류: {redis_error}")
         raise HTTPException(
             status_code=500, 
@@ -128,24 +122,14 @@ async def get_device_info(device_id: int):
     Redis에서 특정 디바이스의 정보를 조회합니다.
     """
     try:
-        import redis
-        
-        # Redis 클라이언트 생성
-        redis_client = redis.Redis(host='redis-server', port=6379, db=0, decode_responses=True)
-        
-        # 디바이스 키
-        device_key = f"device:{device_id}"
-        
-        # 디바이스 존재 확인
-        if not redis_client.exists(device_key):
+        # 모든 필드 조회 (비어 있으면 디바이스 없음)
+        device_data = await get_device_fields(device_id)
+        if device_data is None:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Device {device_id} not found in Redis"
             )
         
-        # 모든 필드 조회
-        device_data = redis_client.hgetall(device_key)
-        
         return {
             "success": True,
             "deviceId": device_id,
@@ -153,7 +137,7 @@ async def get_device_info(device_id: int):
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-    except redis.RedisError as redis_error:
+    except RedisError as redis_error:
         print(f"❌ Redis 오류: {redis_error}")
         raise HTTPException(
             status_code=500, 
@@ -173,7 +157,7 @@ async def get_device_info(device_id: int):
 @router.get("/parts", summary="분석 가능한 부품 목록")
 async def get_available_parts():
     """분석 가능한 부품 목록을 반환합니다."""
-    service = get_audio_service()
+    service = _get_ready_service()
     parts = service.get_available_parts()
     return {
         "available_parts": parts,
@@ -182,12 +166,89 @@ async def get_available_parts():
     }
 
 
+def _get_ready_service():
+    """분석 서비스를 반환합니다. 백그라운드 모델 로딩이 끝나지 않았으면 503."""
+    try:
+        return get_audio_service()
+    except ModelsNotReadyError as e:
+        raise HTTPException(status_code=503, detail=f"{e}. /server/ready로 진행 상태를 확인하세요.",
+                            headers={"Retry-After": "5"})
+
+
+def _spool_upload_to_disk(file: UploadFile) -> str:
+    """업로드를 청크 단위로 디스크 임시 파일에 복사하고 경로를 반환합니다 (호출 측에서 삭제)."""
+    file.file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        shutil.copyfileobj(file.file, f, 1024 * 1024)
+        return f.name
+
+
+def _parse_target_parts(target_parts: Optional[str]) -> Optional[List[str]]:
+    """콤마로 구분된 target_parts 폼 값을 리스트로 파싱합니다 (빈 이름과 중복은 제거, 순서는 유지)."""
+    if not target_parts:
+        return None
+    parts = list(dict.fromkeys(part.strip() for part in target_parts.split(',') if part.strip()))
+    return parts or None
+
+
+def _parse_separation_profile(separation_profile: Optional[str]) -> Optional[str]:
+    """separation_profile 폼 값을 확인합니다 (빈 값이면 서버 기본 프로필 사용)."""
+    if not separation_profile:
+        return None
+    profile = separation_profile.strip().lower()
+    if profile not in SEPARATION_PROFILES:
+        raise HTTPException(status_code=400,
+                            detail=f"지원하지 않는 separation_profile입니다: {separation_profile} "
+                                   f"({', '.join(SEPARATION_PROFILES)})")
+    return profile
+
+
+def _record_request(endpoint: str, status: str, start: float) -> None:
+    """분석 요청 수/소요 시간 메트릭을 기록합니다."""
+    REQUESTS_TOTAL.labels(endpoint=endpoint, status=status).inc()
+    REQUEST_SECONDS.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+
+
+async def _apply_normal_score(device_id: int, result: dict) -> None:
+    """분석 결과로 normalScore를 계산해 결과에 추가하고 Redis 업데이트/알림을 수행합니다."""
+    if result["status"] != "success":
+        return
+    
+    analysis_results = result["analysis_results"]
+    total_parts = analysis_results["total_parts"]
+    
+    # 각 부품의 이상 확률을 가중 평균으로 계산 (1/n 가중치)
+    total_anomaly_score = 0.0
+    for part_result in analysis_results["results"]:
+        total_anomaly_score += part_result["anomaly_probability"]
+    
+    # normalScore: 0~1 사이 값 (이상도가 높을수록 낮은 점수)
+    avg_anomaly_probability = total_anomaly_score / total_parts if total_parts > 0 else 0.0
+    normal_score = 1.0 - avg_anomaly_probability  # 이상도를 정상도로 변환
+    
+    # Redis에 normalScore 업데이트 + 임계값 이하면 Pub/Sub 알림 (write-behind 버퍼로 배치 전송)
+    try:
+        await record_normal_score(device_id, normal_score)
+        
+        # 결과에 normalScore 추가 (Redis와 동일한 키명 사용)
+        result["analysis_results"]["normalScore"] = normal_score
+        print(f"📊 normalScore 계산: {normal_score:.3f} (평균 이상확률: {avg_anomaly_probability:.3f})")
+        
+    except Exception as redis_error:
+        print(f"⚠️ Redis 업데이트 실패: {redis_error}")
+        # Redis 실패해도 분석 결과는 반환
+        result["analysis_results"]["normalScore"] = normal_score
+
+
 @router.post("/device/analyze", response_model=AnalysisResponse, summary="오디오 파일 분석")
 async def analyze_audio(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="분석할 WAV 파일"),
     target_parts: Optional[str] = Form(None, description="분석할 부품들 (콤마로 구분, 예: fan,pump,slider)"),
-    device_id: int = Form(..., description="장치 ID")
+    device_id: int = Form(..., description="장치 ID"),
+    include_timings: bool = Form(False, description="true면 pipeline_info.timings_ms에 단계별 소요 시간 포함"),
+    separation_profile: Optional[str] = Form(None, description="분리 프로필 (fast, balanced, accurate, 빈 값이면 서버 기본값)"),
+    prescreen: bool = Form(True, description="false면 사전 선별 없이 항상 전체 분리 경로 (확인 분석용)")
 ):
     """
     WAV 파일을 업로드하여 이상 감지 분석을 수행합니다.
@@ -195,6 +256,10 @@ async def analyze_audio(
     - **file**: 분석할 WAV 파일 (10초, 44.1kHz, mono 권장)
     - **target_parts**: 분석할 부품들 (콤마로 구분, 빈 값이면 모든 부품 분석)
     - **device_id**: 장치 ID (숫자)
+    - **include_timings**: 단계별 wall/CPU 시간, 부품별 ONNX 실행 시간, 스레드/배치 설정 포함 여부
+    - **separation_profile**: 분리 품질/속도 프로필 (대량 스크리닝은 fast, 경보 장치 확인은 accurate)
+    - **prescreen**: 서버에서 사전 선별(PRESCREEN_ENABLED)이 켜져 있을 때 사용 여부.
+      선별된 응답은 pipeline_info.prescreen.screened와 analysis_results.screened가 true입니다.
 
     normalScore가 0.5 미만인 경우 Redis Pub/Sub으로 알림이 발행됩니다.
     """
@@ -204,89 +269,130 @@ async def analyze_audio(
         raise HTTPException(status_code=400, detail="WAV 파일만 업로드 가능합니다.")
     
     # target_parts 파싱
-    parsed_target_parts = None
-    if target_parts:
-        parsed_target_parts = [part.strip() for part in target_parts.split(',')]
+    parsed_target_parts = _parse_target_parts(target_parts)
+    parsed_profile = _parse_separation_profile(separation_profile)
+    service = _get_ready_service()
     
-    # 임시 파일로 저장
-    temp_file_path = None
+    start = time.perf_counter()
     try:
-        # 임시 파일 생성
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            temp_file_path = temp_file.name
-            # 업로드된 파일을 임시 파일에 복사
-            shutil.copyfileobj(file.file, temp_file)
+        # 업로드 파일을 메모리에서 바로 디코딩 (임시 파일 쓰기/읽기/삭제 없음)
+        audio_bytes = await file.read()
+        print(f"📊 파일 크기: {len(audio_bytes)} bytes")
         
-        print(f"📁 임시 파일 생성: {temp_file_path}")
-        print(f"📊 파일 크기: {os.path.getsize(temp_file_path)} bytes")
-        
-        # 오디오 분석 서비스 호출
-        service = get_audio_service()
-        result = service.analyze_audio_file(
-            wav_file_path=temp_file_path,
+        # 오디오 분석 서비스 호출 (추론 실행기에서 실행되어 이벤트 루프를 막지 않음)
+        result = await service.analyze_audio_file_async(
+            wav_file_path=audio_bytes,
             target_parts=parsed_target_parts,
-            device_name=f"device_{device_id}"
+            device_name=f"device_{device_id}",
+            include_timings=include_timings,
+            separation_profile=parsed_profile,
+            allow_prescreen=prescreen
         )
         
         # 원본 파일명 정보 추가
-        result["pipeline_info"]["original_filename"] = file.filename
+        if "pipeline_info" in result:
+            result["pipeline_info"]["original_filename"] = file.filename
         
         # normalScore 계산 및 Redis 업데이트
-        if result["status"] == "success":
-            analysis_results = result["analysis_results"]
-            total_parts = analysis_results["total_parts"]
-            
-            # 각 부품의 이상 확률을 가중 평균으로 계산 (1/n 가중치)
-            total_anomaly_score = 0.0
-            for part_result in analysis_results["results"]:
-                total_anomaly_score += part_result["anomaly_probability"]
-            
-            # normalScore: 0~1 사이 값 (이상도가 높을수록 낮은 점수)
-            avg_anomaly_probability = total_anomaly_score / total_parts if total_parts > 0 else 0.0
-            normal_score = 1.0 - avg_anomaly_probability  # 이상도를 정상도로 변환
-            
-            # Redis에 normalScore만 업데이트
-            try:
-                update_device_normal_score(device_id, normal_score)
-                
-                # 결과에 normalScore 추가 (Redis와 동일한 키명 사용)
-                result["analysis_results"]["normalScore"] = normal_score
-                print(f"📊 normalScore 계산: {normal_score:.3f} (평균 이상확률: {avg_anomaly_probability:.3f})")
-                
-                # normalScore가 0.5 이하면 Pub/Sub 알림 발행
-                publish_low_normal_score_alert(device_id, normal_score)
-                
-            except Exception as redis_error:
-                print(f"⚠️ Redis 업데이트 실패: {redis_error}")
-                # Redis 실패해도 분석 결과는 반환
-                result["analysis_results"]["normalScore"] = normal_score
+        await _apply_normal_score(device_id, result)
         
+        _record_request("analyze", result["status"], start)
         return result
         
+    except InferenceQueueFullError as e:
+        _record_request("analyze", "rejected", start)
+        raise HTTPException(status_code=503, detail=f"서버가 분석 요청을 처리 중입니다. 잠시 후 다시 시도하세요: {str(e)}")
     except Exception as e:
+        _record_request("analyze", "error", start)
         raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
+
+
+@router.post("/device/analyze/stream", response_model=AnalysisResponse, summary="긴 오디오 파일 스트리밍 분석")
+async def analyze_long_audio(
+    file: UploadFile = File(..., description="분석할 WAV 파일 (10초 이상 가능)"),
+    target_parts: Optional[str] = Form(None, description="분석할 부품들 (콤마로 구분, 예: fan,pump,slider)"),
+    device_id: int = Form(..., description="장치 ID"),
+    hop_seconds: Optional[float] = Form(None, description="윈도우 간격 (초, 빈 값이면 STREAM_HOP_DURATION)"),
+    separation_profile: Optional[str] = Form(None, description="분리 프로필 (fast, balanced, accurate, 빈 값이면 서버 기본값)")
+):
+    """
+    10초보다 긴 WAV 파일을 겹치는 10초 윈도우로 나눠 전체를 분석합니다.
+    
+    - **file**: 분석할 WAV 파일 (길이 제한 없음, 윈도우 단위로 읽어 처리)
+    - **target_parts**: 분석할 부품들 (콤마로 구분, 빈 값이면 모든 부품 분석)
+    - **device_id**: 장치 ID (숫자)
+    - **hop_seconds**: 윈도우 간격 (초)
+    - **separation_profile**: 분리 품질/속도 프로필
+
+    응답의 analysis_results.timeline에 윈도우별 부품 이상 확률이 포함되며,
+    부품별 anomaly_probability는 윈도우 평균입니다.
+    """
+    if not file.filename.lower().endswith('.wav'):
+        raise HTTPException(status_code=400, detail="WAV 파일만 업로드 가능합니다.")
+    if hop_seconds is not None and hop_seconds <= 0:
+        raise HTTPException(status_code=400, detail="hop_seconds는 0보다 커야 합니다.")
     
+    parsed_target_parts = _parse_target_parts(target_parts)
+    parsed_profile = _parse_separation_profile(separation_profile)
+    service = _get_ready_service()
+    
+    start = time.perf_counter()
+    spooled_path = None
+    try:
+        # 업로드 전체를 메모리로 읽지 않고 업로드 임시 파일에서 윈도우 구간만 읽음
+        # (process 모드는 파일 객체를 넘길 수 없으므로 디스크 경로로 전달)
+        if service.executor.executor_type == "process":
+            spooled_path = await run_in_threadpool(_spool_upload_to_disk, file)
+            wav_source = spooled_path
+        else:
+            await file.seek(0)
+            wav_source = file.file
+        
+        kwargs = {"hop_seconds": hop_seconds} if hop_seconds is not None else {}
+        result = await service.analyze_long_audio_file_async(
+            wav_file_path=wav_source,
+            target_parts=parsed_target_parts,
+            device_name=f"device_{device_id}",
+            separation_profile=parsed_profile,
+            **kwargs
+        )
+        
+        if "pipeline_info" in result:
+            result["pipeline_info"]["original_filename"] = file.filename
+        
+        # normalScore 계산 및 Redis 업데이트 (윈도우 평균 이상 확률 기준)
+        await _apply_normal_score(device_id, result)
+        
+        _record_request("analyze_stream", result["status"], start)
+        return result
+        
+    except InferenceQueueFullError as e:
+        _record_request("analyze_stream", "rejected", start)
+        raise HTTPException(status_code=503, detail=f"서버가 분석 요청을 처리 중입니다. 잠시 후 다시 시도하세요: {str(e)}")
+    except Exception as e:
+        _record_request("analyze_stream", "error", start)
+        raise HTTPException(status_code=500, detail=f"분석 중 오류가 발생했습니다: {str(e)}")
     finally:
-        # 임시 파일 정리
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-                print(f"🗑️ 임시 파일 삭제: {temp_file_path}")
-            except Exception as e:
-                print(f"⚠️ 임시 파일 삭제 실패: {e}")
+        if spooled_path is not None:
+            os.remove(spooled_path)
 
 
 @router.post("/batch/analyze", summary="배치 분석 (여러 파일)")
 async def analyze_batch(
     background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(..., description="분석할 WAV 파일들"),
-    device_id: int = Form(..., description="장치 ID")
+    device_id: int = Form(..., description="장치 ID"),
+    separation_profile: Optional[str] = Form(None, description="분리 프로필 (fast, balanced, accurate, 빈 값이면 서버 기본값)")
 ):
     """
     여러 WAV 파일을 동시에 분석합니다.
+    
+    모든 클립은 10초로 맞춰지므로 [B, 2, T] 배치로 묶어 한 번의 분리 호출로 처리합니다.
+    separation_profile은 배치의 모든 파일에 적용됩니다.
     """
     if len(files) > 10:  # 최대 10개 파일로 제한
         raise HTTPException(status_code=400, detail="최대 10개 파일까지만 업로드 가능합니다.")
+    parsed_profile = _parse_separation_profile(separation_profile)
     
     batch_results = {
         "status": "success",
@@ -295,47 +401,62 @@ async def analyze_batch(
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
     
-    service = get_audio_service()
+    service = _get_ready_service()
+    start = time.perf_counter()
+    
+    # 파일별 결과 슬롯 (WAV가 아닌 파일은 바로 에러 처리)
+    file_results = [None] * len(files)
+    batch_indices = []    # 배치 분석할 파일 인덱스
+    batch_audios = []     # batch_indices와 같은 순서의 업로드 WAV bytes
     
     for i, file in enumerate(files):
         if not file.filename.lower().endswith('.wav'):
-            batch_results["results"].append({
+            file_results[i] = {
                 "filename": file.filename,
                 "status": "error",
                 "error_message": "WAV 파일이 아닙니다."
-            })
+            }
             continue
         
-        temp_file_path = None
         try:
-            # 임시 파일 생성
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                temp_file_path = temp_file.name
-                shutil.copyfileobj(file.file, temp_file)
-            
-            # 분석 수행
-            result = service.analyze_audio_file(
-                wav_file_path=temp_file_path,
-                device_name=f"device_{device_id}_file_{i+1}"
-            )
-            
-            result["pipeline_info"]["original_filename"] = file.filename
-            batch_results["results"].append(result)
-        
+            # 업로드 파일을 메모리로 읽음 (임시 파일 없음)
+            batch_audios.append(await file.read())
+            batch_indices.append(i)
         except Exception as e:
-            batch_results["results"].append({
+            file_results[i] = {
                 "filename": file.filename,
                 "status": "error",
                 "error_message": str(e)
-            })
-        
-        finally:
-            # 임시 파일 정리
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception:
-                    pass
+            }
+    
+    # 분석 수행 (한 번의 배치 분리, 추론 실행기에서 실행)
+    if batch_indices:
+        try:
+            results = await service.analyze_audio_files_async(
+                wav_file_paths=batch_audios,
+                device_names=[f"device_{device_id}_file_{i+1}" for i in batch_indices],
+                separation_profile=parsed_profile
+            )
+            for i, result in zip(batch_indices, results):
+                if result["status"] == "success":
+                    result["pipeline_info"]["original_filename"] = files[i].filename
+                else:
+                    result["filename"] = files[i].filename
+                file_results[i] = result
+        except Exception as e:
+            for i in batch_indices:
+                file_results[i] = {
+                    "filename": files[i].filename,
+                    "status": "error",
+                    "error_message": str(e)
+                }
+    
+    batch_results["results"] = file_results
+    
+    # 요청 단위 상태: 모두 성공이면 success, 모두 실패면 error, 일부 실패면 partial
+    statuses = {result["status"] for result in file_results}
+    _record_request("batch_analyze", "success" if statuses == {"success"} else
+                    "partial" if "success" in statuses else "error", start)
     
     return batch_results
 
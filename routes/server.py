@@ -2,12 +2,17 @@
 서버 관련 라우터
 기본 정보, 헬스체크 등 서버 운영에 필요한 엔드포인트들
 """
-from fastapi import APIRouter
+import os
+from fastapi import APIRouter, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 
-from service import get_audio_service
+from service import get_audio_service, ModelsNotReadyError
+from ml.services.readiness import get_readiness
+from service.redis_write_behind import get_write_behind
+from ml.pipeline.metrics import render_metrics
 
 # 라우터 생성
 router = APIRouter(
@@ -22,6 +27,14 @@ class HealthResponse(BaseModel):
     demucs_model: str
     onnx_models_path: str
     onnx_models_available: bool
+    separation_backend: Optional[dict] = None
+    inference_executor: Optional[dict] = None
+    onnx_batching: Optional[dict] = None
+    result_cache: Optional[dict] = None
+    separation_cache: Optional[dict] = None
+    prescreen: Optional[dict] = None
+    redis_write_behind: Optional[dict] = None
+    readiness_state: Optional[str] = None
     timestamp: str
 
 
@@ -34,6 +47,8 @@ async def get_server_info():
         "service": "Audix ML Server",
         "endpoints": {
             "health": "/health",
+            "ready": "/server/ready",
+            "metrics": "/server/metrics",
             "server_info": "/server/info",
             "parts": "/developer/parts",
             "analyze": "/developer/device/analyze",
@@ -45,7 +60,48 @@ async def get_server_info():
 
 @router.get("/health", response_model=HealthResponse, summary="헬스체크")
 async def health_check():
-    """서비스 상태를 확인합니다."""
-    service = get_audio_service()
-    health_status = service.get_health_status()
+    """
+    서비스 상태를 확인합니다 (liveness).
+    모델 로딩 중에도 바로 응답하므로 프로세스 생존 확인에 사용하고, 트래픽 투입 여부는 /server/ready로 판단합니다.
+    """
+    readiness = get_readiness()
+    try:
+        service = get_audio_service()
+    except ModelsNotReadyError:
+        service = None
+    if service is None:
+        onnx_models_path = "ml/models/onnx"
+        health_status = {
+            "status": "starting" if readiness.state != "failed" else "unhealthy",
+            "demucs_model": "loading" if readiness.state != "failed" else "not_loaded",
+            "onnx_models_path": onnx_models_path,
+            "onnx_models_available": os.path.exists(onnx_models_path),
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+    else:
+        health_status = service.get_health_status()
+    health_status["redis_write_behind"] = get_write_behind().get_status()
+    health_status["readiness_state"] = readiness.state
     return health_status
+
+
+@router.get("/ready", summary="준비 상태 (readiness)")
+async def readiness_check():
+    """
+    모델 로딩과 워밍업 추론이 모두 끝났는지 확인합니다 (readiness).
+    준비되면 200, 로딩/워밍업 중이거나 실패했으면 503을 반환합니다.
+    본문에는 구성 요소별(imports, demucs, onnx:<부품>) 상태, 로딩 시간, 워밍업 지연이 들어 있습니다.
+    """
+    status = get_readiness().get_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@router.get("/metrics", summary="Prometheus 메트릭")
+async def metrics():
+    """
+    Prometheus 텍스트 형식의 메트릭을 반환합니다.
+    단계별 지연 히스토그램(decode, normalize, separation, mel, onnx), 부품별 ONNX 실행 시간,
+    Redis 쓰기 시간, 요청 수(status별), 대기열 길이, 모델 로딩 시간을 포함합니다.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -6,8 +6,23 @@ Service 패키지
 - ML 서비스는 ml.services 패키지에서 관리
 """
 
+from ml.services.readiness import ModelsNotReadyError, get_readiness
+
+
 def get_audio_service():
-    """오디오 서비스 인스턴스를 반환합니다."""
+    """
+    오디오 서비스 인스턴스를 반환합니다.
+
+    Raises:
+        ModelsNotReadyError: 백그라운드 모델 로딩이 아직 끝나지 않은 경우
+    """
+    readiness = get_readiness()
+    if readiness.background:
+        # 백그라운드 로딩 중에는 요청 스레드에서 모델을 다시 로드하지 않음
+        if readiness.service is None:
+            raise ModelsNotReadyError(f"모델 준비 중입니다 (상태: {readiness.state})")
+        return readiness.service
+
     try:
         # 모델 파일 존재 확인 로그
         import os
@@ -33,5 +48,6 @@ def get_audio_service():
 
 # 패키지에서 외부로 노출할 것들
 __all__ = [
-    "get_audio_service"
+    "get_audio_service",
+    "ModelsNotReadyError"
 ]
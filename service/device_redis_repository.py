@@ -1,19 +1,65 @@
 """
-Device Redis Repository - 간단한 normalScore 업데이트만 처리
+Device Redis Repository - 디바이스 해시(device:{id}) 조회/업데이트
+모든 접근은 service.redis_async의 공유 커넥션 풀을 사용합니다.
 """
-from .redis_config import get_redis_client
+from typing import Dict, Optional
 
-def update_device_normal_score(device_id: int, normal_score: float) -> None:
+from .redis_async import get_async_redis_client, hset_if_exists, hgetall_if_exists
+from .redis_pubsub import publish_low_normal_score_alert
+from .redis_write_behind import get_write_behind
+from ml.pipeline.metrics import REDIS_WRITE_SECONDS
+
+
+def device_key(device_id: int) -> str:
+    return f"device:{device_id}"
+
+
+async def update_device_normal_score(device_id: int, normal_score: float) -> None:
     """Redis에 기기의 normalScore만 업데이트합니다."""
-    redis_client = get_redis_client()
-    
-    if not redis_client:
-        print("⚠️ Redis 연결이 없어 normalScore 업데이트를 건너뜁니다.")
-        return
-    
     try:
-        device_key = f"device:{device_id}"
-        redis_client.hset(device_key, "normalScore", str(normal_score))
+        with REDIS_WRITE_SECONDS.labels(op="hset").time():
+            await get_async_redis_client().hset(device_key(device_id), "normalScore", str(normal_score))
         print(f"✅ Redis 업데이트: device:{device_id}, normalScore: {normal_score:.3f}")
     except Exception as e:
         print(f"⚠️ Redis normalScore 업데이트 실패: {e}")
+
+
+async def record_normal_score(device_id: int, normal_score: float) -> None:
+    """
+    분석 결과 normalScore를 기록하고 임계값 이하면 알림을 발행합니다.
+    write-behind 버퍼가 실행 중이면 버퍼에 넣고 바로 반환 (Redis 왕복 없음),
+    아니면 HSET + PUBLISH를 직접 수행합니다.
+    """
+    write_behind = get_write_behind()
+    if write_behind.running:
+        write_behind.submit(device_id, normal_score)
+        return
+    
+    await update_device_normal_score(device_id, normal_score)
+    await publish_low_normal_score_alert(device_id, normal_score)
+
+
+async def update_device_fields(device_id: int, fields: Dict[str, str]) -> bool:
+    """
+    등록된 디바이스의 필드들을 업데이트합니다 (존재 확인 + 쓰기를 한 번의 왕복으로).
+
+    Returns:
+        bool: 디바이스가 존재해 업데이트했으면 True, 없으면 False
+
+    Raises:
+        redis.RedisError: Redis 연결/명령 오류
+    """
+    return await hset_if_exists(device_key(device_id), fields) is not None
+
+
+async def get_device_fields(device_id: int) -> Optional[Dict[str, str]]:
+    """
+    디바이스의 모든 필드를 조회합니다.
+
+    Returns:
+        Optional[dict]: 필드 딕셔너리, 디바이스가 없으면 None
+
+    Raises:
+        redis.RedisError: Redis 연결/명령 오류
+    """
+    return await hgetall_if_exists(device_key(device_id))
@@ -0,0 +1,102 @@
+"""
+비동기 Redis 접근 계층
+모든 라우트와 리포지토리가 하나의 커넥션 풀(redis.asyncio)을 공유합니다.
+
+테스트에서는 set_async_redis_client()로 fakeredis.aioredis.FakeRedis 등을 주입할 수 있습니다.
+"""
+from typing import Dict, Optional
+
+import redis.asyncio as aioredis
+
+from .redis_config import REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_MAX_CONNECTIONS
+
+# 키가 있을 때만 HSET (존재 확인 + 쓰기를 한 번의 왕복으로 원자적으로 수행)
+# 반환값: 새로 추가된 필드 수, 키가 없으면 -1
+_HSET_IF_EXISTS_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+return redis.call('HSET', KEYS[1], unpack(ARGV))
+"""
+
+# 비동기 Redis 클라이언트 인스턴스 (커넥션 풀 공유)
+_async_client: Optional[aioredis.Redis] = None
+_hset_if_exists_script = None
+
+
+def get_async_redis_client() -> aioredis.Redis:
+    """커넥션 풀을 공유하는 비동기 Redis 클라이언트를 반환합니다 (연결은 첫 명령 시 생성)."""
+    global _async_client
+
+    if _async_client is None:
+        pool = aioredis.ConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            decode_responses=True,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=5,
+            socket_timeout=5
+        )
+        _async_client = aioredis.Redis(connection_pool=pool)
+        print(f"🔌 비동기 Redis 커넥션 풀 생성: {REDIS_HOST}:{REDIS_PORT} (최대 {REDIS_MAX_CONNECTIONS}개 연결)")
+
+    return _async_client
+
+
+def set_async_redis_client(client: Optional[aioredis.Redis]) -> None:
+    """비동기 Redis 클라이언트를 교체합니다 (테스트용 fake 주입, None이면 다음 호출 시 재생성)."""
+    global _async_client, _hset_if_exists_script
+    _async_client = client
+    _hset_if_exists_script = None
+
+
+async def close_async_redis_client() -> None:
+    """커넥션 풀을 닫습니다 (서버 종료 시)."""
+    global _async_client, _hset_if_exists_script
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+        _hset_if_exists_script = None
+
+
+async def is_async_redis_available() -> bool:
+    """Redis가 사용 가능한지 확인합니다."""
+    try:
+        return bool(await get_async_redis_client().ping())
+    except Exception:
+        return False
+
+
+async def hset_if_exists(key: str, mapping: Dict[str, str]) -> Optional[int]:
+    """
+    키가 존재할 때만 해시 필드들을 씁니다 (Lua 스크립트, 한 번의 왕복).
+
+    Args:
+        key: 해시 키 (예: device:1)
+        mapping: 쓸 필드 딕셔너리
+
+    Returns:
+        Optional[int]: 새로 추가된 필드 수, 키가 없으면 None
+    """
+    global _hset_if_exists_script
+
+    client = get_async_redis_client()
+    if _hset_if_exists_script is None:
+        _hset_if_exists_script = client.register_script(_HSET_IF_EXISTS_LUA)
+
+    args = [item for field, value in mapping.items() for item in (field, value)]
+    added = await _hset_if_exists_script(keys=[key], args=args)
+    return None if added == -1 else added
+
+
+async def hgetall_if_exists(key: str) -> Optional[Dict[str, str]]:
+    """
+    해시의 모든 필드를 조회합니다. Redis는 빈 해시를 저장하지 않으므로
+    결과가 비어 있으면 키가 없는 것으로 보고 EXISTS 없이 한 번의 왕복으로 처리합니다.
+
+    Returns:
+        Optional[dict]: 필드 딕셔너리, 키가 없으면 None
+    """
+    data = await get_async_redis_client().hgetall(key)
+    return data or None
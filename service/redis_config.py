@@ -13,6 +13,7 @@ load_dotenv()
 REDIS_HOST = os.getenv("REDIS_HOST", "redis-server")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "32"))  # 비동기 커넥션 풀 크기
 
 # Redis 클라이언트 인스턴스
 _redis_client: Optional[redis.Redis] = None
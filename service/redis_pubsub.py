@@ -3,13 +3,24 @@ Redis Pub/Sub 기능
 normalScore가 임계값 이하일 때 알림 메시지를 발행합니다.
 """
 import json
-from .redis_config import get_redis_client
+from .redis_async import get_async_redis_client
 
 # Pub/Sub 설정
 ALERT_CHANNEL = "device_alerts"
 NORMAL_SCORE_THRESHOLD = 0.6
 
-def publish_low_normal_score_alert(device_id: int, normal_score: float) -> bool:
+def needs_alert(normal_score: float) -> bool:
+    """normalScore가 알림 임계값 이하인지 확인합니다."""
+    return normal_score <= NORMAL_SCORE_THRESHOLD
+
+def build_alert_message(device_id: int, normal_score: float) -> str:
+    """알림 메시지(JSON)를 생성합니다."""
+    return json.dumps({
+        "deviceId": device_id,
+        "normalScore": normal_score
+    })
+
+async def publish_low_normal_score_alert(device_id: int, normal_score: float) -> bool:
     """
     normalScore가 임계값 이하일 때 알림을 발행합니다.
     
@@ -20,26 +31,13 @@ def publish_low_normal_score_alert(device_id: int, normal_score: float) -> bool:
     Returns:
         bool: 발행 성공 여부
     """
-    redis_client = get_redis_client()
-    
-    if not redis_client:
-        print("⚠️ Redis 연결이 없어 Pub/Sub 알림을 건너뜁니다.")
-        return False
-    
     # 임계값 확인
-    if normal_score > NORMAL_SCORE_THRESHOLD:
+    if not needs_alert(normal_score):
         return True  # 정상 범위이므로 알림 필요 없음
     
     try:
-        # 알림 메시지 생성
-        alert_message = {
-            "deviceId": device_id,
-            "normalScore": normal_score
-        }
-        
-        # JSON으로 직렬화하여 발행
-        message_json = json.dumps(alert_message)
-        redis_client.publish(ALERT_CHANNEL, message_json)
+        # 알림 메시지를 JSON으로 직렬화하여 발행
+        await get_async_redis_client().publish(ALERT_CHANNEL, build_alert_message(device_id, normal_score))
         
         print(f"🚨 Pub/Sub 알림 발행: device {device_id}, normalScore: {normal_score:.3f}")
         return True
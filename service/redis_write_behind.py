@@ -0,0 +1,210 @@
+"""
+Redis Write-Behind 버퍼
+분석 요청마다 normalScore HSET / 알림 PUBLISH를 요청 경로에서 보내지 않고,
+디바이스별로 합쳐(coalesce) 백그라운드에서 파이프라인 배치로 전송합니다.
+
+- 같은 디바이스의 업데이트는 마지막 값만 유지 (메모리는 대기 디바이스 수로 제한)
+- 대기 디바이스 수가 배치 크기에 도달하거나 flush 간격이 지나면 전송
+- 알림(PUBLISH)도 같은 파이프라인으로 전송
+- 서버 종료 시 남은 업데이트를 flush
+"""
+import os
+import asyncio
+import time
+from typing import Dict, Optional
+
+from .redis_async import get_async_redis_client
+from .redis_pubsub import ALERT_CHANNEL, build_alert_message, needs_alert
+from ml.pipeline.metrics import REDIS_WRITE_SECONDS
+
+# Write-behind 설정 (.env 파일에서 읽기)
+REDIS_WRITE_BEHIND = os.getenv("REDIS_WRITE_BEHIND", "true").lower() == "true"
+REDIS_WRITE_BEHIND_BATCH_SIZE = int(os.getenv("REDIS_WRITE_BEHIND_BATCH_SIZE", "500"))        # 한 번에 보낼 최대 디바이스 수
+REDIS_WRITE_BEHIND_FLUSH_MS = float(os.getenv("REDIS_WRITE_BEHIND_FLUSH_MS", "200"))          # 최대 flush 지연 (ms)
+REDIS_WRITE_BEHIND_MAX_PENDING = int(os.getenv("REDIS_WRITE_BEHIND_MAX_PENDING", "10000"))    # 대기 디바이스 수 상한
+
+
+class RedisWriteBehind:
+    """normalScore 업데이트/알림을 디바이스별로 합쳐 파이프라인 배치로 전송하는 버퍼"""
+
+    def __init__(
+        self,
+        batch_size: int = REDIS_WRITE_BEHIND_BATCH_SIZE,
+        flush_interval_ms: float = REDIS_WRITE_BEHIND_FLUSH_MS,
+        max_pending: int = REDIS_WRITE_BEHIND_MAX_PENDING
+    ):
+        """
+        Args:
+            batch_size: 대기 디바이스 수가 이 값에 도달하면 즉시 flush
+            flush_interval_ms: 첫 업데이트 이후 최대 대기 시간 (ms)
+            max_pending: 대기 디바이스 수 상한 (초과 시 새 디바이스의 업데이트는 버림)
+        """
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.001, flush_interval_ms / 1000.0)
+        self.max_pending = max(self.batch_size, max_pending)
+
+        self._scores: Dict[int, float] = {}  # device_id → 최신 normalScore
+        self._alerts: Dict[int, float] = {}  # device_id → 알림 대상 normalScore
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.written = 0
+        self.alerts_published = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._scores)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def submit(self, device_id: int, normal_score: float) -> bool:
+        """
+        normalScore 업데이트를 버퍼에 넣습니다 (이벤트 루프 스레드에서 호출, 대기 없음).
+
+        Returns:
+            bool: 버퍼에 들어갔으면 True, 상한 초과로 버렸으면 False
+        """
+        self.submitted += 1
+        if device_id in self._scores:
+            self.coalesced += 1
+        elif len(self._scores) >= self.max_pending:
+            self.dropped += 1
+            print(f"⚠️ Redis write-behind 버퍼 가득 참 ({self.max_pending}): device {device_id} 업데이트 버림")
+            return False
+
+        self._scores[device_id] = normal_score
+        if needs_alert(normal_score):
+            self._alerts[device_id] = normal_score
+        else:
+            self._alerts.pop(device_id, None)  # 최신 값이 정상이면 대기 중인 알림 취소
+
+        if len(self._scores) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        """백그라운드 flush 태스크를 시작합니다 (이벤트 루프 안에서 호출)."""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="redis-write-behind")
+        print(f"📝 Redis write-behind 시작 (배치: {self.batch_size}, 간격: {self.flush_interval * 1000:.0f}ms, "
+              f"상한: {self.max_pending})")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._scores:
+                await self.flush()
+
+    async def flush(self):
+        """대기 중인 업데이트를 배치 크기 단위의 파이프라인으로 전송합니다."""
+        async with self._flush_lock:
+            while self._scores:
+                # 배치 분량만 꺼냄 (전송 중 들어온 업데이트는 다음 배치로)
+                device_ids = list(self._scores)[:self.batch_size]
+                scores = {device_id: self._scores.pop(device_id) for device_id in device_ids}
+                alerts = {device_id: self._alerts.pop(device_id) for device_id in device_ids if device_id in self._alerts}
+
+                start = time.perf_counter()
+                try:
+                    pipe = get_async_redis_client().pipeline(transaction=False)
+                    for device_id, normal_score in scores.items():
+                        pipe.hset(f"device:{device_id}", "normalScore", str(normal_score))
+                    for device_id, normal_score in alerts.items():
+                        pipe.publish(ALERT_CHANNEL, build_alert_message(device_id, normal_score))
+                    await pipe.execute()
+                except Exception as e:
+                    self.failures += 1
+                    print(f"⚠️ Redis write-behind flush 실패 ({len(scores)}개 디바이스): {e}")
+                    self._requeue(scores, alerts)
+                    return
+
+                elapsed = time.perf_counter() - start
+                REDIS_WRITE_SECONDS.labels(op="write_behind_flush").observe(elapsed)
+                self.flushes += 1
+                self.written += len(scores)
+                self.alerts_published += len(alerts)
+                self.last_flush_ms = round(elapsed * 1000, 2)
+
+    def _requeue(self, scores: Dict[int, float], alerts: Dict[int, float]):
+        """전송 실패한 업데이트를 되돌립니다 (그 사이 들어온 더 최신 값이 있으면 유지)."""
+        for device_id, normal_score in scores.items():
+            if device_id in self._scores:
+                continue
+            if len(self._scores) >= self.max_pending:
+                self.dropped += 1
+                continue
+            self._scores[device_id] = normal_score
+            if device_id in alerts:
+                self._alerts[device_id] = alerts[device_id]
+
+    async def stop(self):
+        """백그라운드 태스크를 멈추고 남은 업데이트를 flush합니다."""
+        if self._task is None:
+            return
+        # 진행 중인 flush가 끝난 뒤 루프가 종료되도록 (전송 중 업데이트 유실 방지)
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+        if self._scores:
+            print(f"📝 Redis write-behind 종료 flush: {len(self._scores)}개 디바이스")
+            await self.flush()
+
+    def get_status(self) -> Dict:
+        """버퍼 상태/통계를 반환합니다."""
+        return {
+            "running": self.running,
+            "pending_devices": len(self._scores),
+            "pending_alerts": len(self._alerts),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "written": self.written,
+            "alerts_published": self.alerts_published,
+            "failures": self.failures,
+            "last_flush_ms": self.last_flush_ms
+        }
+
+
+# 전역 write-behind 인스턴스
+_write_behind: Optional[RedisWriteBehind] = None
+
+
+def get_write_behind() -> RedisWriteBehind:
+    """전역 write-behind 버퍼를 반환합니다."""
+    global _write_behind
+    if _write_behind is None:
+        _write_behind = RedisWriteBehind()
+    return _write_behind
+
+
+async def start_write_behind():
+    """서버 시작 시 write-behind 버퍼를 시작합니다 (REDIS_WRITE_BEHIND=false면 아무것도 안 함)."""
+    if REDIS_WRITE_BEHIND:
+        await get_write_behind().start()
+
+
+async def stop_write_behind():
+    """서버 종료 시 남은 업데이트를 flush합니다."""
+    if _write_behind is not None:
+        await _write_behind.stop()
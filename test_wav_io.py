@@ -0,0 +1,183 @@
+"""
+WavPcmReader / decode_wav 테스트
+stdlib wave 모듈과 직접 만든 EXTENSIBLE 헤더로 WAV를 만들고, 디코딩한 샘플을 기댓값과 비교합니다.
+각 형식을 bytes, 파일 경로, 파일 객체 입력으로 모두 확인합니다.
+
+실행 (프로젝트 루트에서):
+    python -m pytest -q test_wav_io.py
+"""
+
+import io
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("torchaudio")
+
+from ml.pipeline.wav_io import WavPcmReader, decode_wav, WAVE_FORMAT_EXTENSIBLE, WAVE_FORMAT_IEEE_FLOAT
+
+SAMPLE_RATE = 16000
+# KSDATAFORMAT_SUBTYPE_* GUID에서 앞 2바이트(format tag)를 뺀 나머지
+_SUBFORMAT_GUID_TAIL = b"\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71"
+
+
+def make_pcm_wav(samples, sample_width, channels=1, sample_rate=SAMPLE_RATE):
+    """wave 모듈로 정수 PCM WAV bytes를 만듭니다. samples: [frames, channels] 정수 배열"""
+    if sample_width == 1:
+        frames = samples.astype(np.uint8).tobytes()
+    elif sample_width == 3:
+        little = samples.astype("<i4").tobytes()
+        frames = b"".join(little[i:i + 3] for i in range(0, len(little), 4))
+    else:
+        frames = samples.astype(f"<i{sample_width}").tobytes()
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(sample_width)
+        f.setframerate(sample_rate)
+        f.writeframes(frames)
+    return buffer.getvalue()
+
+
+def make_extensible_wav(samples, format_tag, bits, sample_rate=SAMPLE_RATE):
+    """WAVE_FORMAT_EXTENSIBLE 헤더(fmt 40바이트)로 WAV bytes를 만듭니다. samples: [frames, channels]"""
+    channels = samples.shape[1]
+    block_align = channels * bits // 8
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        data = samples.astype(f"<f{bits // 8}").tobytes()
+    else:
+        data = samples.astype(f"<i{bits // 8}").tobytes()
+
+    fmt = struct.pack(
+        "<HHIIHHHHI", WAVE_FORMAT_EXTENSIBLE, channels, sample_rate, sample_rate * block_align,
+        block_align, bits, 22, bits, (1 << channels) - 1
+    ) + struct.pack("<H", format_tag) + _SUBFORMAT_GUID_TAIL
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def _cases():
+    rng = np.random.default_rng(0)
+    frames = 257
+
+    pcm8 = rng.integers(0, 256, size=(frames, 1))
+    pcm16 = rng.integers(-32768, 32768, size=(frames, 2))
+    pcm24 = rng.integers(-(1 << 23), 1 << 23, size=(frames, 1))
+    pcm32 = rng.integers(-(1 << 31), 1 << 31, size=(frames, 2), dtype=np.int64)
+    float32 = rng.uniform(-1, 1, size=(frames, 2)).astype(np.float32)
+    float64 = rng.uniform(-1, 1, size=(frames, 1))
+    ext16 = rng.integers(-32768, 32768, size=(frames, 2))
+
+    return {
+        "pcm8": (make_pcm_wav(pcm8, 1), (pcm8.T - 128) / 128.0),
+        "pcm16_stereo": (make_pcm_wav(pcm16, 2, channels=2), pcm16.T / 32768.0),
+        "pcm24": (make_pcm_wav(pcm24, 3), pcm24.T / 8388608.0),
+        "pcm32_stereo": (make_pcm_wav(pcm32, 4, channels=2), pcm32.T / 2147483648.0),
+        "extensible_float32": (make_extensible_wav(float32, WAVE_FORMAT_IEEE_FLOAT, 32), float32.T),
+        "extensible_float64": (make_extensible_wav(float64, WAVE_FORMAT_IEEE_FLOAT, 64), float64.T),
+        "extensible_pcm16": (make_extensible_wav(ext16, 0x0001, 16), ext16.T / 32768.0),
+    }
+
+
+CASES = _cases()
+
+
+@pytest.fixture(params=["bytes", "path", "file"])
+def as_source(request, tmp_path):
+    """WAV bytes를 bytes / 파일 경로 / 파일 객체 입력으로 바꿔 주는 함수"""
+    opened = []
+
+    def convert(wav_bytes):
+        if request.param == "bytes":
+            return wav_bytes
+        path = tmp_path / "input.wav"
+        path.write_bytes(wav_bytes)
+        if request.param == "path":
+            return str(path)
+        f = open(path, "rb")
+        opened.append(f)
+        return f
+
+    yield convert
+    for f in opened:
+        f.close()
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_decode_matches_expected_samples(name, as_source):
+    wav_bytes, expected = CASES[name]
+    with WavPcmReader(as_source(wav_bytes)) as reader:
+        assert reader.sample_rate == SAMPLE_RATE
+        assert reader.num_channels == expected.shape[0]
+        assert reader.num_frames == expected.shape[1]
+        audio = reader.read()
+
+    assert tuple(audio.shape) == expected.shape
+    np.testing.assert_allclose(audio.numpy(), expected, atol=1e-6)
+
+
+@pytest.mark.parametrize("name", ["pcm16_stereo", "pcm24", "extensible_float32"])
+def test_read_frame_range(name, as_source):
+    wav_bytes, expected = CASES[name]
+    with WavPcmReader(as_source(wav_bytes)) as reader:
+        np.testing.assert_allclose(reader.read(100, 50).numpy(), expected[:, 100:150], atol=1e-6)
+        # 끝을 넘는 요청은 남은 프레임만 반환
+        np.testing.assert_allclose(reader.read(250, 100).numpy(), expected[:, 250:], atol=1e-6)
+
+
+def test_decode_wav_max_seconds(as_source):
+    wav_bytes, expected = CASES["pcm16_stereo"]
+    audio, sample_rate = decode_wav(as_source(wav_bytes), max_seconds=100 / SAMPLE_RATE)
+    assert sample_rate == SAMPLE_RATE
+    np.testing.assert_allclose(audio.numpy(), expected[:, :100], atol=1e-6)
+
+
+def test_truncated_data_chunk_is_clamped():
+    wav_bytes, expected = CASES["pcm16_stereo"]
+    with WavPcmReader(wav_bytes[:-10]) as reader:  # 헤더의 data 크기보다 짧은 파일 (마지막 프레임 일부 잘림)
+        assert reader.num_frames == expected.shape[1] - 3
+        np.testing.assert_allclose(reader.read().numpy(), expected[:, :-3], atol=1e-6)
+
+
+def test_unsupported_encoding_raises_value_error():
+    wav_bytes, _ = CASES["pcm16_stereo"]
+    adpcm = wav_bytes[:20] + struct.pack("<H", 0x0002) + wav_bytes[22:]  # fmt의 format tag를 ADPCM으로
+    with pytest.raises(ValueError):
+        WavPcmReader(adpcm)
+
+
+def test_not_riff_raises_value_error():
+    with pytest.raises(ValueError):
+        WavPcmReader(b"not a wav file at all")
+
+
+class _ReadSeekOnlyFile:
+    """read/seek/tell만 있는 파일 객체 (Python 3.11 미만의 SpooledTemporaryFile = UploadFile.file)"""
+
+    def __init__(self, data):
+        self._f = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._f.read(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._f.seek(offset, whence)
+
+    def tell(self):
+        return self._f.tell()
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_file_object_without_readinto(name):
+    wav_bytes, expected = CASES[name]
+    source = _ReadSeekOnlyFile(wav_bytes)
+    assert not hasattr(source, "readinto")
+    with WavPcmReader(source) as reader:
+        np.testing.assert_allclose(reader.read().numpy(), expected, atol=1e-6)
+        np.testing.assert_allclose(reader.read(100, 50).numpy(), expected[:, 100:150], atol=1e-6)
+    audio, _ = decode_wav(_ReadSeekOnlyFile(wav_bytes))
+    np.testing.assert_allclose(audio.numpy(), expected, atol=1e-6)